@@ -0,0 +1,114 @@
+import json
+import math
+import os
+import re
+
+CLAUSE_BATCH_MODE = os.environ.get("CLAUSE_BATCH_MODE", "0") == "1"
+CLAUSE_BATCH_TOKEN_BUDGET = int(os.environ.get("CLAUSE_BATCH_TOKEN_BUDGET", 6000))
+CLAUSE_BATCH_MAX_SIZE = int(os.environ.get("CLAUSE_BATCH_MAX_SIZE", 12))
+
+ANALYSIS_KEYS = ("risk_level", "risk_explanation", "actionable_advice", "clause_category")
+CLAUSE_MARKER = "**User's Clause to Analyze:**"
+
+batch_instructions = """
+You will receive several numbered clauses, each with its own Expert Context.
+Analyze every clause independently using the rules above.
+
+Return ONLY a VALID JSON array with one object per clause. Each object must have
+"clause_index" (the clause number shown below) plus EXACTLY the keys listed above.
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English legal text)."""
+    return len(text) // 4 + 1
+
+
+def split_analysis_template(analysis_prompt_template: str) -> str:
+    """The instruction preamble of a per-clause template, without the clause/context slots."""
+    return analysis_prompt_template.split(CLAUSE_MARKER)[0].rstrip()
+
+
+def pack_clause_batches(entries: list, analysis_prompt_template: str,
+                        token_budget: int = None, max_batch_size: int = None, min_batches: int = 1) -> list:
+    """
+    Greedily groups (clause_index, chunk, context) entries into batches whose prompt
+    stays within `token_budget`, so K adapts to clause and context length. A single
+    entry larger than the budget still gets a batch of its own.
+
+    Output tokens dominate generation time, so with `min_batches` set to the number of
+    concurrent calls, K is also capped at ceil(len(entries) / min_batches) to keep every
+    worker busy. With N entries and N <= min_batches that makes every batch a single
+    clause (with the default 8 workers, any document of 8 or fewer clauses), so
+    callers only batch when there are more entries than concurrent calls.
+    """
+    token_budget = token_budget or CLAUSE_BATCH_TOKEN_BUDGET
+    max_batch_size = min(max_batch_size or CLAUSE_BATCH_MAX_SIZE, max(1, math.ceil(len(entries) / max(1, min_batches))))
+    fixed = estimate_tokens(split_analysis_template(analysis_prompt_template) + batch_instructions)
+
+    batches, current, used = [], [], fixed
+    for entry in entries:
+        cost = estimate_tokens(_format_entry(*entry))
+        if current and (used + cost > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current, used = [], fixed
+        current.append(entry)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _format_entry(clause_index: int, chunk: str, similar_clauses_context: str) -> str:
+    return (
+        f"\n### Clause {clause_index}\n"
+        f"{CLAUSE_MARKER}\n\"\"\"{chunk}\"\"\"\n\n"
+        f"**Expert Context from Knowledge Base:**\n{similar_clauses_context}\n"
+    )
+
+
+def build_batch_prompt(analysis_prompt_template: str, batch: list) -> str:
+    return (
+        split_analysis_template(analysis_prompt_template)
+        + "\n" + batch_instructions
+        + "".join(_format_entry(*entry) for entry in batch)
+    )
+
+
+def parse_batch_response(text: str, expected_indices: list) -> dict:
+    """
+    Maps clause_index -> analysis for every well-formed entry in the model's JSON
+    array. Indices that are missing, duplicated or lack a required key are left out
+    so the caller can re-send those clauses one at a time.
+    """
+    clean_json_string = text.strip().replace('```json', '').replace('```', '')
+    try:
+        items = json.loads(clean_json_string)
+    except json.JSONDecodeError:
+        match = re.search(r"\[.*\]", clean_json_string, re.DOTALL)
+        if not match:
+            return {}
+        try:
+            items = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return {}
+    if not isinstance(items, list):
+        return {}
+
+    expected = set(expected_indices)
+    seen, analyses = set(), {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            clause_index = int(item.get("clause_index"))
+        except (TypeError, ValueError):
+            continue
+        if clause_index not in expected or not all(key in item for key in ANALYSIS_KEYS):
+            continue
+        if clause_index in seen:
+            analyses.pop(clause_index, None)
+            continue
+        seen.add(clause_index)
+        analyses[clause_index] = {key: item[key] for key in ANALYSIS_KEYS}
+    return analyses
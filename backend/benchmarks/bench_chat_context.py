@@ -0,0 +1,106 @@
+"""
+Prompt size and latency of the chatbot with top-k clause retrieval vs the old
+approach of pasting every clause analysis (as a Python repr) into each prompt.
+
+Builds synthetic analyses of --sizes clauses, asks --questions follow-up questions
+per document, and reports prompt tokens, prompt build time (the first question
+includes building the document's clause index) and a simulated model latency of
+    base + input_tokens * per_input_token
+using the production embedding model.
+
+    python benchmarks/bench_chat_context.py --sizes 20 100 300 --questions 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentence_transformers import SentenceTransformer
+
+from batching import estimate_tokens
+from bench_clause_batching import load_prompt
+from chat_context import CHAT_MAX_PROMPT_TOKENS, ChatContextIndex, select_clause_context, truncate_to_tokens
+
+CLAUSES = [
+    ("The tenant shall pay a monthly rent of Rs. {n},000 on or before the 5th of every month.", "Rent", "Green"),
+    ("A security deposit of {n} months' rent is payable and refundable within 30 days of vacating.", "Security Deposit", "Yellow"),
+    ("The landlord may increase the rent by {n}% every year at his discretion.", "Rent Escalation", "Red"),
+    ("Either party may terminate with {n} months' written notice after the lock-in period.", "Termination", "Green"),
+    ("The tenant shall bear all repairs, including structural repairs, costing up to Rs. {n},000.", "Maintenance", "Red"),
+    ("The tenant shall not sublet the premises or keep pets without written consent.", "Use of Premises", "Yellow"),
+]
+QUESTIONS = [
+    "How much notice do I need to give before moving out?",
+    "Can the landlord raise the rent whenever he wants?",
+    "When will I get my deposit back?",
+    "Who pays for repairs to the water tank?",
+    "Am I allowed to keep a dog?",
+]
+SUMMARY = "This is an eleven-month rental agreement for a flat in Bengaluru between the landlord and the tenant. " * 6
+
+
+def make_analysis(num_clauses: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    items = []
+    for _ in range(num_clauses):
+        text, category, risk = rng.choice(CLAUSES)
+        items.append({
+            "original_clause": text.format(n=rng.randint(1, 9)) + " " + "This obligation survives renewal. " * rng.randint(0, 4),
+            "analysis": {
+                "risk_level": risk,
+                "risk_explanation": f"This {category.lower()} clause is typical in Bengaluru leases, with some room to negotiate.",
+                "actionable_advice": f"Ask the landlord to put the {category.lower()} terms in writing before signing.",
+                "clause_category": category,
+            },
+        })
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 300])
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--base-ms", type=float, default=400)
+    parser.add_argument("--per-input-ms", type=float, default=0.05)
+    parser.add_argument("--model", default="sentence-transformers/all-mpnet-base-v2")
+    args = parser.parse_args()
+
+    template = load_prompt("chatbot_prompt_template")
+    full_template = template.replace("**Most Relevant Clause Analyses:**", "**Detailed Analysis of Clauses:**")
+    model = SentenceTransformer(args.model, device="cpu")
+    model.encode(["warm up"])
+
+    print(f"cap {CHAT_MAX_PROMPT_TOKENS} tokens, simulated latency {args.base_ms} ms + {args.per_input_ms} ms/input token")
+    print(f"{'clauses':>8} {'full tok':>9} {'top-k tok':>10} {'first build ms':>15} {'follow-up ms':>13} {'full llm ms':>12} {'top-k llm ms':>13}")
+    for size in args.sizes:
+        analysis = make_analysis(size)
+        questions = [QUESTIONS[n % len(QUESTIONS)] for n in range(args.questions)]
+        index = ChatContextIndex(model)
+
+        full_tokens = [estimate_tokens(full_template.format(summary=SUMMARY, clause_context=analysis, history="", question=q)) for q in questions]
+
+        topk_tokens, build_ms = [], []
+        for question in questions:
+            start = time.perf_counter()
+            fixed = estimate_tokens(template.format(summary="", clause_context="", history="", question=question))
+            summary = truncate_to_tokens(SUMMARY, (CHAT_MAX_PROMPT_TOKENS - fixed) // 2)
+            clause_index = index.get(analysis)
+            context = select_clause_context(clause_index, index.embed_question(question),
+                                            CHAT_MAX_PROMPT_TOKENS - fixed - estimate_tokens(summary))
+            prompt = template.format(summary=summary, clause_context=context, history="", question=question)
+            build_ms.append((time.perf_counter() - start) * 1000)
+            topk_tokens.append(estimate_tokens(prompt))
+
+        def llm_ms(tokens):
+            return sum(args.base_ms + t * args.per_input_ms for t in tokens) / len(tokens)
+
+        follow_up = sum(build_ms[1:]) / max(1, len(build_ms) - 1)
+        print(f"{size:>8} {sum(full_tokens) // len(full_tokens):>9} {sum(topk_tokens) // len(topk_tokens):>10} "
+              f"{build_ms[0]:>15.1f} {follow_up:>13.1f} {llm_ms(full_tokens):>12.0f} {llm_ms(topk_tokens):>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
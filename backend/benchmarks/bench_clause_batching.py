@@ -0,0 +1,114 @@
+"""
+Token and latency savings of batched clause analysis vs one call per clause.
+
+Uses the real rental analysis prompt from main.py and a stub model that replays
+recorded-style JSON answers, charging a simulated latency of
+    base + input_tokens * per_input_token + output_tokens * per_output_token.
+Clause batches run with the same concurrency limit as per-clause calls.
+
+    python benchmarks/bench_clause_batching.py --clauses 40 --budget 6000
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batching import build_batch_prompt, estimate_tokens, pack_clause_batches, parse_batch_response
+from pipeline import analyze_clauses
+
+RECORDED_ANALYSIS = {
+    "risk_level": "Yellow",
+    "risk_explanation": "The deposit is higher than the usual two months' rent in Bengaluru.",
+    "actionable_advice": "Negotiate the deposit down or ask for a written refund timeline.",
+    "clause_category": "Security Deposit",
+}
+CONTEXT = (
+    "- Context: 'The landlord shall refund the deposit within 30 days of vacating.'\n"
+    "  - Risk: Green\n  - Explanation: Standard refund timeline.\n"
+) * 4
+
+
+def load_prompt(name: str) -> str:
+    """Reads a module-level prompt string from main.py without importing it (and its models)."""
+    with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise KeyError(name)
+
+
+class RecordedModel:
+    def __init__(self, base_ms, per_input_ms, per_output_ms):
+        self.base_ms, self.per_input_ms, self.per_output_ms = base_ms, per_input_ms, per_output_ms
+        self.calls = self.input_tokens = self.output_tokens = 0
+
+    def generate_content(self, prompt):
+        indices = [int(i) for i in re.findall(r"### Clause (\d+)", prompt)]
+        if indices:
+            text = json.dumps([{"clause_index": i, **RECORDED_ANALYSIS} for i in indices])
+        else:
+            text = "```json\n" + json.dumps(RECORDED_ANALYSIS) + "\n```"
+        input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(text)
+        self.calls += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        time.sleep((self.base_ms + input_tokens * self.per_input_ms + output_tokens * self.per_output_ms) / 1000)
+        return type("Response", (), {"text": text})()
+
+
+def run_per_clause(model, template, chunks, workers):
+    def analyze_chunk(i, chunk):
+        response = model.generate_content(template.format(chunk=chunk, similar_clauses_context=CONTEXT))
+        return json.loads(response.text.strip().replace('```json', '').replace('```', ''))
+    return analyze_clauses(chunks, analyze_chunk, max_workers=workers)
+
+
+def run_batched(model, template, chunks, workers, budget):
+    batches = pack_clause_batches([(i, chunk, CONTEXT) for i, chunk in enumerate(chunks)], template,
+                                  token_budget=budget, min_batches=workers)
+
+    def analyze_batch(_, batch):
+        response = model.generate_content(build_batch_prompt(template, batch))
+        return parse_batch_response(response.text, [entry[0] for entry in batch])
+
+    analyses = {}
+    for result in analyze_clauses(batches, analyze_batch, max_workers=workers):
+        analyses.update(result)
+    assert len(analyses) == len(chunks), "batched run dropped clauses"
+    return batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, default=40)
+    parser.add_argument("--budget", type=int, default=6000, help="token budget per batched prompt")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--base-ms", type=float, default=400)
+    parser.add_argument("--per-input-ms", type=float, default=0.05)
+    parser.add_argument("--per-output-ms", type=float, default=8)
+    args = parser.parse_args()
+
+    template = load_prompt("rental_analysis_prompt")
+    chunks = [f"{i+1}. The Tenant shall pay a security deposit of Rs. {50000 + i * 1000} which shall be refunded "
+              f"without interest at the end of the tenancy after deducting any dues." for i in range(args.clauses)]
+
+    print(f"{'mode':>10} {'calls':>6} {'in_tokens':>10} {'out_tokens':>11} {'wall_s':>7}")
+    for mode in ("per-clause", "batched"):
+        model = RecordedModel(args.base_ms, args.per_input_ms, args.per_output_ms)
+        start = time.perf_counter()
+        if mode == "per-clause":
+            run_per_clause(model, template, chunks, args.workers)
+        else:
+            run_batched(model, template, chunks, args.workers, args.budget)
+        elapsed = time.perf_counter() - start
+        print(f"{mode:>10} {model.calls:>6} {model.input_tokens:>10} {model.output_tokens:>11} {elapsed:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
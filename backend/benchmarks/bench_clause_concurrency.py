@@ -0,0 +1,64 @@
+"""
+Benchmark for the Stage 2 clause-analysis executor.
+
+Runs the same synthetic document through `analyze_clauses` against a stubbed
+generation model with a fixed per-call latency, once per concurrency limit, and
+prints wall-clock time so the scaling is visible.
+
+    python benchmarks/bench_clause_concurrency.py --clauses 40 --latency 0.25
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import analyze_clauses
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubGenerationModel:
+    """Sleeps for `latency` seconds per call, like a remote LLM round trip."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, prompt: str):
+        time.sleep(self.latency)
+        return StubResponse('```json\n{"risk_level": "Green", "risk_explanation": "ok", '
+                            '"actionable_advice": "none", "clause_category": "General"}\n```')
+
+
+def run(num_clauses: int, latency: float, limits: list):
+    model = StubGenerationModel(latency)
+    chunks = [f"{i+1}. The tenant shall pay the monthly rent on or before the fifth day of every month." for i in range(num_clauses)]
+
+    def analyze_chunk(i, chunk):
+        response = model.generate_content(chunk)
+        clean_json_string = response.text.strip().replace('```json', '').replace('```', '')
+        return {"original_clause": chunk, "analysis": json.loads(clean_json_string)}
+
+    serial = None
+    print(f"{'max_workers':>12} {'wall_s':>8} {'speedup':>8}")
+    for limit in limits:
+        start = time.perf_counter()
+        results = analyze_clauses(chunks, analyze_chunk, max_workers=limit)
+        elapsed = time.perf_counter() - start
+        assert [r["original_clause"] for r in results] == chunks, "clause order not preserved"
+        serial = serial or elapsed
+        print(f"{limit:>12} {elapsed:>8.2f} {serial / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.25, help="stub model latency per call, in seconds")
+    parser.add_argument("--limits", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+    run(args.clauses, args.latency, args.limits)
@@ -0,0 +1,224 @@
+"""
+Index size and prompt-context savings from knowledge-base deduplication (dedup.py)
+and MMR diversification of retrieved matches (retrieval.DiversifiedBackend).
+
+Builds a synthetic knowledge base where, like real statute and contract PDFs, much
+of each document is boilerplate repeated across documents: verbatim copies,
+copies with different whitespace/case, and lightly edited variants (other names
+and amounts). Reports chunks and vector bytes before and after ingestion-time
+dedup, and for a set of queries the expert-context tokens and distinct pieces of
+evidence in the top-k, for plain top-k on the raw index vs. MMR on the deduped one.
+Variants that change an amount are kept (their material terms differ), so only the
+name-only edits count as near-duplicates. The corpus is synthetic and its share of
+repeated boilerplate (--repeated) sets the savings; measure on the real PDFs with
+tools/ingest_kb.py, which reports how many chunks it dropped.
+
+    python benchmarks/bench_dedup.py --documents 200 --queries 200
+
+With --check, verifies MinHash estimates, duplicate detection, state round-trips
+and MMR selection on small fixtures (exit status 1 on failure).
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from batching import estimate_tokens
+from dedup import ChunkDeduplicator, exact_key, minhash, shingles
+from embeddings import encode_batch, load_embedding_model
+from local_index import LocalIndex, save_local_index
+from retrieval import DiversifiedBackend, InMemoryBackend, format_expert_context, mmr_select
+
+MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+
+WORDS = ("tenant landlord lessee lessor borrower lender employee employer premises deposit rent interest notice "
+         "termination period month year amount payable refund deduction damage repair maintenance agreement party "
+         "parties clause schedule default penalty charge prepayment instalment salary confidentiality arbitration "
+         "jurisdiction court dispute registration stamp duty possession eviction renewal escalation").split()
+NAMES = ["Ramesh Kumar", "Anita Rao", "Suresh Gowda", "Priya Nair", "Imran Khan", "Lakshmi Iyer"]
+
+
+def make_clause(rng: random.Random, words: int = 120) -> str:
+    sentences, sentence = [], []
+    for _ in range(words):
+        sentence.append(rng.choice(WORDS))
+        if len(sentence) >= rng.randint(10, 18):
+            sentences.append(" ".join(sentence).capitalize() + ".")
+            sentence = []
+    return " ".join(sentences + ([" ".join(sentence).capitalize() + "."] if sentence else []))
+
+
+def variant(clause: str, rng: random.Random) -> str:
+    """The same boilerplate with a few words changed (names, amounts), as in a filled-in template."""
+    words = clause.split()
+    for _ in range(3):
+        words[rng.randrange(len(words))] = rng.choice([rng.choice(NAMES), f"Rs. {rng.randint(5, 90) * 1000}"])
+    return " ".join(words)
+
+
+def renamed(clause: str) -> str:
+    """The same clause naming another party."""
+    return clause.replace(" ", f" {NAMES[0]} ", 1)
+
+
+def make_corpus(documents: int, boilerplate: int = 40, per_document: int = 12, repeated: float = 0.6, seed: int = 0) -> list:
+    """[(chunk id, source, text)]: each document mixes shared boilerplate (copied or edited) with its own clauses."""
+    rng = random.Random(seed)
+    shared = [make_clause(rng) for _ in range(boilerplate)]
+    chunks = []
+    for d in range(documents):
+        source = f"doc{d}.pdf"
+        for c in range(per_document):
+            roll = rng.random()
+            if roll < repeated / 2:
+                text = rng.choice(shared)
+            elif roll < repeated * 0.75:
+                text = "  " + rng.choice(shared).upper().replace(". ", ".\n")
+            elif roll < repeated:
+                text = variant(rng.choice(shared), rng)
+            else:
+                text = make_clause(rng)
+            chunks.append((f"{source}_p1_c{c}", source, text))
+    return chunks
+
+
+def deduplicate(chunks: list) -> tuple:
+    dedup = ChunkDeduplicator()
+    kept, counts = [], {"exact": 0, "near": 0}
+    for chunk_id, source, text in chunks:
+        kind, _ = dedup.find(text)
+        if kind is None:
+            dedup.add(chunk_id, source, text)
+            kept.append((chunk_id, source, text))
+        else:
+            counts[kind] += 1
+    return kept, counts
+
+
+def records(chunks: list, vectors: np.ndarray) -> list:
+    return [{"id": chunk_id, "values": vector, "metadata": {"source": source, "text": text}}
+            for (chunk_id, source, text), vector in zip(chunks, vectors)]
+
+
+def context_stats(results: list) -> tuple:
+    tokens = [estimate_tokens(format_expert_context(matches)) for matches in results]
+    distinct = [len({exact_key(m["metadata"]["text"]) for m in matches}) for matches in results]
+    return float(np.mean(tokens)), float(np.mean(distinct))
+
+
+def check() -> int:
+    failures = []
+
+    def expect(name, condition):
+        print(f"{'✅' if condition else '❌'} {name}")
+        if not condition:
+            failures.append(name)
+
+    rng = random.Random(3)
+    errors = []
+    for i in range(100):
+        a = make_clause(rng, 150)
+        # a filled-in variant (~0.8 similar) or a clause sharing its first half (~0.3)
+        b = variant(a, rng) if i % 2 else " ".join(a.split()[:75] + [make_clause(rng, 75)])
+        true = len(shingles(a) & shingles(b)) / len(shingles(a) | shingles(b))
+        errors.append(abs(float(np.mean(minhash(a) == minhash(b))) - true))
+    expect(f"MinHash estimates Jaccard similarity (mean error {np.mean(errors):.3f})", np.mean(errors) < 0.06)
+
+    clause, other = make_clause(rng, 150), make_clause(rng, 150)
+    dedup = ChunkDeduplicator()
+    dedup.add("a_c0", "a.pdf", clause)
+    expect("a copy with other whitespace and case is an exact duplicate",
+           dedup.find("\n " + clause.upper().replace(" ", "  ")) == ("exact", "a_c0"))
+    expect("a variant with other names is a near-duplicate", dedup.find(renamed(clause)) == ("near", "a_c0"))
+    expect("a variant with another amount is kept", dedup.find(clause + " Rent is Rs. 25000.") == (None, None))
+    expect("an unrelated clause is kept", dedup.find(other) == (None, None))
+    expect("a short clause only matches itself",
+           dedup.find("The tenant shall pay rent.") == (None, None))
+
+    dedup.add("b_c0", "b.pdf", other)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "state.npz")
+        dedup.save(path)
+        loaded = ChunkDeduplicator.load(path)
+        expect("state survives a save and load", loaded.find(clause) == ("exact", "a_c0")
+               and loaded.find(renamed(other)) == ("near", "b_c0") and len(loaded) == 2)
+        loaded.remove_owner("a.pdf")
+        expect("removing a document frees its chunks", loaded.find(clause) == (None, None) and loaded.owned_ids("b.pdf") == {"b_c0"})
+        loaded.add("c_c0", "c.pdf", clause)
+        loaded.save(path)
+        reloaded = ChunkDeduplicator.load(path)
+        expect("removed chunks are compacted away", len(reloaded.ids) == 2 and reloaded.find(clause) == ("exact", "c_c0"))
+
+    vectors = np.random.default_rng(0).normal(size=(20, 32)).astype(np.float32)
+    query = vectors[0] + 0.1 * vectors[1]
+    relevance = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)) @ query
+    expect("lambda=1 keeps the plain relevance order",
+           mmr_select(query, vectors, 5, diversity_lambda=1.0) == np.argsort(-relevance)[:5].tolist())
+    copies = np.vstack([vectors[0], vectors[0] * 2, vectors[0] + 1e-4, vectors[5]])
+    expect("copies of the best match are returned once", sorted(mmr_select(vectors[0], copies, 4)) == [0, 3])
+
+    texts = [clause, clause, clause + " ", other]
+    chunk_records = [{"id": f"r{i}", "values": copies[i] if i < 3 else vectors[5], "metadata": {"text": t}} for i, t in enumerate(texts)]
+    plain = InMemoryBackend(chunk_records).query_many([vectors[0]], top_k=3)[0]
+    diverse = DiversifiedBackend(InMemoryBackend(chunk_records)).query_many([vectors[0]], top_k=3)[0]
+    expect("MMR drops repeated evidence from the expert context",
+           len(plain) == 3 and [m["id"] for m in diverse] == ["r0", "r3"] and "values" not in diverse[0])
+    with tempfile.TemporaryDirectory() as directory:
+        save_local_index(directory, [r["id"] for r in chunk_records], np.vstack([r["values"] for r in chunk_records]),
+                         [r["metadata"] for r in chunk_records])
+        local = DiversifiedBackend(LocalIndex(directory)).query_many([vectors[0]], top_k=3)[0]
+        expect("LocalIndex returns vectors for MMR", [m["id"] for m in local] == ["r0", "r3"])
+
+    print(f"{len(failures)} failed" if failures else "all checks passed")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--per-document", type=int, default=12, help="chunks per document")
+    parser.add_argument("--repeated", type=float, default=0.6, help="share of chunks that repeat boilerplate")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--check", action="store_true", help="run the correctness checks and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(check())
+
+    chunks = make_corpus(args.documents, per_document=args.per_document, repeated=args.repeated)
+    start = time.perf_counter()
+    kept, counts = deduplicate(chunks)
+    dedup_seconds = time.perf_counter() - start
+
+    model = load_embedding_model(MODEL_NAME)
+    vectors = np.asarray(encode_batch(model, [text for _, _, text in chunks]), dtype=np.float32)
+    row_of = {chunk_id: row for row, (chunk_id, _, _) in enumerate(chunks)}
+    kept_vectors = vectors[[row_of[chunk_id] for chunk_id, _, _ in kept]]
+    print(f"chunks:  {len(chunks)} -> {len(kept)} ({counts['exact']} copies, {counts['near']} near-duplicates dropped, "
+          f"{1 - len(kept) / len(chunks):.1%} smaller); dedup took {dedup_seconds * 1000:.0f} ms "
+          f"({len(chunks) / dedup_seconds:.0f} chunks/s)")
+    print(f"vectors: {vectors.nbytes / 1e6:.2f} MB -> {kept_vectors.nbytes / 1e6:.2f} MB")
+
+    rng = random.Random(7)
+    queries = [text if rng.random() < 0.5 else variant(text, rng) for _, _, text in rng.sample(chunks, args.queries)]
+    query_vectors = np.asarray(encode_batch(model, queries), dtype=np.float32)
+    baseline = InMemoryBackend(records(chunks, vectors))
+    deduped = DiversifiedBackend(InMemoryBackend(records(kept, kept_vectors)))
+    for name, backend in [("top-k, raw index", baseline), ("MMR, deduped index", deduped)]:
+        start = time.perf_counter()
+        results = backend.query_many(query_vectors, top_k=args.top_k)
+        elapsed = time.perf_counter() - start
+        tokens, distinct = context_stats(results)
+        print(f"{name:20} {tokens:7.1f} context tokens/query, {distinct:.2f} distinct of top-{args.top_k}, "
+              f"{elapsed / len(queries) * 1000:.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Accuracy, throughput and memory of the embedding backends (EMBEDDING_BACKEND).
+
+The knowledge-base indexes hold fp32 PyTorch vectors, so each backend is scored
+on retrieval against them: for every query, how many of the top-k clauses found
+with the backend's query vector are also in the fp32 top-k ("index" overlap).
+Chat indexes embed both sides with the same backend, so the same is measured
+with the corpus re-embedded by the backend ("self" overlap).
+
+    python benchmarks/bench_embedding_backends.py --check --min-overlap 0.9
+
+tests/test_embedding_backends.py runs the same check on a smaller corpus.
+
+Without --check, loads each backend in a fresh subprocess and reports load time,
+texts/sec through encode_batch and peak RSS:
+
+    python benchmarks/bench_embedding_backends.py --backends torch torch-int8 onnx onnx-int8
+
+The ONNX backends need optimum[onnxruntime]; torch-int8 only needs torch.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from embeddings import EMBEDDING_BACKENDS, encode_batch, load_embedding_model
+from segmenter import segment_clauses
+
+MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+SAMPLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "contract_samples.jsonl")
+# mean top-k overlap with fp32 torch a backend needs to be usable against the existing indexes
+MIN_OVERLAP = 0.9
+
+QUESTIONS = [
+    "When is the rent due each month?",
+    "Is the security deposit refundable and when?",
+    "How much notice do I need to give to leave early?",
+    "Who pays for repairs and maintenance?",
+    "Can the landlord increase the rent?",
+    "What is my notice period if I resign?",
+    "Is there a non-compete after I leave the company?",
+    "How many days of paid leave do I get?",
+    "What happens if I miss an EMI payment?",
+    "Can I prepay the loan and is there a charge?",
+    "What is the interest rate on the loan?",
+    "Can the lender recall the loan early?",
+]
+
+
+def load_corpus(size: int, seed: int = 0) -> list:
+    """Clauses from the sample contracts, recombined until there are `size` of them."""
+    clauses = []
+    with open(SAMPLES_PATH, encoding="utf-8") as f:
+        for line in f:
+            clauses.extend(clause.text for clause in segment_clauses(json.loads(line)["text"]))
+    rng = random.Random(seed)
+    corpus = list(clauses)
+    while len(corpus) < size:
+        corpus.append(" ".join(rng.sample(clauses, k=rng.randint(1, 3))))
+    return corpus[:size]
+
+
+def top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    def normalize(matrix):
+        return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+    scores = normalize(queries) @ normalize(corpus).T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def overlap(found: np.ndarray, expected: np.ndarray) -> float:
+    k = expected.shape[1]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(found, expected)]))
+
+
+def retrieval_overlap(model, queries: list, corpus: list, corpus_fp32: np.ndarray, expected: np.ndarray, k: int) -> tuple:
+    """(index overlap, self overlap, min cosine to fp32) of `model` on one corpus, see the module docstring."""
+    query_vectors = encode_batch(model, queries)
+    corpus_vectors = encode_batch(model, corpus)
+    cosine = np.sum(corpus_vectors * corpus_fp32, axis=1) / (
+        np.linalg.norm(corpus_vectors, axis=1) * np.linalg.norm(corpus_fp32, axis=1))
+    return (overlap(top_k(query_vectors, corpus_fp32, k), expected),
+            overlap(top_k(query_vectors, corpus_vectors, k), expected), float(cosine.min()))
+
+
+def reference_top_k(corpus_size: int, k: int) -> tuple:
+    """Queries, corpus, the corpus's fp32 torch vectors and the fp32 top-k of every query."""
+    corpus = load_corpus(corpus_size)
+    queries = QUESTIONS + [clause[:120] for clause in corpus[::max(1, len(corpus) // 50)]]
+    reference = load_embedding_model(MODEL_NAME, "torch")
+    corpus_fp32 = encode_batch(reference, corpus)
+    return queries, corpus, corpus_fp32, top_k(encode_batch(reference, queries), corpus_fp32, k)
+
+
+def check(backends: list, corpus_size: int, k: int, min_overlap: float) -> int:
+    queries, corpus, corpus_fp32, expected = reference_top_k(corpus_size, k)
+
+    failures = 0
+    print(f"{len(queries)} queries, {len(corpus)} clauses, top-{k}")
+    print(f"   {'backend':<10}{'index overlap':>15}{'self overlap':>14}{'min cosine':>12}")
+    for backend in backends:
+        if backend == "torch":
+            continue
+        model = load_embedding_model(MODEL_NAME, backend)
+        index_overlap, self_overlap, cosine = retrieval_overlap(model, queries, corpus, corpus_fp32, expected, k)
+        ok = min(index_overlap, self_overlap) >= min_overlap
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {backend:<10}{index_overlap:>15.3f}{self_overlap:>14.3f}{cosine:>12.4f}")
+
+    print(f"{failures} backend(s) below {min_overlap} top-{k} overlap" if failures else "all backends within the threshold")
+    return 1 if failures else 0
+
+
+def run_once(backend: str, corpus_size: int, batch_size: int):
+    """Runs in a fresh subprocess; prints one JSON line with the results."""
+    corpus = load_corpus(corpus_size)
+    start = time.perf_counter()
+    model = load_embedding_model(MODEL_NAME, backend)
+    load_seconds = time.perf_counter() - start
+    encode_batch(model, corpus[:batch_size], batch_size=batch_size)  # keep one-off initialisation out of the timing
+
+    start = time.perf_counter()
+    encode_batch(model, corpus, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "texts_per_second": round(len(corpus) / elapsed, 1),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--corpus", type=int, default=500, help="clauses to embed")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--min-overlap", type=float, default=MIN_OVERLAP, help="minimum mean top-k overlap for --check")
+    parser.add_argument("--check", action="store_true", help="run the retrieval accuracy check and exit")
+    parser.add_argument("--run-once", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_once:
+        run_once(args.run_once, args.corpus, args.batch_size)
+        return
+    if args.check:
+        sys.exit(check(args.backends, args.corpus, args.top_k, args.min_overlap))
+
+    print(f"{'backend':<12}{'load s':>8}{'texts/s':>10}{'peak RSS MB':>13}")
+    for backend in args.backends:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-once", backend,
+                                 "--corpus", str(args.corpus), "--batch-size", str(args.batch_size)],
+                                capture_output=True, text=True)
+        if output.returncode != 0:
+            print(f"❌ {backend}: {output.stderr.strip().splitlines()[-1] if output.stderr.strip() else 'failed'}")
+            continue
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        print(f"{backend:<12}{result['load_seconds']:>8.2f}{result['texts_per_second']:>10.1f}{result['peak_rss_mb']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark and correctness checks for the embedding cache (embedding_cache.py).
+
+By default, replays a skewed workload (a few clauses and questions repeat a lot,
+like boilerplate across contracts) through the production model three ways:
+uncached, cached in a fresh process, and cached after a "restart" that only has
+the on-disk store. Reports texts/sec, hit ratio and bytes used.
+
+    python benchmarks/bench_embedding_cache.py --unique 2000 --requests 200
+
+With --check, verifies that cached vectors match fresh ones, that the store
+survives a reopen, and that two processes appending to one store at the same
+time (plus a read-only reader) keep every key paired with its own vector
+(exit status 1 on failure).
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from embedding_cache import CachedEmbeddingModel
+from embeddings import encode_batch, load_embedding_model
+
+MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+
+SUBJECTS = ["The tenant", "The landlord", "The employee", "The company", "The borrower", "The lender", "Either party"]
+VERBS = ["shall pay", "shall not sublet", "may terminate", "shall maintain", "shall refund", "shall give notice of"]
+OBJECTS = ["the monthly rent", "the security deposit", "one month's notice", "the premises", "the outstanding loan",
+           "the salary", "all confidential information", "the processing fee"]
+
+
+def make_texts(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} within {i % 90 + 1} days (clause {i})."
+            for i in range(count)]
+
+
+def make_requests(texts: list, requests: int, per_request: int, seed: int = 1) -> list:
+    """Zipf-like reuse: low-numbered texts (boilerplate) show up far more often."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(texts))]
+    return [rng.choices(texts, weights=weights, k=per_request) for _ in range(requests)]
+
+
+def replay(model, batches: list) -> float:
+    start = time.perf_counter()
+    for batch in batches:
+        encode_batch(model, batch)
+    return time.perf_counter() - start
+
+
+def writer(cache_dir: str, seed: int, count: int):
+    """Runs in a subprocess: appends `count` texts (half shared with the other writer) to the store."""
+    texts = make_texts(count, seed=0)[:count // 2] + make_texts(count, seed=seed)[count // 2:]
+    model = CachedEmbeddingModel(load_embedding_model(MODEL_NAME, "torch"), MODEL_NAME, "torch", cache_dir=cache_dir)
+    for start in range(0, len(texts), 16):
+        model.encode(texts[start:start + 16])
+
+
+def check() -> int:
+    failures = []
+
+    def expect(name, condition):
+        print(f"{'✅' if condition else '❌'} {name}")
+        if not condition:
+            failures.append(name)
+
+    base = load_embedding_model(MODEL_NAME, "torch")
+    texts = make_texts(64)
+    reference = np.asarray(base.encode(texts, convert_to_numpy=True), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        model = CachedEmbeddingModel(base, MODEL_NAME, "torch", cache_dir=cache_dir)
+        first = model.encode(texts + texts[:8])
+        expect("cold encode matches the model", np.allclose(first[:64], reference, atol=1e-6))
+        expect("duplicates in one call are encoded once", model.stats()["encoded"] == 64)
+        again = model.encode(texts)
+        expect("memory hits return identical vectors", np.array_equal(again, first[:64]) and model.stats()["memory_hits"] == 64)
+        expect("whitespace differences share an entry", np.array_equal(model.encode("  " + texts[0].replace(" ", "\n ")), first[0]))
+        expect("a single string gives a 1-d vector", model.encode(texts[3]).shape == reference[3].shape)
+
+        restarted = CachedEmbeddingModel(base, MODEL_NAME, "torch", cache_dir=cache_dir)
+        from_disk = restarted.encode(texts)
+        stats = restarted.stats()
+        expect("a new process is served from disk", stats["disk_hits"] == 64 and stats["encoded"] == 0)
+        expect("disk vectors match within float16 rounding", np.allclose(from_disk, reference, atol=2e-3))
+        expect("disk store reports its size", stats["disk_bytes"] == 64 * (reference.shape[1] * 2 + 32))
+
+        other_backend = CachedEmbeddingModel(base, MODEL_NAME, "onnx", cache_dir=cache_dir)
+        other_backend.encode(texts[:4])
+        expect("another backend gets its own entries", other_backend.stats()["disk_hits"] == 0)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        count = 200
+        procs = [subprocess.Popen([sys.executable, os.path.abspath(__file__), "--writer", cache_dir, str(seed), str(count)])
+                 for seed in (11, 12)]
+        expect("concurrent writers finish", all(proc.wait() == 0 for proc in procs))
+        expected_texts = list(dict.fromkeys(make_texts(count, seed=0)[:count // 2] + make_texts(count, seed=11)[count // 2:]
+                                            + make_texts(count, seed=12)[count // 2:]))
+        reader = CachedEmbeddingModel(base, MODEL_NAME, "torch", cache_dir=cache_dir, readonly=True)
+        vectors = reader.encode(expected_texts)
+        stats = reader.stats()
+        expect(f"read-only reader finds all {len(expected_texts)} texts written by both processes",
+               stats["disk_hits"] == len(expected_texts) and stats["disk_entries"] == len(expected_texts))
+        fresh = np.asarray(base.encode(expected_texts, convert_to_numpy=True), dtype=np.float32)
+        expect("every stored key is paired with its own vector", np.allclose(vectors, fresh, atol=2e-3))
+        reader.encode(["a text nobody stored"])
+        expect("read-only reader never writes", reader.stats()["disk_writes"] == 0 and reader.stats()["disk_entries"] == len(expected_texts))
+
+    print(f"{len(failures)} failed" if failures else "all checks passed")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--unique", type=int, default=2000, help="distinct texts in the workload")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--per-request", type=int, default=40, help="texts embedded per request")
+    parser.add_argument("--check", action="store_true", help="run the correctness checks and exit")
+    parser.add_argument("--writer", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.writer:
+        writer(args.writer[0], int(args.writer[1]), int(args.writer[2]))
+        return
+    if args.check:
+        sys.exit(check())
+
+    base = load_embedding_model(MODEL_NAME)
+    base.encode(["warm up"])
+    batches = make_requests(make_texts(args.unique), args.requests, args.per_request)
+    total = args.requests * args.per_request
+
+    uncached = replay(base, batches)
+    print(f"uncached:          {total / uncached:10.1f} texts/s")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cached = CachedEmbeddingModel(base, MODEL_NAME, "torch", cache_dir=cache_dir)
+        elapsed = replay(cached, batches)
+        stats = cached.stats()
+        print(f"cached, cold:      {total / elapsed:10.1f} texts/s  ({uncached / elapsed:.1f}x)  "
+              f"hit ratio {stats['hit_ratio']:.2%}, memory {stats['memory_bytes'] / 1e6:.1f} MB, disk {stats['disk_bytes'] / 1e6:.1f} MB")
+
+        restarted = CachedEmbeddingModel(base, MODEL_NAME, "torch", cache_dir=cache_dir)
+        elapsed = replay(restarted, batches)
+        stats = restarted.stats()
+        print(f"after a restart:   {total / elapsed:10.1f} texts/s  ({uncached / elapsed:.1f}x)  "
+              f"hit ratio {stats['hit_ratio']:.2%} ({stats['disk_hits']} from disk, {stats['encoded']} encoded)")
+
+
+if __name__ == "__main__":
+    main()
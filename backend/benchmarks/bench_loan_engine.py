@@ -0,0 +1,78 @@
+"""
+Benchmark for the local loan comparison engine.
+
+Times compare_offers for the built-in offer table and the vectorized
+EMI/effective-rate grid against a plain Python loop, for --offers x --tenures.
+
+    python benchmarks/bench_loan_engine.py --offers 500 --tenures 360
+
+The amortization and parsing checks live in tests/test_loan_engine.py.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from loan_engine import MARKET_LOAN_OFFERS, compare_offers, effective_annual_rate, emi
+
+
+def scalar_emi(principal, annual_rate, months):
+    r = annual_rate / 1200
+    if r == 0:
+        return principal / months
+    return principal * r * (1 + r) ** months / ((1 + r) ** months - 1)
+
+
+def scalar_effective_rate(principal, annual_rate, months, fees):
+    """Newton's method on one loan, as an independent check on the vectorized bisection."""
+    payment, received, r = scalar_emi(principal, annual_rate, months), principal - fees, annual_rate / 1200 or 1e-6
+    for _ in range(100):
+        value = payment * (1 - (1 + r) ** -months) / r - received
+        slope = payment * (months * (1 + r) ** (-months - 1) / r - (1 - (1 + r) ** -months) / r ** 2)
+        r -= value / slope
+    return r * 1200
+
+
+def loop_grid(principal, rates, tenures, fees):
+    return [[(scalar_emi(principal, rate, months), scalar_effective_rate(principal, rate, months, fee)) for months in tenures]
+            for rate, fee in zip(rates, fees)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--offers", type=int, default=500)
+    parser.add_argument("--tenures", type=int, default=360, help="tenures 1..N months in the scenario grid")
+    args = parser.parse_args()
+
+    terms = {"principal": 500000.0, "annual_rate": 14.0, "tenure_months": 36, "processing_fee": 10000.0}
+    start = time.perf_counter()
+    for _ in range(100):
+        compare_offers(terms, MARKET_LOAN_OFFERS)
+    print(f"compare_offers ({len(MARKET_LOAN_OFFERS)} offers x 5 tenures): {(time.perf_counter() - start) * 10:.2f} ms per request")
+
+    rng = np.random.default_rng(0)
+    rates = rng.uniform(8, 24, args.offers)
+    fees = 500000 * rng.uniform(0, 0.04, args.offers)
+    tenures = np.arange(1, args.tenures + 1)
+
+    start = time.perf_counter()
+    effective_annual_rate(500000, rates[:, None], tenures[None, :], fees[:, None])
+    emi(500000, rates[:, None], tenures[None, :])
+    vectorized = time.perf_counter() - start
+
+    sample = max(1, args.offers // 50)
+    start = time.perf_counter()
+    loop_grid(500000, rates[:sample], tenures, fees[:sample])
+    looped = (time.perf_counter() - start) * args.offers / sample
+
+    cells = args.offers * args.tenures
+    print(f"{args.offers} offers x {args.tenures} tenures ({cells} loans): vectorized {vectorized * 1000:.1f} ms, "
+          f"python loop ~{looped * 1000:.0f} ms (extrapolated from {sample} offers), {looped / vectorized:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmark for PDF ingestion: pages/sec and peak RSS of page extraction plus clause
+segmentation, sequentially and with the process pool.
+
+Pass a real document with --pdf (large scanned leases are the interesting case),
+or let the script generate one: --pages text-layer pages, plus --scanned
+image-only pages (needs Pillow) that go through OCR when pytesseract, pdf2image
+and the tesseract/poppler binaries are installed, or come back empty otherwise.
+
+    python benchmarks/bench_pdf_ingest.py --pages 300 --scanned 20 --workers 1 4
+
+Peak RSS is reported for this process and for the worker processes separately;
+each run is a fresh subprocess so the numbers don't accumulate. Pool runs include
+starting the workers (spawned, so they can be measured), which the server pays
+once rather than per upload.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CLAUSE_LINES = [
+    "{n}. The Tenant shall pay the monthly rent of Rs. {rent} on or before the fifth day of each month.",
+    "{n}.1 A late fee of two percent per month applies to any amount unpaid after fifteen days.",
+    "(a) The Landlord may inspect the premises with twenty-four hours' prior written notice.",
+    "(b) Either party may terminate this agreement by giving two months' notice in writing.",
+    "{n}.2 The security deposit shall be refunded within thirty days of the Tenant vacating.",
+]
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_stream(page: int) -> bytes:
+    ops, y = ["BT", "/F1 10 Tf"], 780
+    for block in range(6):
+        n = page * 6 + block + 1
+        for template in CLAUSE_LINES:
+            ops.append(f"1 0 0 1 50 {y} Tm ({_escape(template.format(n=n, rent=10000 + n))}) Tj")
+            y -= 14
+        y -= 10
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def write_text_pdf(path: str, pages: int):
+    """Minimal multi-page PDF with a real text layer (Helvetica, no dependencies)."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        content = zlib.compress(_page_stream(page))
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), pages)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        f.writelines(b"%010d 00000 n \n" % offset for offset in offsets)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def write_scanned_pdf(path: str, pages: int):
+    """Image-only pages rendered with Pillow, like a phone scan of a printed lease."""
+    from PIL import Image, ImageDraw
+
+    images = []
+    for page in range(pages):
+        image = Image.new("L", (1700, 2200), 255)
+        draw = ImageDraw.Draw(image)
+        y = 100
+        for block in range(6):
+            n = page * 6 + block + 1
+            for template in CLAUSE_LINES:
+                draw.text((100, y), template.format(n=n, rent=10000 + n), fill=0)
+                y += 40
+            y += 30
+        images.append(image)
+    images[0].save(path, save_all=True, append_images=images[1:], resolution=200)
+
+
+def merge_pdfs(paths: list, out_path: str):
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(path)
+    with open(out_path, "wb") as f:
+        writer.write(f)
+
+
+def run_once(path: str, workers: int):
+    """Runs in a fresh subprocess; prints one JSON line with the results."""
+    # forkserver workers are children of the fork server, out of reach of RUSAGE_CHILDREN
+    os.environ.setdefault("PDF_POOL_START_METHOD", "spawn")
+    from pdf_ingest import extract_document, shutdown_pool
+
+    start = time.perf_counter()
+    extracted = extract_document(path, workers=workers)
+    elapsed = time.perf_counter() - start
+    shutdown_pool()  # reaps the workers so RUSAGE_CHILDREN covers them
+    print(json.dumps({
+        **extracted["stats"],
+        "wall_s": round(elapsed, 3),
+        "clauses": len(extracted["clauses"]),
+        "chars": len(extracted["text"]),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_worker_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="existing PDF to benchmark instead of a generated one")
+    parser.add_argument("--pages", type=int, default=200, help="generated text-layer pages")
+    parser.add_argument("--scanned", type=int, default=0, help="generated image-only pages (needs Pillow)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--run-once", nargs=2, metavar=("PDF", "WORKERS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_once:
+        run_once(args.run_once[0], int(args.run_once[1]))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.pdf
+        if path is None:
+            path = os.path.join(tmp, "contract.pdf")
+            write_text_pdf(path, args.pages)
+            if args.scanned:
+                scanned = os.path.join(tmp, "scanned.pdf")
+                write_scanned_pdf(scanned, args.scanned)
+                merge_pdfs([path, scanned], os.path.join(tmp, "merged.pdf"))
+                path = os.path.join(tmp, "merged.pdf")
+        print(f"{path}: {os.path.getsize(path) / 1e6:.1f} MB")
+
+        for workers in args.workers:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-once", path, str(workers)],
+                                    capture_output=True, text=True, check=True).stdout
+            report = json.loads(output.strip().splitlines()[-1])
+            print(f"workers={workers}: {report['pages']} pages ({report['ocr_pages']} OCR, {report['empty_pages']} empty) "
+                  f"in {report['wall_s']}s = {report['pages_per_second']} pages/s, {report['clauses']} clauses, "
+                  f"peak RSS {report['peak_rss_mb']} MB (workers {report['peak_worker_rss_mb']} MB)")
+
+
+if __name__ == "__main__":
+    main()
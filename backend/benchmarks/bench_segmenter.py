@@ -0,0 +1,133 @@
+"""
+Benchmark and golden check for the clause segmenter.
+
+Times the segmenter against the old regex splitter on a synthetic contract of
+--pages pages (about 3000 characters each) and reports clause counts, clause
+size distribution in tokens, and how much text the old splitter silently dropped.
+
+    python benchmarks/bench_segmenter.py --pages 100
+
+With --check-golden, segments every sample in benchmarks/data/contract_samples.jsonl
+and compares labels, paths and offsets with benchmarks/data/segmenter_golden.json
+(exit status 1 on any difference); tests/test_segmenter.py runs the same comparison.
+--write-golden regenerates that file after an intended change to the segmentation rules.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from segmenter import MAX_CLAUSE_TOKENS, segment_clauses
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SAMPLES_PATH = os.path.join(DATA_DIR, "contract_samples.jsonl")
+GOLDEN_PATH = os.path.join(DATA_DIR, "segmenter_golden.json")
+
+SENTENCES = [
+    "The Tenant shall pay the monthly rent on or before the fifth day of each calendar month.",
+    "Any delay beyond fifteen days shall attract a late fee of two percent per month on the outstanding amount.",
+    "The Landlord may inspect the premises with twenty-four hours' prior written notice.",
+    "Either party may terminate this agreement by giving two months' notice in writing.",
+    "The security deposit shall be refunded within thirty days of the Tenant vacating the premises.",
+]
+
+
+def old_split(document_text: str) -> list:
+    """The splitter this module replaced; it raises on documents with blank lines."""
+    return [chunk.strip() for chunk in re.split(r'\n\s*\n|\n(?=\s*(\d+\.|\*|\([a-zA-Z]\)|\b[IVX]+\.))', document_text) if len(chunk.strip()) > 50]
+
+
+def synthetic_contract(pages: int) -> str:
+    lines, section = ["RENTAL AGREEMENT", ""], 0
+    while sum(len(line) + 1 for line in lines) < pages * 3000:
+        section += 1
+        lines += [f"ARTICLE {section}", f"{section}. OBLIGATIONS UNDER ARTICLE {section}"]
+        for sub in range(1, 4):
+            lines.append(f"{section}.{sub} " + " ".join(SENTENCES[(section + sub + k) % len(SENTENCES)] for k in range(sub * 2)))
+            lines += [f"({letter}) {SENTENCES[(section + n) % len(SENTENCES)]}" for n, letter in enumerate("abc")]
+            lines.append("Noted.")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def golden_records(samples: list) -> list:
+    return [
+        [{"label": c.label, "path": c.path, "start": c.start, "end": c.end, "prefix": c.text[:40]}
+         for c in segment_clauses(sample["text"])]
+        for sample in samples
+    ]
+
+
+def check_golden(write: bool) -> int:
+    with open(SAMPLES_PATH, encoding="utf-8") as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+    records = golden_records(samples)
+    if write:
+        with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=1, ensure_ascii=False)
+        print(f"✅ wrote {sum(len(r) for r in records)} clauses for {len(samples)} samples to {GOLDEN_PATH}")
+        return 0
+
+    with open(GOLDEN_PATH, encoding="utf-8") as f:
+        golden = json.load(f)
+    failures = 0
+    for n, (expected, actual) in enumerate(zip(golden, records)):
+        if expected != actual:
+            failures += 1
+            print(f"❌ sample {n} ({samples[n]['label']}): expected {len(expected)} clauses, got {len(actual)}")
+            for e, a in zip(expected, actual):
+                if e != a:
+                    print(f"   first difference:\n     expected {e}\n     got      {a}")
+                    break
+    if len(golden) != len(records):
+        failures += 1
+        print(f"❌ golden file has {len(golden)} samples, data has {len(records)}")
+    if not failures:
+        print(f"✅ {len(records)} samples match the golden segmentation")
+    return 1 if failures else 0
+
+
+def timed(fn, repeats: int):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--max-tokens", type=int, default=MAX_CLAUSE_TOKENS)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--check-golden", action="store_true", help="compare against the golden segmentation and exit")
+    parser.add_argument("--write-golden", action="store_true", help="regenerate the golden segmentation and exit")
+    args = parser.parse_args()
+
+    if args.check_golden or args.write_golden:
+        sys.exit(check_golden(args.write_golden))
+
+    document = synthetic_contract(args.pages)
+    # the old splitter crashes on blank lines, so give it a copy without them
+    compact = "\n".join(line for line in document.split("\n") if line.strip())
+    print(f"{args.pages} pages, {len(document)} characters")
+
+    clauses, seconds = timed(lambda: segment_clauses(document, max_tokens=args.max_tokens), args.repeats)
+    sizes = sorted(len(c.text) // 4 + 1 for c in clauses)
+    print(f"segmenter: {len(clauses)} clauses in {seconds * 1000:.1f} ms "
+          f"({args.pages / seconds:.0f} pages/s), tokens p50={sizes[len(sizes) // 2]} max={sizes[-1]}")
+
+    chunks, seconds = timed(lambda: old_split(compact), args.repeats)
+    kept = sum(len(chunk) for chunk in chunks if chunk)
+    total = sum(len(line.strip()) for line in compact.split("\n"))
+    print(f"old regex: {len(chunks)} chunks in {seconds * 1000:.1f} ms, "
+          f"dropped {100 * (1 - kept / total):.1f}% of the text as short chunks")
+
+
+if __name__ == "__main__":
+    main()
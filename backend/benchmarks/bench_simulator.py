@@ -0,0 +1,128 @@
+"""
+Benchmark and correctness checks for the /simulate scenario engine.
+
+By default, times simulate() on a loan with an --amounts x --months prepayment
+grid (plus every early-exit month) and on a rental with every exit month.
+
+    python benchmarks/bench_simulator.py --amounts 100 --months 60
+
+With --check, verifies prepayment and foreclosure outcomes against a
+month-by-month simulation, plus key-entity parsing (exit status 1 on failure).
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loan_engine import emi
+from simulator import simulate
+
+LOAN_ENTITIES = """* Loan Amount: Rs. 10,00,000
+* Interest Rate: 12% p.a.
+* Tenure: 60 months
+* Penal Interest: 2% per month on overdue amounts
+* Prepayment Charges: 2% of the amount prepaid"""
+
+RENTAL_ENTITIES = """* **Monthly Rent:** ₹25,000
+* **Security Deposit:** ₹1,00,000
+* **Lease Term:** 11 months
+* **Lock-in Period:** 6 months
+* **Notice Period:** 1 month
+* **Late Payment Penalty:** Rs. 100 per day"""
+
+
+def statement(principal, annual_rate, months, payment, prepay_amount=0.0, prepay_month=None):
+    """Month-by-month repayment with an optional part-payment; returns (interest paid, months taken)."""
+    balance, interest_paid, month = principal, 0.0, 0
+    while balance > 1e-6 and month < months:
+        month += 1
+        interest = balance * annual_rate / 1200
+        interest_paid += interest
+        balance = balance + interest - min(payment, balance + interest)
+        if month == prepay_month:
+            balance -= min(prepay_amount, balance)
+    return interest_paid, month
+
+
+def check() -> int:
+    failures = []
+
+    def expect(name, condition):
+        print(f"{'✅' if condition else '❌'} {name}")
+        if not condition:
+            failures.append(name)
+
+    result = simulate(LOAN_ENTITIES, {"late_payment": {"months_late": [1, 3]}, "early_exit": {"exit_month": [12, 36]},
+                                      "prepay": {"amount": [100000, 300000], "month": [6, 24]}})
+    terms = result["terms"]
+    expect("parses the loan entities",
+           result["kind"] == "loan" and terms["principal"] == 1000000 and terms["annual_rate"] == 12
+           and terms["term_months"] == 60 and terms["penalty"] == {"monthly_rate_pct": 2.0} and terms["prepayment_fee_pct"] == 2.0)
+
+    payment = float(emi(1000000, 12, 60))
+    full_interest, _ = statement(1000000, 12, 60, payment)
+    for row in result["scenarios"]["prepay"]:
+        interest, taken = statement(1000000, 12, 60, payment, row["amount"], row["month"])
+        expected = full_interest - interest - row["fee"]
+        expect(f"prepay Rs {row['amount']:,.0f} in month {row['month']}: interest saved {row['net_interest_saved']:,.2f} "
+               f"matches statement ({expected:,.2f})", abs(row["net_interest_saved"] - expected) < 0.05 * payment)
+        expect(f"prepay Rs {row['amount']:,.0f} in month {row['month']}: {row['months_saved']} months saved",
+               math.ceil(60 - row["months_saved"] - 1e-6) == taken)
+
+    for row in result["scenarios"]["early_exit"]:
+        interest, _ = statement(1000000, 12, row["exit_month"], payment)
+        outstanding = row["foreclosure_amount"] - row["fee"]
+        expected = full_interest - interest - row["fee"]
+        expect(f"foreclose in month {row['exit_month']}: fee is 2% of the outstanding", math.isclose(row["fee"], outstanding * 0.02, abs_tol=0.02))
+        expect(f"foreclose in month {row['exit_month']}: interest saved matches statement", abs(row["net_interest_saved"] - expected) < 0.05)
+
+    late = result["scenarios"]["late_payment"]
+    expect("2% a month on one EMI for 3 months", math.isclose(late[1]["penalty"], payment * 0.06, abs_tol=0.01))
+
+    result = simulate(RENTAL_ENTITIES, {"late_payment": {"months_late": [2]}, "early_exit": {"exit_month": [2, 6, 11]}})
+    expect("parses the rental entities",
+           result["kind"] == "rental" and result["terms"]["rent"] == 25000 and result["terms"]["deposit"] == 100000
+           and result["terms"]["lock_in_months"] == 6 and result["terms"]["penalty"] == {"per_day": 100.0})
+    exits = {row["exit_month"]: row for row in result["scenarios"]["early_exit"]}
+    expect("exit in month 2 pays the rest of the lock-in plus a month's notice",
+           exits[2]["payable_without_notice"] == 125000 and exits[2]["owed_beyond_deposit"] == 25000)
+    expect("exit after the lock-in only pays notice", exits[6]["lock_in_charge"] == 0 and exits[6]["deposit_refund"] == 75000)
+    expect("exit at the end of the term gets the whole deposit back", exits[11]["deposit_refund"] == 100000)
+    expect("two months late at Rs. 100 a day", result["scenarios"]["late_payment"][0]["late_charges"] == 6000)
+
+    expect("missing terms are reported", "missing" in simulate("* Party: Someone"))
+
+    print(f"{len(failures)} failed" if failures else "all checks passed")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--amounts", type=int, default=100, help="prepayment amounts in the grid")
+    parser.add_argument("--months", type=int, default=60, help="prepayment months 1..N in the grid")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--check", action="store_true", help="run the correctness checks and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(check())
+
+    scenarios = {
+        "late_payment": {"months_late": list(range(1, 13))},
+        "early_exit": {"exit_month": None},
+        "prepay": {"amount": [10000 * (i + 1) for i in range(args.amounts)], "month": list(range(1, args.months + 1))},
+    }
+    for name, entities, grids in [("loan", LOAN_ENTITIES, scenarios), ("rental", RENTAL_ENTITIES, None)]:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            result = simulate(entities, grids)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        rows = sum(len(rows) for rows in result["scenarios"].values() if isinstance(rows, list))
+        print(f"{name}: {rows} scenarios in {elapsed * 1000:.1f} ms ({elapsed / rows * 1e6:.1f} µs per scenario)")
+
+
+if __name__ == "__main__":
+    main()
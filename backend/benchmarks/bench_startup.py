@@ -0,0 +1,85 @@
+"""
+Cold-start benchmark for the Flask backend.
+
+Starts a fresh interpreter per run for each RESOURCE_WARMUP mode and measures,
+from process spawn:
+  - import: until `import main` returns (gunicorn can hand the worker requests)
+  - first response: until a request that needs no model (POST /analyze with an
+    empty body, answered 400) comes back
+  - ready: until GET /ready answers 200, i.e. every required model and index
+    handle is loaded (never, for lazy mode, without traffic that needs them)
+
+    python benchmarks/bench_startup.py --runs 3
+
+Needs the backend's dependencies and credentials, since eager and background
+modes really load the models and open the indexes.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {backend!r})
+import main
+imported = time.time()
+client = main.app.test_client()
+client.post('/analyze', json={{}})
+first_response = time.time()
+ready = None
+deadline = time.time() + {ready_timeout}
+while {wait_ready} and time.time() < deadline:
+    if client.get('/ready').status_code == 200:
+        ready = time.time()
+        break
+    time.sleep(0.05)
+print("BENCH " + json.dumps({{"import": imported, "first_response": first_response, "ready": ready}}))
+"""
+
+
+def run_once(mode: str, ready_timeout: float) -> dict:
+    env = dict(os.environ, RESOURCE_WARMUP=mode)
+    code = CHILD.format(backend=BACKEND_DIR, ready_timeout=ready_timeout, wait_ready=mode != "lazy")
+    spawned = time.time()
+    output = subprocess.run([sys.executable, "-c", code], env=env, cwd=BACKEND_DIR, capture_output=True, text=True)
+    lines = [line for line in output.stdout.splitlines() if line.startswith("BENCH ")]
+    if output.returncode != 0 or not lines:
+        raise RuntimeError(f"{mode} run failed:\n{output.stderr[-2000:]}")
+    stamps = json.loads(lines[-1][len("BENCH "):])
+    return {name: (stamp - spawned if stamp else None) for name, stamp in stamps.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--modes", default="eager,background,lazy")
+    parser.add_argument("--ready-timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes.split(","):
+        runs = [run_once(mode, args.ready_timeout) for _ in range(args.runs)]
+        results[mode] = {name: statistics.median(run[name] for run in runs) if all(run[name] is not None for run in runs) else None
+                         for name in runs[0]}
+
+    def fmt(seconds):
+        return f"{seconds:8.2f}s" if seconds is not None else "       -"
+
+    print(f"{'mode':<12}{'import':>10}{'first response':>16}{'ready':>10}")
+    for mode, result in results.items():
+        print(f"{mode:<12}{fmt(result['import']):>10}{fmt(result['first_response']):>16}{fmt(result['ready']):>10}")
+    if "eager" in results:
+        baseline = results["eager"]["first_response"]
+        for mode, result in results.items():
+            if mode != "eager":
+                print(f"{mode}: first response {baseline / result['first_response']:.1f}x faster than eager")
+
+
+if __name__ == "__main__":
+    main()
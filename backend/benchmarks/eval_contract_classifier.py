@@ -0,0 +1,70 @@
+"""
+Offline evaluation of the local contract classifier.
+
+Reads a labeled JSONL file ({"label": ..., "text": ...} per line) and reports, for
+the keyword tier alone and (with --embeddings) keyword + nearest-centroid:
+accuracy, how many documents clear the confidence threshold (so skip the LLM),
+accuracy on just those, and per-document latency.
+
+    python benchmarks/eval_contract_classifier.py benchmarks/data/contract_samples.jsonl --embeddings
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from classifier import CONTRACT_CLASSIFIER_MIN_CONFIDENCE, classify_contract
+
+
+def evaluate(samples: list, embedding_model, threshold: float) -> dict:
+    correct = confident = confident_correct = 0
+    latencies = []
+    for sample in samples:
+        start = time.perf_counter()
+        label, confidence = classify_contract(sample["text"], embedding_model)
+        latencies.append((time.perf_counter() - start) * 1000)
+        correct += label == sample["label"]
+        if confidence >= threshold:
+            confident += 1
+            confident_correct += label == sample["label"]
+        else:
+            print(f"   below threshold: expected {sample['label']}, got {label} ({confidence:.2f})")
+    latencies.sort()
+    return {
+        "accuracy": correct / len(samples),
+        "local_coverage": confident / len(samples),
+        "local_accuracy": confident_correct / confident if confident else 0.0,
+        "p50_ms": latencies[len(latencies) // 2],
+        "max_ms": latencies[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("samples", help="labeled JSONL file")
+    parser.add_argument("--embeddings", action="store_true", help="also evaluate with the mpnet nearest-centroid tier")
+    parser.add_argument("--threshold", type=float, default=CONTRACT_CLASSIFIER_MIN_CONFIDENCE)
+    args = parser.parse_args()
+
+    with open(args.samples, encoding="utf-8") as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+
+    tiers = [("keywords", None)]
+    if args.embeddings:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")
+        classify_contract(samples[0]["text"], model)  # builds the prototype centroids
+        tiers.append(("keywords+centroid", model))
+
+    print(f"{len(samples)} documents, confidence threshold {args.threshold}")
+    for name, model in tiers:
+        print(f"{name}:")
+        report = evaluate(samples, model, args.threshold)
+        print("   " + "  ".join(f"{key}={value:.3f}" for key, value in report.items()))
+
+
+if __name__ == "__main__":
+    main()
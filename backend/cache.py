@@ -0,0 +1,286 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", 256))
+ANALYSIS_CACHE_TTL_SECONDS = int(os.environ.get("ANALYSIS_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+ANALYSIS_CACHE_DB = os.environ.get("ANALYSIS_CACHE_DB", "")
+ANALYSIS_CACHE_DB_MAX_MB = int(os.environ.get("ANALYSIS_CACHE_DB_MAX_MB", 256))
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so re-extracted copies of the same document hash the same."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def make_cache_key(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteStore:
+    """
+    On-disk tier: JSON values in one SQLite table, expired by TTL on read and
+    trimmed least-recently-used first once the stored bytes pass `max_bytes`.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] + self.ttl_seconds < now:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            return json.loads(row[0])
+
+    def set(self, key, value):
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now),
+            )
+            conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl_seconds,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            for old_key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                total -= size
+
+    def delete(self, key):
+        with self._lock, self._connect() as conn:
+            return conn.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount > 0
+
+    def size_bytes(self):
+        with self._lock, self._connect() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+
+class ResultCache:
+    """Two-tier cache: the in-memory LRU first, then the optional SQLite store."""
+
+    def __init__(self, max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES, ttl_seconds: float = ANALYSIS_CACHE_TTL_SECONDS,
+                 db_path: str = ANALYSIS_CACHE_DB, db_max_bytes: int = ANALYSIS_CACHE_DB_MAX_MB * 1024 * 1024):
+        self.memory = LRUCache(max_entries, ttl_seconds)
+        self.disk = SQLiteStore(db_path, ttl_seconds, db_max_bytes) if db_path else None
+        self._counters = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("hits")
+            self._count("memory_hits")
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                self._count("hits")
+                self._count("disk_hits")
+                return value
+        self._count("misses")
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+        self._count("writes")
+
+    def invalidate(self, key) -> bool:
+        removed = self.memory.delete(key)
+        if self.disk is not None:
+            removed = self.disk.delete(key) or removed
+        if removed:
+            self._count("invalidations")
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        if self.disk is not None:
+            stats["disk_bytes"] = self.disk.size_bytes()
+        return stats
+
+
+# per namespace (contract type + analysis prompt), not across the whole cache
+CLAUSE_CACHE_MAX_ENTRIES = int(os.environ.get("CLAUSE_CACHE_MAX_ENTRIES", 20000))
+CLAUSE_CACHE_SIMILARITY = float(os.environ.get("CLAUSE_CACHE_SIMILARITY", 0.97))
+
+
+class ClauseCache:
+    """
+    Memoizes per-clause analyses across documents.
+
+    Entries live in namespaces (contract type + analysis prompt hash). Each namespace
+    keeps a fixed-size ring of normalized clause embeddings, so a clause is served
+    from cache either by exact key or when its embedding is at least
+    `similarity_threshold` cosine-similar to a cached one whose material terms
+    (amounts, rates, periods, when the caller gives them) are the same. When a
+    namespace is full its oldest entry is overwritten.
+
+    `max_entries` bounds each namespace separately, so the whole cache holds up to
+    max_entries times the number of namespaces (one per contract type while the
+    prompts don't change). A lookup is a `get` by key, then `get_similar` on a
+    miss; hit_ratio is the share of `get` calls answered by either.
+    """
+
+    def __init__(self, max_entries: int = CLAUSE_CACHE_MAX_ENTRIES, similarity_threshold: float = CLAUSE_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._namespaces = {}
+        self._by_key = {}
+        self._counters = {"exact_hits": 0, "exact_misses": 0, "similar_hits": 0, "misses": 0, "writes": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            location = self._by_key.get(key)
+            if location is None:
+                self._counters["exact_misses"] += 1
+                return None
+            namespace, slot = location
+            self._counters["exact_hits"] += 1
+            return self._namespaces[namespace]["entries"][slot][1]
+
+    def get_similar(self, namespace: str, embedding, terms=None):
+        """
+        Best cached analysis in `namespace` above the similarity threshold, or None.
+        With `terms`, only an entry added with equal terms counts: "rent of Rs. 20,000"
+        embeds almost like "rent of Rs. 2,00,000" but needs its own analysis.
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        with self._lock:
+            ring = self._namespaces.get(namespace)
+            if ring is not None and ring["size"]:
+                scores = ring["vectors"][:ring["size"]] @ query
+                candidates = np.flatnonzero(scores >= self.similarity_threshold)
+                for slot in candidates[np.argsort(-scores[candidates])]:
+                    _, analysis, entry_terms = ring["entries"][slot]
+                    if terms is None or entry_terms == terms:
+                        self._counters["similar_hits"] += 1
+                        return analysis
+            self._counters["misses"] += 1
+            return None
+
+    def add(self, namespace: str, key: str, embedding, analysis, terms=None):
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+        with self._lock:
+            if key in self._by_key:
+                return
+            ring = self._namespaces.get(namespace)
+            if ring is None:
+                capacity = min(256, self.max_entries)
+                ring = {"vectors": np.zeros((capacity, len(vector)), dtype=np.float32),
+                        "entries": [None] * capacity, "size": 0, "next": 0}
+                self._namespaces[namespace] = ring
+            elif ring["size"] == len(ring["entries"]) < self.max_entries:
+                # grow geometrically up to max_entries instead of allocating it all upfront
+                capacity = min(2 * len(ring["entries"]), self.max_entries)
+                vectors = np.zeros((capacity, ring["vectors"].shape[1]), dtype=np.float32)
+                vectors[:ring["size"]] = ring["vectors"]
+                ring["vectors"] = vectors
+                ring["entries"].extend([None] * (capacity - ring["size"]))
+                ring["next"] = ring["size"]
+
+            slot = ring["next"]
+            evicted = ring["entries"][slot]
+            if evicted is not None:
+                self._by_key.pop(evicted[0], None)
+            ring["vectors"][slot] = vector
+            ring["entries"][slot] = (key, analysis, terms)
+            ring["next"] = (slot + 1) % len(ring["entries"])
+            ring["size"] = min(ring["size"] + 1, len(ring["entries"]))
+            self._by_key[key] = (namespace, slot)
+            self._counters["writes"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._by_key)
+        lookups = stats["exact_hits"] + stats["exact_misses"]
+        stats["hit_ratio"] = round((stats["exact_hits"] + stats["similar_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
@@ -0,0 +1,95 @@
+import json
+import os
+
+import numpy as np
+
+from batching import estimate_tokens
+from cache import LRUCache, make_cache_key
+from embeddings import encode_batch
+
+CHAT_TOP_K = int(os.environ.get("CHAT_TOP_K", 6))
+CHAT_MAX_PROMPT_TOKENS = int(os.environ.get("CHAT_MAX_PROMPT_TOKENS", 3000))
+CHAT_INDEX_MAX_DOCUMENTS = int(os.environ.get("CHAT_INDEX_MAX_DOCUMENTS", 64))
+CHAT_INDEX_TTL_SECONDS = int(os.environ.get("CHAT_INDEX_TTL_SECONDS", 3600))
+
+
+def format_clause_analysis(item: dict) -> str:
+    """One clause analysis as compact prompt text instead of a Python repr."""
+    analysis = item.get("analysis") or {}
+    lines = [f"- Clause: \"{item.get('original_clause', '').strip()}\""]
+    if analysis.get("clause_category"):
+        lines.append(f"  Category: {analysis['clause_category']}")
+    if analysis.get("risk_level") or analysis.get("risk_explanation"):
+        lines.append(f"  Risk: {analysis.get('risk_level', '')} - {analysis.get('risk_explanation', '')}".rstrip(" -"))
+    if analysis.get("actionable_advice"):
+        lines.append(f"  Advice: {analysis['actionable_advice']}")
+    return "\n".join(lines)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max(0, max_tokens * 4)
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars].rstrip() + " ..."
+
+
+class ClauseIndex:
+    """Formatted clause analyses of one document and their normalized embeddings."""
+
+    def __init__(self, texts: list, vectors: np.ndarray):
+        self.texts = texts
+        self.vectors = vectors
+
+    def search(self, query, top_k: int) -> list:
+        """(position, score) of the `top_k` most similar clauses, best first."""
+        if not self.texts:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = self.vectors @ query
+        best = np.argsort(-scores)[:top_k]
+        return [(int(position), float(scores[position])) for position in best]
+
+
+class ChatContextIndex:
+    """
+    Per-document clause-embedding indexes for the chatbot, keyed by a hash of the
+    clause analyses, so follow-up questions on the same document only embed the
+    question. Indexes are kept in an LRU with a TTL.
+    """
+
+    def __init__(self, embedding_model, max_documents: int = CHAT_INDEX_MAX_DOCUMENTS, ttl_seconds: float = CHAT_INDEX_TTL_SECONDS):
+        self.embedding_model = embedding_model
+        self._indexes = LRUCache(max_documents, ttl_seconds)
+
+    def get(self, detailed_analysis: list) -> ClauseIndex:
+        key = make_cache_key(json.dumps(detailed_analysis, sort_keys=True, ensure_ascii=False))
+        index = self._indexes.get(key)
+        if index is None:
+            texts = [format_clause_analysis(item) for item in detailed_analysis]
+            vectors = np.zeros((0, 0), dtype=np.float32)
+            if texts:
+                vectors = np.asarray(encode_batch(self.embedding_model, texts), dtype=np.float32)
+                vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            index = ClauseIndex(texts, vectors)
+            self._indexes.set(key, index)
+        return index
+
+    def embed_question(self, question: str):
+        return encode_batch(self.embedding_model, [question])[0]
+
+
+def select_clause_context(index: ClauseIndex, question_embedding, token_budget: int, top_k: int = None) -> str:
+    """
+    The `top_k` clauses most relevant to the question that fit in `token_budget`,
+    most relevant first when filling the budget but listed in document order.
+    """
+    chosen, used = [], 0
+    for position, _ in index.search(question_embedding, top_k or CHAT_TOP_K):
+        cost = estimate_tokens(index.texts[position]) + 1
+        if used + cost > token_budget:
+            continue
+        chosen.append(position)
+        used += cost
+    return "\n".join(index.texts[position] for position in sorted(chosen))
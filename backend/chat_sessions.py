@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+CHAT_SESSION_MAX = int(os.environ.get("CHAT_SESSION_MAX", 512))
+CHAT_SESSION_TTL_SECONDS = int(os.environ.get("CHAT_SESSION_TTL_SECONDS", 2 * 3600))
+CHAT_SESSION_MAX_MB = int(os.environ.get("CHAT_SESSION_MAX_MB", 256))
+CHAT_HISTORY_TURNS = int(os.environ.get("CHAT_HISTORY_TURNS", 6))
+
+
+class ChatSession:
+    """Parsed summary, clause index and a rolling window of turns for one document."""
+
+    def __init__(self, summary: str, clause_index, max_turns: int = CHAT_HISTORY_TURNS):
+        self.id = uuid.uuid4().hex
+        self.summary = summary
+        self.clause_index = clause_index
+        self.turns = deque(maxlen=max_turns)
+        self.created_at = self.last_used = time.time()
+        self.lock = threading.Lock()
+
+    def add_turn(self, question: str, answer: str):
+        with self.lock:
+            self.turns.append((question, answer))
+
+    def history(self) -> list:
+        with self.lock:
+            return list(self.turns)
+
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by this session alone: its summary and turns. The
+        clause index is shared by every session on the same document and bounded
+        by ChatContextIndex, so it isn't counted here.
+        """
+        return len(self.summary) + sum(len(q) + len(a) for q, a in self.history())
+
+    def describe(self) -> dict:
+        return {
+            "session_id": self.id,
+            "clauses": len(self.clause_index.texts),
+            "turns": [{"question": q, "answer": a} for q, a in self.history()],
+            "created_at": self.created_at,
+            "last_used": self.last_used,
+        }
+
+
+class ChatSessionStore:
+    """
+    In-memory chat sessions, evicted least-recently-used first when there are more
+    than `max_sessions` or they hold more than `max_bytes`, and dropped once idle
+    for `ttl_seconds`.
+    """
+
+    def __init__(self, max_sessions: int = CHAT_SESSION_MAX, ttl_seconds: float = CHAT_SESSION_TTL_SECONDS,
+                 max_bytes: int = CHAT_SESSION_MAX_MB * 1024 * 1024):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sessions = OrderedDict()
+        self._counters = {"created": 0, "expired": 0, "evicted": 0}
+        self._lock = threading.Lock()
+
+    def create(self, summary: str, clause_index) -> ChatSession:
+        session = ChatSession(summary, clause_index)
+        with self._lock:
+            self._sessions[session.id] = session
+            self._counters["created"] += 1
+            self._evict()
+        return session
+
+    def get(self, session_id: str):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if session.last_used + self.ttl_seconds < time.time():
+                del self._sessions[session_id]
+                self._counters["expired"] += 1
+                return None
+            session.last_used = time.time()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def record_turn(self, session: ChatSession, question: str, answer: str):
+        session.add_turn(question, answer)
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        cutoff = time.time() - self.ttl_seconds
+        for session_id in [s.id for s in self._sessions.values() if s.last_used < cutoff]:
+            del self._sessions[session_id]
+            self._counters["expired"] += 1
+        total = sum(session.nbytes() for session in self._sessions.values())
+        # the newest session is never evicted, so a single oversized one still works
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or total > self.max_bytes):
+            _, oldest = self._sessions.popitem(last=False)
+            total -= oldest.nbytes()
+            self._counters["evicted"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["sessions"] = len(self._sessions)
+            stats["bytes"] = sum(session.nbytes() for session in self._sessions.values())
+        return stats
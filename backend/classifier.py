@@ -0,0 +1,109 @@
+import math
+import os
+import re
+import threading
+
+import numpy as np
+
+CONTRACT_CLASSIFIER_MIN_CONFIDENCE = float(os.environ.get("CONTRACT_CLASSIFIER_MIN_CONFIDENCE", 0.75))
+CONTRACT_CLASSIFIER_MAX_CHARS = int(os.environ.get("CONTRACT_CLASSIFIER_MAX_CHARS", 6000))
+# keyword confidence above which the embedding isn't consulted at all
+CONTRACT_CLASSIFIER_DECISIVE_CONFIDENCE = float(os.environ.get("CONTRACT_CLASSIFIER_DECISIVE_CONFIDENCE", 0.95))
+
+# (phrase, weight) per contract type; phrases are matched case-insensitively on word boundaries
+CONTRACT_KEYWORDS = {
+    "rental": [
+        ("landlord", 3), ("tenant", 3), ("lessor", 3), ("lessee", 3), ("licensor", 2), ("licensee", 2),
+        ("rental agreement", 4), ("lease agreement", 4), ("leave and licen[cs]e", 4), ("tenancy", 3),
+        ("monthly rent", 3), ("rent", 1), ("premises", 2), ("security deposit", 2), ("lock-in", 2),
+        ("vacate", 2), ("maintenance charges", 1), ("sub-?let", 2),
+    ],
+    "employment": [
+        ("employer", 3), ("employee", 3), ("employment", 3), ("offer letter", 4), ("appointment letter", 4),
+        ("letter of appointment", 4), ("designation", 2), ("probation", 3), ("salary", 2), ("ctc", 3),
+        ("cost to company", 3), ("notice period", 2), ("joining", 2), ("provident fund", 2), ("gratuity", 2),
+        ("non-compete", 2), ("working hours", 2), ("hra", 2), ("house rent allowance", 2),
+    ],
+    "loan": [
+        ("lender", 3), ("borrower", 3), ("loan agreement", 4), ("loan", 2), ("principal", 2), ("emi", 3),
+        ("equated monthly instal?ments?", 3), ("repayment", 2), ("rate of interest", 2), ("interest rate", 2),
+        ("collateral", 2), ("guarantor", 2), ("disburse(?:d|ment)", 2), ("prepayment", 2), ("foreclosure", 2),
+        ("hypothecation", 3), ("mortgage", 2), ("sanction", 1),
+    ],
+}
+
+# short descriptions embedded once and used as per-type centroids
+CONTRACT_PROTOTYPES = {
+    "rental": [
+        "This rental agreement is made between the landlord and the tenant for the premises on a monthly rent.",
+        "The tenant shall pay a security deposit and may vacate the premises after the lock-in period with notice.",
+    ],
+    "employment": [
+        "This employment agreement sets out the employee's designation, salary, probation and notice period.",
+        "The employer offers the employee a position with a cost to company, provident fund and leave benefits.",
+    ],
+    "loan": [
+        "This loan agreement is between the lender and the borrower for a principal amount at an interest rate.",
+        "The borrower shall repay the loan in equated monthly instalments and provide collateral as security.",
+    ],
+}
+
+_PATTERNS = {
+    label: [(re.compile(r"\b" + phrase + r"\b", re.IGNORECASE), weight) for phrase, weight in keywords]
+    for label, keywords in CONTRACT_KEYWORDS.items()
+}
+_LABELS = list(CONTRACT_KEYWORDS)
+_centroids = {}
+_centroids_lock = threading.Lock()
+
+
+def _softmax(scores: np.ndarray) -> np.ndarray:
+    exp = np.exp(scores - scores.max())
+    return exp / exp.sum()
+
+
+def keyword_scores(document_text: str) -> np.ndarray:
+    """Weighted, log-damped keyword hit counts per label (in _LABELS order)."""
+    text = document_text[:CONTRACT_CLASSIFIER_MAX_CHARS]
+    return np.array([
+        sum(weight * math.log1p(len(pattern.findall(text))) for pattern, weight in _PATTERNS[label])
+        for label in _LABELS
+    ])
+
+
+def _prototype_centroids(embedding_model) -> np.ndarray:
+    key = id(embedding_model)
+    with _centroids_lock:
+        if key not in _centroids:
+            rows = []
+            for label in _LABELS:
+                vectors = np.asarray(embedding_model.encode(CONTRACT_PROTOTYPES[label]), dtype=np.float32)
+                centroid = vectors.mean(axis=0)
+                rows.append(centroid / max(float(np.linalg.norm(centroid)), 1e-12))
+            _centroids[key] = np.stack(rows)
+        return _centroids[key]
+
+
+def classify_contract(document_text: str, embedding_model=None) -> tuple:
+    """
+    Local contract classifier. Returns (label, confidence) with label one of
+    'rental', 'employment', 'loan' or 'unknown' and confidence in [0, 1].
+
+    Keyword scores are turned into a distribution; when an embedding model is given
+    and the keywords alone are below CONTRACT_CLASSIFIER_DECISIVE_CONFIDENCE, it is
+    averaged with a nearest-centroid distribution over the prototype vectors.
+    Documents with no keyword hits at all come back as ('unknown', 0.0).
+    """
+    scores = keyword_scores(document_text)
+    if scores.sum() == 0:
+        return "unknown", 0.0
+    probabilities = _softmax(scores / 2.0)
+
+    if embedding_model is not None and probabilities.max() < CONTRACT_CLASSIFIER_DECISIVE_CONFIDENCE:
+        centroids = _prototype_centroids(embedding_model)
+        document_vector = np.asarray(embedding_model.encode(document_text[:CONTRACT_CLASSIFIER_MAX_CHARS]), dtype=np.float32)
+        document_vector = document_vector / max(float(np.linalg.norm(document_vector)), 1e-12)
+        probabilities = 0.5 * probabilities + 0.5 * _softmax((centroids @ document_vector) * 20.0)
+
+    best = int(np.argmax(probabilities))
+    return _LABELS[best], float(probabilities[best])
@@ -0,0 +1,153 @@
+import os
+import re
+import zlib
+
+import numpy as np
+
+from cache import make_cache_key, normalize_text
+from revisions import material_terms
+
+DEDUP_NEAR_THRESHOLD = float(os.environ.get("DEDUP_NEAR_THRESHOLD", 0.8))
+DEDUP_NUM_PERM = 64
+DEDUP_BANDS = 16  # 16 bands of 4 rows: pairs from about 0.5 Jaccard up become candidates
+DEDUP_SHINGLE_WORDS = 5
+
+# universal hashes (a * x + b) mod p over 32-bit shingle hashes; with everything below
+# p < 2**32, a * x + b fits in uint64 and still wraps around p many times
+_PRIME = (1 << 32) - 5
+_rng = np.random.default_rng(1)
+_PERM_A = _rng.integers(1, _PRIME, DEDUP_NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _PRIME, DEDUP_NUM_PERM, dtype=np.uint64)
+
+
+def exact_key(text: str) -> str:
+    return make_cache_key(normalize_text(text).lower())
+
+
+def terms_key(text: str) -> str:
+    """Key of the clause's material terms (amounts, rates, periods); near-duplicates must share it."""
+    return make_cache_key(" ".join(f"{term}:{count}" for term, count in sorted(material_terms(text).items())))
+
+
+def shingles(text: str) -> set:
+    """Word 5-grams of the lower-cased text (the whole text when it's shorter)."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= DEDUP_SHINGLE_WORDS:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + DEDUP_SHINGLE_WORDS]) for i in range(len(words) - DEDUP_SHINGLE_WORDS + 1)}
+
+
+def minhash(text: str) -> np.ndarray:
+    """DEDUP_NUM_PERM-value MinHash signature; equal positions estimate Jaccard similarity of the shingle sets."""
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingles(text)), dtype=np.uint64)
+    return ((hashes[:, None] * _PERM_A + _PERM_B) % np.uint64(_PRIME)).min(axis=0)
+
+
+class ChunkDeduplicator:
+    """
+    Finds copies (same normalized text) and near-duplicates (estimated Jaccard
+    similarity of word shingles >= `threshold`, via MinHash with LSH banding, and
+    the same material terms) among the chunks kept so far. A filled-in template with
+    another rent or rate is not a duplicate: retrieval must still find its numbers.
+    Each kept chunk remembers its owner document, so a
+    re-ingested or deleted document's chunks can be dropped again. State round-trips
+    through `save` / `load` between ingestion runs.
+    """
+
+    def __init__(self, threshold: float = DEDUP_NEAR_THRESHOLD):
+        self.threshold = threshold
+        self.ids, self.owners, self.keys, self.terms = [], [], [], []
+        self.signatures = np.zeros((0, DEDUP_NUM_PERM), dtype=np.uint64)
+        self._pending = []
+        self._alive = []
+        self._by_key = {}
+        self._buckets = {}
+
+    def __len__(self):
+        return sum(self._alive)
+
+    def _bands(self, signature: np.ndarray) -> list:
+        rows = DEDUP_NUM_PERM // DEDUP_BANDS
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(DEDUP_BANDS)]
+
+    def _signature(self, row: int) -> np.ndarray:
+        if row >= len(self.signatures):
+            self._stack_pending()
+        return self.signatures[row]
+
+    def _stack_pending(self):
+        if self._pending:
+            self.signatures = np.vstack([self.signatures] + self._pending)
+            self._pending = []
+
+    def find(self, text: str, signature: np.ndarray = None) -> tuple:
+        """('exact' | 'near', kept chunk id) for a duplicate of a kept chunk, else (None, None)."""
+        row = self._by_key.get(exact_key(text))
+        if row is not None:
+            return "exact", self.ids[row]
+        signature = minhash(text) if signature is None else signature
+        candidates = {row for band in self._bands(signature) for row in self._buckets.get(band, ())}
+        best, best_similarity, terms = None, self.threshold, terms_key(text)
+        for row in candidates:
+            if self._alive[row] and self.terms[row] == terms:
+                similarity = float(np.mean(self._signature(row) == signature))
+                if similarity >= best_similarity:
+                    best, best_similarity = row, similarity
+        return ("near", self.ids[best]) if best is not None else (None, None)
+
+    def add(self, chunk_id: str, owner: str, text: str, signature: np.ndarray = None):
+        signature = minhash(text) if signature is None else signature
+        row = len(self.ids)
+        self.ids.append(chunk_id)
+        self.owners.append(owner)
+        self.keys.append(exact_key(text))
+        self.terms.append(terms_key(text))
+        self._pending.append(signature[None, :])
+        self._alive.append(True)
+        self._by_key.setdefault(self.keys[row], row)
+        for band in self._bands(signature):
+            self._buckets.setdefault(band, []).append(row)
+
+    def remove_owner(self, owner: str):
+        for row, row_owner in enumerate(self.owners):
+            if row_owner == owner and self._alive[row]:
+                self._alive[row] = False
+                if self._by_key.get(self.keys[row]) == row:
+                    del self._by_key[self.keys[row]]
+
+    def owned_ids(self, owner: str) -> set:
+        return {chunk_id for chunk_id, row_owner, alive in zip(self.ids, self.owners, self._alive) if row_owner == owner and alive}
+
+    def save(self, path: str):
+        """Writes the live chunks only (removed ones are compacted away)."""
+        self._stack_pending()
+        live = [row for row, alive in enumerate(self._alive) if alive]
+        temp_path = f"{path}.tmp.npz"
+        np.savez(temp_path, ids=np.array([self.ids[r] for r in live], dtype=str),
+                 owners=np.array([self.owners[r] for r in live], dtype=str),
+                 keys=np.array([self.keys[r] for r in live], dtype=str),
+                 terms=np.array([self.terms[r] for r in live], dtype=str),
+                 signatures=self.signatures[live].reshape(len(live), DEDUP_NUM_PERM))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str, threshold: float = DEDUP_NEAR_THRESHOLD):
+        dedup = cls(threshold)
+        if not os.path.exists(path):
+            return dedup
+        data = np.load(path)
+        # state saved before terms were recorded: its chunks only match exact copies
+        terms = data["terms"].tolist() if "terms" in data.files else [None] * len(data["ids"])
+        for chunk_id, owner, key, chunk_terms, signature in zip(data["ids"].tolist(), data["owners"].tolist(),
+                                                                data["keys"].tolist(), terms, data["signatures"]):
+            row = len(dedup.ids)
+            dedup.ids.append(chunk_id)
+            dedup.owners.append(owner)
+            dedup.keys.append(key)
+            dedup.terms.append(chunk_terms)
+            dedup._alive.append(True)
+            dedup._by_key.setdefault(key, row)
+            for band in dedup._bands(signature):
+                dedup._buckets.setdefault(band, []).append(row)
+        dedup.signatures = data["signatures"].astype(np.uint64).reshape(-1, DEDUP_NUM_PERM)
+        return dedup
@@ -0,0 +1,240 @@
+import fcntl
+import json
+import os
+import threading
+
+import numpy as np
+
+from cache import LRUCache, make_cache_key, normalize_text
+
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES", 10000))
+# empty disables the on-disk store
+EMBEDDING_CACHE_DIR = os.environ.get("EMBEDDING_CACHE_DIR", "")
+EMBEDDING_CACHE_DISK_MAX_MB = int(os.environ.get("EMBEDDING_CACHE_DISK_MAX_MB", 512))
+# "1" for processes that should only read a store another process fills
+EMBEDDING_CACHE_READONLY = os.environ.get("EMBEDDING_CACHE_READONLY", "0") == "1"
+
+KEYS_FILE = "keys.bin"
+VECTORS_FILE = "vectors.f16"
+META_FILE = "meta.json"
+KEY_BYTES = 32  # raw sha256
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk embeddings: row i of a float16 matrix (memory-mapped for
+    reads) belongs to the i-th 32-byte key in the key file. Appends take an
+    exclusive file lock and write the vectors before the keys, so any number of
+    processes can share one store and a reader never sees a key without its
+    vector. Once `max_bytes` is reached nothing more is written.
+    """
+
+    def __init__(self, path: str, dim: int, max_bytes: int = EMBEDDING_CACHE_DISK_MAX_MB * 1024 * 1024, readonly: bool = False):
+        self.path = path
+        self.dim = dim
+        self.max_rows = max_bytes // (dim * 2 + KEY_BYTES)
+        self.readonly = readonly
+        self._rows = {}
+        self._keys_read = 0
+        self._vectors = None
+        self._lock = threading.Lock()
+        if not readonly:
+            os.makedirs(path, exist_ok=True)
+            meta_path = os.path.join(path, META_FILE)
+            if not os.path.exists(meta_path):
+                # written aside and renamed, so a process opening the store at the same time never reads half of it
+                temp_path = f"{meta_path}.{os.getpid()}.{threading.get_ident()}"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump({"dim": dim, "dtype": "float16"}, f)
+                os.replace(temp_path, meta_path)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                stored_dim = json.load(f)["dim"]
+            if stored_dim != dim:
+                raise ValueError(f"embedding store {path} holds {stored_dim}-d vectors, not {dim}-d")
+        with self._lock:
+            self._refresh()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _refresh(self):
+        """Reads keys appended since the last look (by this or another process)."""
+        try:
+            size = os.path.getsize(self._file(KEYS_FILE))
+        except OSError:
+            return
+        rows = size // KEY_BYTES
+        if rows <= self._keys_read:
+            return
+        with open(self._file(KEYS_FILE), "rb") as f:
+            f.seek(self._keys_read * KEY_BYTES)
+            data = f.read((rows - self._keys_read) * KEY_BYTES)
+        for i in range(len(data) // KEY_BYTES):
+            self._rows.setdefault(data[i * KEY_BYTES:(i + 1) * KEY_BYTES], self._keys_read + i)
+        self._keys_read += len(data) // KEY_BYTES
+
+    def _map(self, rows: int):
+        if self._vectors is None or self._vectors.shape[0] < rows:
+            self._vectors = np.memmap(self._file(VECTORS_FILE), dtype=np.float16, mode="r", shape=(rows, self.dim))
+
+    def get_many(self, keys: list) -> list:
+        """float32 vectors for `keys` (hex digests), None where not stored."""
+        raw = [bytes.fromhex(key) for key in keys]
+        with self._lock:
+            if any(key not in self._rows for key in raw):
+                self._refresh()
+            found = [self._rows.get(key) for key in raw]
+            if not any(row is not None for row in found):
+                return [None] * len(keys)
+            self._map(self._keys_read)
+            return [None if row is None else np.asarray(self._vectors[row], dtype=np.float32) for row in found]
+
+    def add_many(self, keys: list, vectors: np.ndarray) -> int:
+        """Appends the vectors whose keys aren't stored yet; returns how many were written."""
+        if self.readonly:
+            return 0
+        with self._lock, open(self._file(KEYS_FILE), "ab") as keys_file:
+            fcntl.flock(keys_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                new = {}
+                for key, vector in zip(keys, vectors):
+                    raw = bytes.fromhex(key)
+                    if raw not in self._rows and raw not in new:
+                        new[raw] = vector
+                new = list(new.items())[:max(0, self.max_rows - self._keys_read)]
+                if not new:
+                    return 0
+                start = self._keys_read
+                block = np.asarray([vector for _, vector in new], dtype=np.float16)
+                # vectors first: a crash in between leaves orphaned bytes past the last key, which are overwritten next time
+                with open(self._file(VECTORS_FILE), "ab+") as vectors_file:
+                    vectors_file.truncate(start * self.dim * 2)
+                    vectors_file.write(block.tobytes())
+                    vectors_file.flush()
+                    os.fsync(vectors_file.fileno())
+                keys_file.write(b"".join(key for key, _ in new))
+                keys_file.flush()
+                for offset, (key, _) in enumerate(new):
+                    self._rows[key] = start + offset
+                self._keys_read = start + len(new)
+                return len(new)
+            finally:
+                fcntl.flock(keys_file, fcntl.LOCK_UN)
+
+    def __len__(self):
+        return self._keys_read
+
+    def nbytes(self) -> int:
+        return self._keys_read * (self.dim * 2 + KEY_BYTES)
+
+
+class CachedEmbeddingModel:
+    """
+    Wraps an embedding model so `encode` looks texts up by hash of (model name,
+    backend, normalized text): an in-memory LRU first, then the optional on-disk
+    store, and only the misses (each distinct text once) reach the model. Output
+    shape and dtype match `SentenceTransformer.encode`; vectors read back from
+    disk are float16-rounded.
+    """
+
+    def __init__(self, model, model_name: str, backend: str = "torch", max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+                 cache_dir: str = EMBEDDING_CACHE_DIR, readonly: bool = EMBEDDING_CACHE_READONLY):
+        self.model = model
+        self.namespace = f"{model_name}:{backend}"
+        self.memory = LRUCache(max_entries, float("inf"))
+        self.cache_dir = cache_dir
+        self.readonly = readonly
+        self.dim = None
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        self._counters = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "encoded": 0, "disk_writes": 0}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def _store(self, dim: int = None):
+        """Opened on first use; a new store is only created once the embedding size is known."""
+        if not self.cache_dir:
+            return None
+        with self._disk_lock:
+            if self._disk is None:
+                path = os.path.join(self.cache_dir, make_cache_key(self.namespace)[:16])
+                meta_path = os.path.join(path, META_FILE)
+                if os.path.exists(meta_path):
+                    with open(meta_path, encoding="utf-8") as f:
+                        dim = json.load(f)["dim"]
+                elif self.readonly or dim is None:
+                    return None
+                self._disk = EmbeddingStore(path, dim, readonly=self.readonly)
+            return self._disk
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True, show_progress_bar: bool = False, **kwargs):
+        if kwargs:
+            # options such as normalize_embeddings change the vectors, so they aren't cached
+            return self.model.encode(sentences, batch_size=batch_size, convert_to_numpy=convert_to_numpy,
+                                     show_progress_bar=show_progress_bar, **kwargs)
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        keys = [make_cache_key(self.namespace, normalize_text(text)) for text in texts]
+        vectors = [self.memory.get(key) for key in keys]
+        memory_hits = sum(vector is not None for vector in vectors)
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        disk_hits = 0
+        store = self._store() if missing else None
+        if store is not None:
+            for i, vector in zip(missing, store.get_many([keys[i] for i in missing])):
+                if vector is not None:
+                    vectors[i] = vector
+                    self.memory.set(keys[i], vector)
+                    disk_hits += 1
+            self.dim = store.dim
+            missing = [i for i in missing if vectors[i] is None]
+
+        written = 0
+        if missing:
+            first = {}
+            for i in missing:
+                first.setdefault(keys[i], i)
+            unique = list(first)
+            encoded = np.asarray(self.model.encode([texts[first[key]] for key in unique], batch_size=batch_size,
+                                                   convert_to_numpy=True, show_progress_bar=show_progress_bar), dtype=np.float32)
+            self.dim = encoded.shape[1]
+            by_key = dict(zip(unique, encoded))
+            for i in missing:
+                vectors[i] = by_key[keys[i]]
+            for key, vector in by_key.items():
+                self.memory.set(key, vector)
+            store = store or self._store(encoded.shape[1])
+            if store is not None:
+                written = store.add_many(unique, encoded)
+
+        with self._lock:
+            self._counters["hits"] += memory_hits + disk_hits
+            self._counters["memory_hits"] += memory_hits
+            self._counters["disk_hits"] += disk_hits
+            self._counters["misses"] += len(missing)
+            self._counters["encoded"] += len(set(keys[i] for i in missing))
+            self._counters["disk_writes"] += written
+
+        result = np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        return result[0] if single else result
+
+    def memory_bytes(self) -> int:
+        return len(self.memory) * (self.dim or 0) * 4
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        stats["memory_bytes"] = self.memory_bytes()
+        if self._disk is not None:
+            stats["disk_entries"] = len(self._disk)
+            stats["disk_bytes"] = self._disk.nbytes()
+        return stats
@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", 32))
+# torch: fp32 PyTorch (the vectors in the knowledge-base indexes were built this way)
+# torch-int8: PyTorch with dynamically quantized int8 Linear layers, no extra dependencies
+# onnx / onnx-int8: ONNX Runtime, fp32 or int8 weights; needs optimum[onnxruntime]
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch").lower()
+# int8 ONNX weights shipped in the model repo; pick the variant for the CPU (avx2, avx512, avx512_vnni, arm64)
+EMBEDDING_ONNX_INT8_FILE = os.environ.get("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+
+def encode_batch(model, texts: list, batch_size: int = None) -> np.ndarray:
+    """
+    Embeds all texts with one batched `model.encode` call and returns a
+    (len(texts), dim) matrix in the same order as `texts`.
+
+    Texts are sorted by length before encoding so each batch holds similarly sized
+    inputs and the tokenizer pads as little as possible; rows are put back in the
+    caller's order afterwards.
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    sorted_vectors = model.encode(
+        [texts[i] for i in order],
+        batch_size=batch_size or EMBEDDING_BATCH_SIZE,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+
+    vectors = np.empty_like(sorted_vectors)
+    vectors[order] = sorted_vectors
+    return vectors
+
+
+def load_embedding_model(model_name: str, backend: str = None):
+    """
+    A SentenceTransformer for `model_name` running on the given backend (default
+    EMBEDDING_BACKEND). Every backend has the same `encode` signature and output
+    shape, so callers never need to know which one they have. When an ONNX
+    backend can't be loaded (optimum/onnxruntime missing, no ONNX weights), falls
+    back to fp32 PyTorch. The backend that actually loaded is recorded on the model
+    as `embedding_backend`, e.g. for cache namespaces.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {', '.join(EMBEDDING_BACKENDS)}")
+
+    if backend.startswith("onnx"):
+        model_kwargs = {"file_name": EMBEDDING_ONNX_INT8_FILE} if backend == "onnx-int8" else None
+        try:
+            model = SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+            model.embedding_backend = backend
+            return model
+        except Exception as e:
+            print(f"❌ could not load the {backend} embedding backend, using torch: {e}")
+            backend = "torch"
+
+    if backend == "torch":
+        model = SentenceTransformer(model_name)
+    else:
+        model = SentenceTransformer(model_name, device="cpu")
+        import torch
+
+        # weights of every Linear layer stored as int8; activations are quantized on the fly
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    model.embedding_backend = backend
+    return model
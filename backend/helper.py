@@ -1,12 +1,18 @@
 import re
-from tavily import TavilyClient
 import os
-from vertexai.generative_models import Tool, FunctionDeclaration
 from dotenv import load_dotenv
 load_dotenv()
 
 TAVILY_KEY = os.environ.get("TAVILY_API_KEY")
-tavily_client = TavilyClient(api_key=TAVILY_KEY)
+_tavily_client = None
+
+def get_tavily_client():
+    """Created on first search so importing this module stays cheap."""
+    global _tavily_client
+    if _tavily_client is None:
+        from tavily import TavilyClient
+        _tavily_client = TavilyClient(api_key=TAVILY_KEY)
+    return _tavily_client
 
 def extract_interest_rate(summary: str) -> float:
     """
@@ -24,7 +30,7 @@ def tavily_search_tool(query: str) -> list:
     Search Tavily for current loan interest rates.
     Returns a list of dicts with bank name, rate, and URL.
     """
-    search_results = tavily_client.search(query, max_results=5)
+    search_results = get_tavily_client().search(query, max_results=5)
     parsed = []
     for r in search_results.get("results", []):
         parsed.append({
@@ -37,17 +43,18 @@ def tavily_search_tool(query: str) -> list:
 
 
 # Define the tool function
-search_func = FunctionDeclaration(
-    name="search_web",
-    description="Searches the internet for current bank loan interest rates",
-    parameters={
-        "type": "object",
-        "properties": {
-            "query": {"type": "string", "description": "Search query for loan rates"}
+def get_search_tool():
+    """The Vertex AI tool declaration for web search (imports the Vertex SDK on first call)."""
+    from vertexai.generative_models import Tool, FunctionDeclaration
+    search_func = FunctionDeclaration(
+        name="search_web",
+        description="Searches the internet for current bank loan interest rates",
+        parameters={
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "Search query for loan rates"}
+            },
+            "required": ["query"],
         },
-        "required": ["query"],
-    },
-)
-
-search_tool = Tool(function_declarations=[search_func])
-
+    )
+    return Tool(function_declarations=[search_func])
@@ -0,0 +1,214 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", 32))
+JOB_STORE = os.environ.get("JOB_STORE", "memory")
+JOB_STORE_PATH = os.environ.get("JOB_STORE_PATH", "jobs.db")
+JOB_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION_SECONDS", 3600))
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class InMemoryJobStore:
+    """Job records kept in a dict; finished jobs are dropped after the retention period."""
+
+    def __init__(self, retention_seconds: float = JOB_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: dict):
+        with self._lock:
+            self._jobs[job["id"]] = json.loads(json.dumps(job))
+            cutoff = time.time() - self.retention_seconds
+            for job_id in [j["id"] for j in self._jobs.values() if j["status"] in FINISHED_STATUSES and (j["finished_at"] or 0) < cutoff]:
+                del self._jobs[job_id]
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job else None
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+
+class SQLiteJobStore:
+    """Job records as JSON rows in SQLite, so any thread (or process) can read progress."""
+
+    def __init__(self, path: str = JOB_STORE_PATH, retention_seconds: float = JOB_RETENTION_SECONDS):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, data TEXT NOT NULL, finished_at REAL)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, job: dict):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO jobs (id, data, finished_at) VALUES (?, ?, ?)",
+                         (job["id"], json.dumps(job, ensure_ascii=False), job["finished_at"]))
+            conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                         (time.time() - self.retention_seconds,))
+
+    def get(self, job_id: str):
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, job_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+
+def make_job_store():
+    if JOB_STORE == "sqlite":
+        return SQLiteJobStore()
+    return InMemoryJobStore()
+
+
+class JobManager:
+    """
+    Runs analysis jobs on a fixed pool of worker threads fed by a bounded queue.
+
+    `runner(payload, emit, cancel_event)` does the work and returns the final result.
+    Events it emits update the job's progress and partial results: 'clauses' sets
+    the clause total, each 'clause' adds one analyzed clause, and any other event is
+    stored as a partial result under its name. Cancelling sets `cancel_event`, which
+    the runner is expected to check between units of work.
+    """
+
+    def __init__(self, runner, store=None, workers: int = JOB_WORKERS, max_queue: int = JOB_QUEUE_SIZE):
+        self.runner = runner
+        self.store = store or make_job_store()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._payloads = {}
+        self._cancel_events = {}
+        self._lock = threading.Lock()
+        for n in range(workers):
+            threading.Thread(target=self._work, name=f"job-worker-{n}", daemon=True).start()
+
+    def submit(self, payload: dict) -> dict:
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "progress": {"done": 0, "total": None},
+            "partial": {},
+            "result": None,
+            "error": None,
+        }
+        with self._lock:
+            self._payloads[job["id"]] = payload
+            self._cancel_events[job["id"]] = threading.Event()
+        self.store.save(job)
+        try:
+            self._queue.put_nowait(job["id"])
+        except queue.Full:
+            with self._lock:
+                self._payloads.pop(job["id"], None)
+                self._cancel_events.pop(job["id"], None)
+            self.store.delete(job["id"])
+            raise QueueFull()
+        return job
+
+    def get(self, job_id: str):
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return job
+        with self._lock:
+            cancel_event = self._cancel_events.get(job_id)
+        if cancel_event is not None:
+            cancel_event.set()
+        if job["status"] == "queued":
+            job.update(status="cancelled", finished_at=time.time())
+            self.store.save(job)
+        return job
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "max_queue": self._queue.maxsize}
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                print(f"❌ error in job worker for {job_id}: {e}")
+            finally:
+                with self._lock:
+                    self._payloads.pop(job_id, None)
+                    self._cancel_events.pop(job_id, None)
+                self._queue.task_done()
+
+    def _run(self, job_id: str):
+        job = self.store.get(job_id)
+        with self._lock:
+            payload = self._payloads.get(job_id)
+            cancel_event = self._cancel_events.get(job_id)
+        if job is None or payload is None or job["status"] != "queued" or cancel_event.is_set():
+            return
+
+        job.update(status="running", started_at=time.time())
+        self.store.save(job)
+        lock = threading.Lock()
+
+        def emit(name, data):
+            with lock:
+                if name == "clauses":
+                    job["progress"]["total"] = data["total"]
+                elif name == "clause":
+                    clauses = job["partial"].setdefault("detailed_analysis", [])
+                    clauses.append(data)
+                    clauses.sort(key=lambda clause: clause["index"])
+                    job["progress"]["done"] += 1
+                else:
+                    job["partial"][name] = data
+                self.store.save(job)
+
+        try:
+            result = self.runner(payload, emit, cancel_event)
+            if cancel_event.is_set():
+                raise JobCancelled()
+            with lock:
+                job.update(status="completed", result=result, partial={})
+                if job["progress"]["total"] is not None:
+                    job["progress"]["done"] = job["progress"]["total"]
+        except JobCancelled:
+            with lock:
+                job["status"] = "cancelled"
+        except Exception as e:
+            print(f"❌ error during job {job_id}: {e}")
+            with lock:
+                job.update(status="failed", error=str(e))
+        with lock:
+            job["finished_at"] = time.time()
+            self.store.save(job)
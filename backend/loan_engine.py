@@ -0,0 +1,248 @@
+import json
+import os
+import re
+
+import numpy as np
+
+LOAN_OFFERS_PATH = os.environ.get("LOAN_OFFERS_PATH", "")
+LOAN_MAX_TENURE_MONTHS = 600
+LOAN_MAX_RATE = 100.0
+LOAN_COMPARISON_MAX_VALUES = 500  # offers or tenures in one request
+
+# indicative personal-loan offers; override with LOAN_OFFERS_PATH (a JSON list of the same shape)
+MARKET_LOAN_OFFERS = [
+    {"lender": "HDFC Bank", "annual_rate": 10.90, "processing_fee_pct": 2.5},
+    {"lender": "ICICI Bank", "annual_rate": 10.85, "processing_fee_pct": 2.0},
+    {"lender": "State Bank of India", "annual_rate": 11.45, "processing_fee_pct": 1.5},
+    {"lender": "Axis Bank", "annual_rate": 11.25, "processing_fee_pct": 2.0},
+    {"lender": "Kotak Mahindra Bank", "annual_rate": 10.99, "processing_fee_pct": 3.0},
+    {"lender": "Bajaj Finserv", "annual_rate": 13.00, "processing_fee_pct": 3.9},
+]
+
+_NUMBER = r"(\d[\d,]*(?:\.\d+)?)"
+_AMOUNT = re.compile(r"(?:rs\.?|inr|₹)\s*" + _NUMBER + r"\s*(lakhs?|lacs?|crores?|cr\b)?|" + _NUMBER + r"\s*(lakhs?|lacs?|crores?)\b", re.IGNORECASE)
+_PRINCIPAL_CUE = re.compile(r"loan amount|principal|sum of|loan of|amount of|borrow|sanctioned|disburse", re.IGNORECASE)
+_RATE = re.compile(r"(\d{1,2}(?:\.\d+)?)\s*%\s*(?:p\.?\s?a\.?|per annum|per year|annual|\(?fixed|\(?floating|rate of interest|interest)"
+                   r"|(?:interest|rate)[^.%]{0,40}?(\d{1,2}(?:\.\d+)?)\s*%", re.IGNORECASE)
+_TENURE = re.compile(r"(\d{1,3})\s*(?:equated monthly instal?ments|emis|monthly instal?ments)"
+                     r"|(?:tenure|term|period|repayable|repaid|over|for)[^.\d]{0,30}?(\d{1,3})\s*(months?|years?|yrs?)\b", re.IGNORECASE)
+_FEE_PCT = re.compile(r"processing (?:fee|charges?)[^.%\d]{0,40}?(\d{1,2}(?:\.\d+)?)\s*%", re.IGNORECASE)
+_FEE_AMOUNT = re.compile(r"processing (?:fee|charges?)[^.\d]{0,40}?(?:rs\.?|inr|₹)\s*" + _NUMBER, re.IGNORECASE)
+
+
+def _to_number(digits: str, unit: str = None) -> float:
+    value = float(digits.replace(",", ""))
+    unit = (unit or "").lower()
+    if unit.startswith(("lakh", "lac")):
+        value *= 1e5
+    elif unit.startswith(("crore", "cr")):
+        value *= 1e7
+    return value
+
+
+def parse_amount(text: str):
+    """First rupee amount in `text` ('Rs. 25,000', '₹5 lakh', or a bare number), else None."""
+    match = _AMOUNT.search(text)
+    if match:
+        return _to_number(match.group(1) or match.group(3), match.group(2) or match.group(4))
+    match = re.search(_NUMBER, text)
+    return _to_number(match.group(1)) if match else None
+
+
+def parse_loan_terms(text: str) -> dict:
+    """
+    Principal, annual rate (%), tenure (months) and processing fee from a loan
+    summary or agreement. Missing values come back as None; the fee defaults to 0.
+    Handles Indian formats such as 'Rs. 5,00,000', '₹5 lakh' and '12% p.a.'.
+    """
+    amounts = []
+    for match in _AMOUNT.finditer(text):
+        value = _to_number(match.group(1) or match.group(3), match.group(2) or match.group(4))
+        cue = _PRINCIPAL_CUE.search(text, max(0, match.start() - 60), match.start())
+        fee = re.search(r"fee|charge|penal", text[max(0, match.start() - 40):match.start()], re.IGNORECASE)
+        amounts.append((bool(cue) and not fee, not fee, value))
+    # prefer amounts introduced as the loan amount, then the largest non-fee amount
+    principal = max(amounts)[2] if amounts else None
+
+    annual_rate = None
+    for match in _RATE.finditer(text):
+        # penal / late-payment rates are not the loan's rate
+        if re.search(r"penal|default|late|overdue|delay", text[max(0, match.start() - 30):match.end()], re.IGNORECASE):
+            continue
+        annual_rate = float(match.group(1) or match.group(2))
+        break
+
+    tenure_months = None
+    tenure_match = _TENURE.search(text)
+    if tenure_match:
+        if tenure_match.group(1):
+            tenure_months = int(tenure_match.group(1))
+        else:
+            tenure_months = int(tenure_match.group(2)) * (12 if tenure_match.group(3).lower().startswith(("year", "yr")) else 1)
+
+    fee = 0.0
+    fee_pct = _FEE_PCT.search(text)
+    fee_amount = _FEE_AMOUNT.search(text)
+    if fee_pct and principal:
+        fee = principal * float(fee_pct.group(1)) / 100
+    elif fee_amount:
+        fee = _to_number(fee_amount.group(1))
+
+    return {"principal": principal, "annual_rate": annual_rate, "tenure_months": tenure_months, "processing_fee": fee}
+
+
+def load_market_offers() -> list:
+    if LOAN_OFFERS_PATH:
+        with open(LOAN_OFFERS_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    return MARKET_LOAN_OFFERS
+
+
+def offers_from_search_results(results: list, processing_fee_pct: float = 2.0) -> list:
+    """The lowest rate quoted in each search result (e.g. 'rates from 10.90% p.a.') as an offer."""
+    offers = []
+    for result in results:
+        rates = [float(rate) for rate in re.findall(r"(\d{1,2}(?:\.\d+)?)\s*%", result.get("snippet", ""))]
+        rates = [rate for rate in rates if 5 <= rate <= 40]
+        if rates:
+            offers.append({"lender": result.get("title", "")[:80], "annual_rate": min(rates),
+                           "processing_fee_pct": processing_fee_pct, "source": result.get("url", "")})
+    return offers
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value)
+
+
+def validate_offers(offers) -> list:
+    """Checks client-supplied offers; raises ValueError naming the first bad field."""
+    if not isinstance(offers, list) or not 0 < len(offers) <= LOAN_COMPARISON_MAX_VALUES:
+        raise ValueError(f"'offers' must be a list of 1 to {LOAN_COMPARISON_MAX_VALUES} offers")
+    for i, offer in enumerate(offers):
+        if not isinstance(offer, dict) or not isinstance(offer.get("lender"), str):
+            raise ValueError(f"offers[{i}] must be an object with a 'lender' name")
+        rate = offer.get("annual_rate")
+        if not _is_number(rate) or not 0 <= rate <= LOAN_MAX_RATE:
+            raise ValueError(f"offers[{i}].annual_rate must be a number between 0 and {LOAN_MAX_RATE:g}")
+        for field in ("processing_fee_pct", "processing_fee"):
+            if field in offer and (not _is_number(offer[field]) or offer[field] < 0):
+                raise ValueError(f"offers[{i}].{field} must be a non-negative number")
+    return offers
+
+
+def validate_tenures(tenures) -> list:
+    """Checks client-supplied tenures (whole months); raises ValueError otherwise."""
+    if not isinstance(tenures, list) or not 0 < len(tenures) <= LOAN_COMPARISON_MAX_VALUES:
+        raise ValueError(f"'tenures' must be a list of 1 to {LOAN_COMPARISON_MAX_VALUES} months")
+    for months in tenures:
+        if not isinstance(months, int) or isinstance(months, bool) or not 0 < months <= LOAN_MAX_TENURE_MONTHS:
+            raise ValueError(f"tenures must be whole months between 1 and {LOAN_MAX_TENURE_MONTHS}, got {months!r}")
+    return tenures
+
+
+def emi(principal, annual_rate, months):
+    """Monthly instalment; all arguments broadcast, so grids of offers x tenures work."""
+    principal, months = np.asarray(principal, dtype=float), np.asarray(months, dtype=float)
+    r = np.asarray(annual_rate, dtype=float) / 1200
+    growth = np.power(1 + r, months)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = principal * r * growth / (growth - 1)
+    return np.where(r == 0, principal / months, payment)
+
+
+def amortization_schedule(principal: float, annual_rate: float, months: int) -> dict:
+    """Per-month interest, principal and closing balance arrays for one loan."""
+    payment = float(emi(principal, annual_rate, months))
+    r = annual_rate / 1200
+    # balance after k payments, in closed form so the whole schedule is one vector op
+    k = np.arange(1, months + 1)
+    if r == 0:
+        balance = principal - payment * k
+    else:
+        balance = principal * (1 + r) ** k - payment * ((1 + r) ** k - 1) / r
+    opening = np.concatenate(([principal], balance[:-1]))
+    interest = opening * r
+    return {"emi": payment, "interest": interest, "principal": payment - interest, "balance": np.maximum(balance, 0.0)}
+
+
+def effective_annual_rate(principal, annual_rate, months, fees=0.0, iterations: int = 60):
+    """
+    APR-style effective cost (% per year): the monthly rate at which the EMIs repay
+    the amount actually received (principal minus upfront fees), times 12. Solved
+    by bisection on arrays, so every offer and tenure is solved at once.
+    """
+    principal, months, fees = (np.asarray(x, dtype=float) for x in (principal, months, fees))
+    payment = emi(principal, annual_rate, months)
+    received = principal - fees
+    shape = np.broadcast(payment, received, months).shape
+    low, high = np.zeros(shape), np.ones(shape)
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        present_value = payment * (1 - (1 + mid) ** -months) / mid
+        # present value falls as the rate rises: too high means the rate is too low
+        too_low = present_value > received
+        low, high = np.where(too_low, mid, low), np.where(too_low, high, mid)
+    return (low + high) / 2 * 1200
+
+
+def compare_offers(terms: dict, offers: list, tenures: list = None) -> dict:
+    """
+    Prices the agreement and every offer for the agreement's principal: EMI, total
+    interest, fees and effective annual cost at the agreement's tenure, ranked by
+    effective cost, plus EMI and total cost over `tenures` for each offer.
+    """
+    principal, months = terms["principal"], terms["tenure_months"]
+    tenures = sorted(set(tenures or [12, 24, 36, 48, 60]) | {months})
+
+    rates = np.array([terms["annual_rate"]] + [offer["annual_rate"] for offer in offers], dtype=float)
+    fees = np.array([terms.get("processing_fee") or 0.0]
+                    + [principal * offer.get("processing_fee_pct", 0.0) / 100 + offer.get("processing_fee", 0.0) for offer in offers])
+    grid = np.array(tenures, dtype=float)
+
+    # one pass over (lender x tenure)
+    emis = emi(principal, rates[:, None], grid[None, :])
+    total_cost = emis * grid[None, :] - principal + fees[:, None]
+    effective = effective_annual_rate(principal, rates[:, None], grid[None, :], fees[:, None])
+    column = tenures.index(months)
+
+    def priced(i, name):
+        return {
+            "lender": name,
+            "annual_rate": round(float(rates[i]), 3),
+            "emi": round(float(emis[i, column]), 2),
+            "total_interest": round(float(emis[i, column] * months - principal), 2),
+            "fees": round(float(fees[i]), 2),
+            "total_cost": round(float(total_cost[i, column]), 2),
+            "effective_annual_rate": round(float(effective[i, column]), 3),
+        }
+
+    agreement = priced(0, "Your agreement")
+    ranked = sorted((priced(i + 1, offer["lender"]) for i, offer in enumerate(offers)), key=lambda offer: offer["effective_annual_rate"])
+    for offer in ranked:
+        offer["savings"] = round(agreement["total_cost"] - offer["total_cost"], 2)
+
+    return {
+        "terms": terms,
+        "agreement": agreement,
+        "offers": ranked,
+        "tenure_scenarios": {
+            "tenures": tenures,
+            "lenders": ["Your agreement"] + [offer["lender"] for offer in offers],
+            "emi": np.round(emis, 2).tolist(),
+            "total_cost": np.round(total_cost, 2).tolist(),
+        },
+    }
+
+
+def describe_comparison(comparison: dict) -> str:
+    """Plain-English summary of the comparison without an LLM call."""
+    agreement, offers = comparison["agreement"], comparison["offers"]
+    months = comparison["terms"]["tenure_months"]
+    text = (f"Your loan costs an effective {agreement['effective_annual_rate']:.2f}% a year "
+            f"(EMI Rs. {agreement['emi']:,.0f} for {months} months, Rs. {agreement['total_cost']:,.0f} in interest and fees).")
+    cheaper = [offer for offer in offers if offer["savings"] > 0]
+    if not cheaper:
+        return text + " None of the compared offers is cheaper over the same tenure."
+    best = cheaper[0]
+    return text + (f" The cheapest alternative is {best['lender']} at an effective {best['effective_annual_rate']:.2f}%, "
+                   f"which would save about Rs. {best['savings']:,.0f} over the loan.")
@@ -0,0 +1,175 @@
+import json
+import os
+
+import numpy as np
+
+from retrieval import RetrievalBackend
+
+LOCAL_INDEX_DIR = os.environ.get("LOCAL_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "indexes"))
+LOCAL_INDEX_MODE = os.environ.get("LOCAL_INDEX_MODE", "exact")
+LOCAL_INDEX_NPROBE = int(os.environ.get("LOCAL_INDEX_NPROBE", 8))
+
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.jsonl"
+IVF_FILE = "ivf.npz"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=-1, keepdims=True), 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores in a 1-d array, best first."""
+    k = min(k, len(scores))
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+def train_kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 20, sample_size: int = 50000, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on (a sample of) the normalized vectors; returns the centroid matrix."""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), size=min(sample_size, len(vectors)), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = sample[assignments == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids
+
+
+def save_local_index(path: str, ids: list, vectors, metadata: list, ivf_lists: int = 0):
+    """
+    Writes an index directory:
+      vectors.npy     float32 (N, dim) matrix of L2-normalized embeddings
+      metadata.jsonl  one {"id", "metadata"} record per row, in row order
+      ivf.npz         (optional) k-means centroids, inverted lists and int8 codes
+    """
+    os.makedirs(path, exist_ok=True)
+    vectors = _normalize(vectors)
+    np.save(os.path.join(path, VECTORS_FILE), vectors)
+    with open(os.path.join(path, METADATA_FILE), "w", encoding="utf-8") as f:
+        for record_id, record_metadata in zip(ids, metadata):
+            f.write(json.dumps({"id": record_id, "metadata": record_metadata}, ensure_ascii=False) + "\n")
+
+    ivf_path = os.path.join(path, IVF_FILE)
+    if ivf_lists and len(vectors) >= ivf_lists:
+        centroids = train_kmeans(vectors, ivf_lists)
+        assignments = np.concatenate([
+            np.argmax(vectors[start:start + 8192] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), 8192)
+        ])
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.searchsorted(assignments[order], np.arange(ivf_lists + 1))
+
+        # symmetric per-row int8 quantization: row ~= codes * scale
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+        codes = np.round(vectors / scales[:, None]).astype(np.int8)
+        np.savez(ivf_path, centroids=centroids, list_rows=order, list_offsets=offsets, codes=codes, scales=scales.astype(np.float32))
+    elif os.path.exists(ivf_path):
+        os.remove(ivf_path)
+
+
+class LocalIndex(RetrievalBackend):
+    """
+    In-process vector index loaded from a directory written by `save_local_index`.
+
+    'exact' mode scores every row with a single matrix multiply over the memory-mapped
+    vectors. 'ivf' mode only scores the rows in the `nprobe` closest k-means lists,
+    using the int8 codes, and re-ranks a short list exactly; each probed list is
+    scored once per batch of queries. Below a few thousand rows the two cost about
+    the same, so exact (no recall loss) is the default. Check IVF's recall on the
+    real index with benchmarks/bench_local_index.py --index-dir before switching.
+    """
+
+    def __init__(self, path: str, mode: str = None, nprobe: int = None):
+        self.path = path
+        self.mode = mode or LOCAL_INDEX_MODE
+        self.nprobe = nprobe or LOCAL_INDEX_NPROBE
+        self.vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+
+        self.ids, self.metadata = [], []
+        with open(os.path.join(path, METADATA_FILE), encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                self.ids.append(record["id"])
+                self.metadata.append(record.get("metadata", {}))
+
+        self.ivf = None
+        if self.mode == "ivf":
+            ivf_path = os.path.join(path, IVF_FILE)
+            if not os.path.exists(ivf_path):
+                raise FileNotFoundError(f"'ivf' mode needs {ivf_path}; rebuild the index with --ivf-lists")
+            self.ivf = dict(np.load(ivf_path))
+            # codes and scales in list order, so every inverted list is one contiguous slice
+            self.ivf["list_codes"] = self.ivf.pop("codes")[self.ivf["list_rows"]]
+            self.ivf["list_scales"] = self.ivf.pop("scales")[self.ivf["list_rows"]]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _matches(self, rows, scores, include_values: bool = False) -> list:
+        matches = [{"id": self.ids[r], "score": float(s), "metadata": self.metadata[r]} for r, s in zip(rows, scores)]
+        if include_values:
+            for match, r in zip(matches, rows):
+                match["values"] = np.asarray(self.vectors[r])
+        return matches
+
+    def _query_exact(self, queries: np.ndarray, top_k: int, include_values: bool = False) -> list:
+        scores = queries @ self.vectors.T
+        results = []
+        for row in scores:
+            best = _top_k(row, top_k)
+            results.append(self._matches(best, row[best], include_values))
+        return results
+
+    def _query_ivf(self, queries: np.ndarray, top_k: int, include_values: bool = False) -> list:
+        centroids, offsets = self.ivf["centroids"], self.ivf["list_offsets"]
+        codes, scales, list_rows = self.ivf["list_codes"], self.ivf["list_scales"], self.ivf["list_rows"]
+        probe = min(self.nprobe, len(centroids))
+        shortlist = top_k * 4
+        probed = np.argpartition(-(queries @ centroids.T), probe - 1, axis=1)[:, :probe]
+
+        # each probed list is decoded and scored once for all the queries that probe it,
+        # keeping a running shortlist (positions in list order) per query
+        best_scores = np.full((len(queries), shortlist), -np.inf, dtype=np.float32)
+        best_positions = np.full((len(queries), shortlist), -1, dtype=np.int64)
+        for c in np.unique(probed):
+            start, end = offsets[c], offsets[c + 1]
+            if start == end:
+                continue
+            who = np.flatnonzero((probed == c).any(axis=1))
+            approx = (queries[who] @ codes[start:end].T.astype(np.float32)) * scales[start:end]
+            merged_scores = np.hstack([best_scores[who], approx])
+            merged_positions = np.hstack([best_positions[who], np.broadcast_to(np.arange(start, end), approx.shape)])
+            keep = np.argpartition(-merged_scores, shortlist - 1, axis=1)[:, :shortlist]
+            best_scores[who] = np.take_along_axis(merged_scores, keep, axis=1)
+            best_positions[who] = np.take_along_axis(merged_positions, keep, axis=1)
+
+        # re-rank the shortlists with the full-precision rows to undo quantization error
+        found = best_positions >= 0
+        candidates = np.where(found, list_rows[np.maximum(best_positions, 0)], 0)
+        unique_rows, inverse = np.unique(candidates[found], return_inverse=True)
+        scores = np.full(candidates.shape, -np.inf, dtype=np.float32)
+        scores[found] = np.einsum("nd,nd->n", np.asarray(self.vectors[unique_rows])[inverse],
+                                  np.repeat(queries, found.sum(axis=1), axis=0))
+
+        results = []
+        for row_candidates, row_scores in zip(candidates, scores):
+            best = _top_k(row_scores, top_k)
+            best = best[np.isfinite(row_scores[best])]
+            results.append(self._matches(row_candidates[best], row_scores[best], include_values))
+        return results
+
+    def query_many(self, vectors, top_k: int = 4, include_values: bool = False) -> list:
+        if len(vectors) == 0 or len(self.ids) == 0:
+            return [[] for _ in range(len(vectors))]
+        queries = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1))
+        if self.ivf is not None:
+            return self._query_ivf(queries, top_k, include_values)
+        return self._query_exact(queries, top_k, include_values)
@@ -1,17 +1,34 @@
 import os
 import re
 import json
+import time
+import shutil
+import tempfile
+import threading
 from flask import Flask, request, jsonify
 from dotenv import load_dotenv
-import vertexai
 from flask_cors import CORS
-from sentence_transformers import SentenceTransformer
-import re
-from pinecone import Pinecone
-from vertexai.generative_models import GenerativeModel
-from helper import extract_interest_rate, search_tool
-from langchain_google_genai import ChatGoogleGenerativeAI
 from helper import extract_interest_rate, tavily_search_tool
+from resources import RESOURCE_WARMUP, ResourceRegistry
+from pipeline import CLAUSE_ANALYSIS_MAX_WORKERS, analyze_clauses, run_stages
+from embeddings import EMBEDDING_BACKEND, encode_batch, load_embedding_model
+from embedding_cache import CachedEmbeddingModel
+from retrieval import RETRIEVAL_MMR_LAMBDA, DiversifiedBackend, PineconeBackend, format_expert_context
+from local_index import LOCAL_INDEX_DIR, LocalIndex
+from cache import ClauseCache, ResultCache, make_cache_key, normalize_text
+from streaming import iter_events, stream_generation, stream_response
+from jobs import JobManager, QueueFull
+from classifier import CONTRACT_CLASSIFIER_MIN_CONFIDENCE, classify_contract
+from batching import CLAUSE_BATCH_MODE, build_batch_prompt, estimate_tokens, pack_clause_batches, parse_batch_response
+from segmenter import segment_clauses
+from pdf_ingest import PDFError, extract_document
+from revisions import align_clauses, material_terms
+from chat_context import CHAT_MAX_PROMPT_TOKENS, ChatContextIndex, select_clause_context, truncate_to_tokens
+from chat_sessions import ChatSessionStore
+from market_rates import make_market_rate_cache
+from simulator import simulate
+from loan_engine import (LOAN_MAX_RATE, LOAN_MAX_TENURE_MONTHS, compare_offers, describe_comparison, load_market_offers,
+                         offers_from_search_results, parse_loan_terms, validate_offers, validate_tenures)
 
 load_dotenv()
 
@@ -20,23 +37,70 @@ CORS(app)
 PROJECT_ID = os.environ.get("GCP_PROJECT_ID")
 REGION = os.environ.get("GCP_REGION")
 GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
-vertexai.init(project=PROJECT_ID, location=REGION)
 
-generation_model = GenerativeModel("gemini-2.5-pro")
-embedding_model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")  
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash",api_key = GOOGLE_API_KEY)
-llm_tools = llm.bind_tools([tavily_search_tool])
+GENERATION_MODEL_NAME = "gemini-2.5-pro"
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
 
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY")
 RENTAL_INDEX_NAME = "karnataka-rental-lows"
 EMPLOYMENT_INDEX_NAME = "employment-laws"
 LOAN_INDEX_NAME = "loan-laws"
-pc = Pinecone(api_key=PINECONE_API_KEY)
-rental_pinecone_index = pc.Index(RENTAL_INDEX_NAME)
-employment_pinecone_index = pc.Index(EMPLOYMENT_INDEX_NAME)
-loan_pinecone_index = pc.Index(LOAN_INDEX_NAME)
 
-print("Initializations complete. Server is ready.")
+# Models, clients and index handles are created on first use (or by the warm-up thread
+# started at the bottom of this file), so importing the app and answering requests that
+# don't need them is fast. The SDK imports live in the factories for the same reason.
+resources = ResourceRegistry()
+
+
+def load_generation_model():
+    import vertexai
+    from vertexai.generative_models import GenerativeModel
+    vertexai.init(project=PROJECT_ID, location=REGION)
+    return GenerativeModel(GENERATION_MODEL_NAME)
+
+def load_pinecone_client():
+    from pinecone import Pinecone
+    return Pinecone(api_key=PINECONE_API_KEY)
+
+def load_llm():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash",api_key = GOOGLE_API_KEY)
+
+def load_cached_embedding_model():
+    # cached vectors are keyed by the backend that actually loaded, which differs from
+    # EMBEDDING_BACKEND when ONNX falls back to torch
+    model = load_embedding_model(EMBEDDING_MODEL_NAME)
+    if model.embedding_backend != EMBEDDING_BACKEND:
+        print(f"❌ embedding backend {EMBEDDING_BACKEND} unavailable, caching vectors under {model.embedding_backend}")
+    return CachedEmbeddingModel(model, EMBEDDING_MODEL_NAME, model.embedding_backend)
+
+# every encode goes through the embedding cache (memory LRU, then the optional on-disk store)
+embedding_model = resources.register("embedding_model", load_cached_embedding_model)
+generation_model = resources.register("generation_model", load_generation_model)
+pc = resources.register("pinecone", load_pinecone_client)
+
+def make_retriever(index_name: str, backend_env: str):
+    """
+    Opens an index per contract type: Pinecone by default, or the local on-disk copy when
+    <TYPE>_INDEX_BACKEND=local. Matches are diversified with MMR unless RETRIEVAL_MMR_LAMBDA=1.
+    """
+    if os.environ.get(backend_env, "pinecone").lower() == "local":
+        print(f"using local index for {index_name}")
+        retriever = LocalIndex(os.path.join(LOCAL_INDEX_DIR, index_name))
+    else:
+        retriever = PineconeBackend(pc.Index(index_name))
+    return DiversifiedBackend(retriever) if RETRIEVAL_MMR_LAMBDA < 1 else retriever
+
+rental_retriever = resources.register("rental_retriever", lambda: make_retriever(RENTAL_INDEX_NAME, "RENTAL_INDEX_BACKEND"))
+employment_retriever = resources.register("employment_retriever", lambda: make_retriever(EMPLOYMENT_INDEX_NAME, "EMPLOYMENT_INDEX_BACKEND"))
+loan_retriever = resources.register("loan_retriever", lambda: make_retriever(LOAN_INDEX_NAME, "LOAN_INDEX_BACKEND"))
+
+# only the LLM fallback of /loan_comparison uses these, so they don't hold up readiness
+llm = resources.register("llm", load_llm, required=False)
+llm_tools = resources.register("llm_tools", lambda: llm.bind_tools([tavily_search_tool]), required=False)
+
+clause_cache = ClauseCache()
+
 
 key_entity_extraction_prompt = """
 You are an expert legal analyst tasked with extracting ONLY the most critical entities from a legal document. Your output will be used for a high-level summary, so it must be concise.
@@ -72,98 +136,268 @@ Document Text:
 \"\"\"{document_text}\"\"\"
 """
 
-def process_contract(document_text: str, summary_prompt: str, analysis_prompt_template: str, pinecone_index, contract_type: str):
-    # --- New Stage 0: Key Entity Extraction ---
-    print("starting stage 0: key entity extraction...")
-    try:
-        entity_prompt = key_entity_extraction_prompt.format(document_text=document_text)
-        entity_response = generation_model.generate_content(entity_prompt)
-        key_entities_result = entity_response.text.strip()
-        print("✅ key entities extracted successfully.")
-    except Exception as e:
-        print(f"❌ error during key entity extraction: {e}")
-        key_entities_result = "Could not extract key entities from this document."
+def process_contract(document_text: str, summary_prompt: str, analysis_prompt_template: str, retriever, contract_type: str, on_event=None, cancel_event=None, clauses=None, previous=None):
+    """
+    Runs every analysis stage for one document and returns the /analyze payload.
+    `on_event(name, data)`, when given, is called as results become available: once
+    per document-level stage, once with the clause count ('clauses') and once per
+    analyzed clause ('clause'). Setting `cancel_event` stops any clause analyses
+    that have not started yet. `clauses` are pre-segmented Clause objects (e.g. from
+    PDF ingestion); by default the text is segmented here.
+
+    `previous` is the payload of an earlier version of the same contract. Its
+    clauses are aligned with this version's, unchanged clauses keep their earlier
+    analysis, and the summary, flowchart, dates and salary analysis are reused
+    unless the material terms changed. Each clause is then marked under 'revision'.
+
+    Stages that fell back to a placeholder, and a clause analysis that failed, are
+    listed under 'degraded_stages' so the result isn't cached.
+    """
+    chunks = [clause.text for clause in (clauses if clauses is not None else segment_clauses(document_text))]
+    previous_items = previous["detailed_analysis"] if previous else []
+    reused_stages = []
+    degraded_stages = []
+
+    # --- Stage 0: Key Entity Extraction ---
+    def extract_key_entities():
+        print("starting stage 0: key entity extraction...")
+        try:
+            entity_prompt = key_entity_extraction_prompt.format(document_text=document_text)
+            entity_response = generation_model.generate_content(entity_prompt)
+            print("✅ key entities extracted successfully.")
+            return entity_response.text.strip()
+        except Exception as e:
+            print(f"❌ error during key entity extraction: {e}")
+            degraded_stages.append("key_entities")
+            return "Could not extract key entities from this document."
 
     # --- Stage 1: High-level summary ---
-    print("starting stage 1: high-level summary...")
-    try:
-        summary_response = generation_model.generate_content(summary_prompt.format(document_text=document_text))
-        summary_result = summary_response.text.strip()
-        print("✅ summary generated successfully.")
-    except Exception as e:
-        print(f"❌ error during summary generation: {e}")
-        summary_result = "Could not generate a summary for this document."
+    def generate_summary():
+        print("starting stage 1: high-level summary...")
+        try:
+            summary_response = generation_model.generate_content(summary_prompt.format(document_text=document_text))
+            print("✅ summary generated successfully.")
+            return summary_response.text.strip()
+        except Exception as e:
+            print(f"❌ error during summary generation: {e}")
+            degraded_stages.append("summary")
+            return "Could not generate a summary for this document."
 
-    # --- New Stage 1.5: In-Hand Salary Calculation (for employment contracts) ---
-    salary_analysis_result = None
-    if contract_type == 'employment':
+    # --- Stage 1.5: In-Hand Salary Calculation (for employment contracts) ---
+    def analyze_salary():
         print("starting stage 1.5: in-hand salary analysis...")
         try:
             salary_prompt = salary_extraction_prompt.format(document_text=document_text)
             salary_response = generation_model.generate_content(salary_prompt)
             clean_json_string = salary_response.text.strip().replace('```json', '').replace('```', '')
             salary_components = json.loads(clean_json_string)
-            salary_analysis_result = calculate_in_hand_salary(salary_components)
             print("✅ in-hand salary analysis complete.")
+            return calculate_in_hand_salary(salary_components)
         except Exception as e:
             print(f"❌ error during salary analysis: {e}")
-            salary_analysis_result = {"error": "Could not perform salary analysis."}
+            degraded_stages.append("salary_analysis")
+            return {"error": "Could not perform salary analysis."}
 
-    mermaid_code = get_flowchart_mermaid_from_summary(summary_result)
+    # --- Stage 1.6: Important dates ---
+    def extract_dates():
+        print("starting stage 1.6: date extraction...")
+        try:
+            date_response = generation_model.generate_content(date_extraction_prompt.format(document_text=document_text))
+            clean_json_string = date_response.text.strip().replace('```json', '').replace('```', '')
+            print("✅ dates extracted successfully.")
+            return json.loads(clean_json_string)
+        except Exception as e:
+            print(f"❌ error during date extraction: {e}")
+            degraded_stages.append("important_dates")
+            return []
+
+    # --- Stage 1.7: Flowchart (needs the summary) ---
+    def generate_flowchart(summary):
+        flowchart = get_flowchart_mermaid_from_summary(summary)
+        if flowchart == FLOWCHART_ERROR or "summary" in degraded_stages:
+            degraded_stages.append("flowchart")
+        return flowchart
+
+    # --- Stage 1.8: Align with the previous version (revision mode only) ---
+    def align_revision():
+        print("aligning clauses with the previous version...")
+        try:
+            alignment = align_clauses([item["original_clause"] for item in previous_items], chunks,
+                                      encode=lambda texts: encode_batch(embedding_model, texts))
+        except Exception as e:
+            print(f"❌ error aligning by embedding, falling back to exact matches: {e}")
+            alignment = align_clauses([item["original_clause"] for item in previous_items], chunks)
+        statuses = [status for _, status in alignment["matches"]]
+        print(f"✅ revision: {statuses.count('unchanged')} unchanged, {statuses.count('modified')} modified, "
+              f"{statuses.count('added')} added, {len(alignment['removed'])} removed")
+        return alignment
+
+    def reuse_unless_material(name, generate):
+        def stage(revision, **inputs):
+            if not revision["material_change"] and name in previous:
+                print(f"✅ {name} reused from the previous version.")
+                reused_stages.append(name)
+                return previous[name]
+            return generate(**inputs)
+        return stage
 
     # --- Stage 2: Clause-by-clause analysis ---
-    print("starting stage 2: detailed clause analysis...")
-    chunks = [chunk.strip() for chunk in re.split(r'\n\s*\n|\n(?=\s*(\d+\.|\*|\([a-zA-Z]\)|\b[IVX]+\.))', document_text) if len(chunk.strip()) > 50]
-    risk_analysis_results = []
+    def analyze_document_clauses(revision=None):
+        print("starting stage 2: detailed clause analysis...")
 
-    for i, chunk in enumerate(chunks):
-        print(f"analyzing chunk {i+1}/{len(chunks)}...")
-        try:
-            chunk_embedding = embedding_model.encode(chunk).tolist()
-            query_response = pinecone_index.query(
-                vector=chunk_embedding,
-                top_k=4,
-                include_metadata=True
-            )
+        if on_event:
+            on_event("clauses", {"total": len(chunks)})
 
-            # build expert context
-            similar_clauses_context = ""
-            for match in query_response['matches']:
-                metadata = match.get('metadata', {})
-                similar_clauses_context += (
-                    f"- Context: '{metadata.get('clause_text', 'N/A')}'\n"
-                    f"  - Risk: {metadata.get('risk_level', 'N/A')}\n"
-                    f"  - Explanation: {metadata.get('risk_explanation', 'N/A')}\n"
-                )
+        # revision mode: unchanged clauses keep the previous version's analysis
+        matches = revision["matches"] if revision else [(None, "added")] * len(chunks)
+        reused = {i: previous_items[j]["analysis"] for i, (j, status) in enumerate(matches) if status == "unchanged"}
 
-            # fill the analysis prompt
-            analysis_prompt = analysis_prompt_template.format(
-                chunk=chunk,
-                similar_clauses_context=similar_clauses_context
-            )
+        def mark(i, item):
+            if revision:
+                previous_index, status = matches[i]
+                item["revision"] = {"status": status, "previous_index": previous_index, "reused": i in reused}
+            return item
 
-            analysis_response = generation_model.generate_content(analysis_prompt)
-            clean_json_string = analysis_response.text.strip().replace('```json', '').replace('```', '')
-            analysis_json = json.loads(clean_json_string)
+        # boilerplate clauses repeat across documents: reuse earlier analyses by exact text first
+        clause_namespace = make_cache_key(contract_type, analysis_prompt_template)
+        clause_keys = [make_cache_key(clause_namespace, normalize_text(chunk)) for chunk in chunks]
+        cached_analyses = [reused[i] if i in reused else clause_cache.get(key) for i, key in enumerate(clause_keys)]
+        uncached = [i for i, analysis in enumerate(cached_analyses) if analysis is None]
 
-            risk_analysis_results.append({
+        # one batched forward pass for the remaining chunks instead of one per chunk
+        try:
+            new_embeddings = encode_batch(embedding_model, [chunks[i] for i in uncached])
+        except Exception as e:
+            print(f"❌ error embedding chunks: {e}")
+            # clauses already answered from the cache are still streamed and returned
+            served = {i: mark(i, {"original_clause": chunk, "analysis": analysis})
+                      for i, (chunk, analysis) in enumerate(zip(chunks, cached_analyses)) if analysis is not None}
+            if on_event:
+                for i, item in served.items():
+                    on_event("clause", {"index": i, **item})
+            return list(served.values())
+        chunk_embeddings = dict(zip(uncached, new_embeddings))
+
+        # ...then near-duplicates by embedding similarity, as long as the amounts and periods match
+        clause_terms = {i: material_terms(chunks[i]) for i in uncached}
+        for i in uncached:
+            cached_analyses[i] = clause_cache.get_similar(clause_namespace, chunk_embeddings[i], clause_terms[i])
+        pending = [i for i in uncached if cached_analyses[i] is None]
+        print(f"clause cache: {len(chunks) - len(pending)}/{len(chunks)} chunks reused")
+
+        # every pending chunk's top-k lookup goes out together instead of one round trip at a time
+        matches_per_chunk = dict(zip(pending, retriever.query_many([chunk_embeddings[i] for i in pending], top_k=4)))
+
+        # build expert context
+        contexts = {i: format_expert_context(matches) for i, matches in matches_per_chunk.items() if matches is not None}
+
+        # batch mode: pack several clauses into one prompt; anything missing from the reply falls through below.
+        # With no more clauses than workers every batch would hold one clause, so they go out singly instead.
+        batched_analyses = {}
+        if CLAUSE_BATCH_MODE and len(contexts) > CLAUSE_ANALYSIS_MAX_WORKERS:
+            batches = pack_clause_batches([(i, chunks[i], contexts[i]) for i in sorted(contexts)], analysis_prompt_template,
+                                          min_batches=CLAUSE_ANALYSIS_MAX_WORKERS)
+
+            def analyze_batch(b, batch):
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                print(f"analyzing clause batch {b+1}/{len(batches)} ({len(batch)} clauses)...")
+                batch_response = generation_model.generate_content(build_batch_prompt(analysis_prompt_template, batch))
+                return parse_batch_response(batch_response.text, [entry[0] for entry in batch])
+
+            for analyses in analyze_clauses(batches, analyze_batch):
+                batched_analyses.update(analyses)
+            print(f"batched analysis covered {len(batched_analyses)}/{len(contexts)} clauses")
+
+        def analyze_chunk(i, chunk):
+            if cached_analyses[i] is not None:
+                return mark(i, {"original_clause": chunk, "analysis": cached_analyses[i]})
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            if i not in contexts:
+                raise RuntimeError("knowledge base lookup failed")
+
+            if i in batched_analyses:
+                analysis_json = batched_analyses[i]
+            else:
+                print(f"analyzing chunk {i+1}/{len(chunks)}...")
+                # fill the analysis prompt
+                analysis_prompt = analysis_prompt_template.format(
+                    chunk=chunk,
+                    similar_clauses_context=contexts[i]
+                )
+
+                analysis_response = generation_model.generate_content(analysis_prompt)
+                clean_json_string = analysis_response.text.strip().replace('```json', '').replace('```', '')
+                analysis_json = json.loads(clean_json_string)
+            clause_cache.add(clause_namespace, clause_keys[i], chunk_embeddings[i], analysis_json, clause_terms[i])
+
+            return mark(i, {
                 "original_clause": chunk,
                 "analysis": analysis_json
             })
-        except Exception as e:
-            print(f"❌ error processing chunk {i+1}: {e}")
-            continue
 
-    print("✅ detailed analysis complete.")
+        def emit_clause(i, result):
+            on_event("clause", {"index": i, **result})
+
+        # chunks are analyzed concurrently; failed chunks are skipped and order is preserved
+        risk_analysis_results = analyze_clauses(chunks, analyze_chunk, on_result=emit_clause if on_event else None)
+        print("✅ detailed analysis complete.")
+        return risk_analysis_results
+
+    # only the flowchart waits on another stage; everything else starts right away
+    stages = {
+        "key_entities": (extract_key_entities, []),
+        "summary": (generate_summary, []),
+        "important_dates": (extract_dates, []),
+        "flowchart": (generate_flowchart, ["summary"]),
+        "detailed_analysis": (analyze_document_clauses, []),
+    }
+    if contract_type == 'employment':
+        stages["salary_analysis"] = (analyze_salary, [])
+    if previous:
+        stages["revision"] = (align_revision, [])
+        for name in ("summary", "flowchart", "important_dates", "salary_analysis"):
+            if name in stages:
+                fn, deps = stages[name]
+                stages[name] = (reuse_unless_material(name, fn), deps + ["revision"])
+        stages["detailed_analysis"] = (analyze_document_clauses, ["revision"])
+
+    start = time.perf_counter()
+    def emit_stage(name, result):
+        # clauses were already streamed one by one
+        if on_event and name not in ("detailed_analysis", "revision"):
+            on_event(name, result)
+
+    results, stage_timings = run_stages(stages, on_result=emit_stage)
+    stage_timings["total"] = round((time.perf_counter() - start) * 1000)
+    # failed clauses are left out of the results
+    if len(results["detailed_analysis"]) < len(chunks):
+        degraded_stages.append("detailed_analysis")
+
     response_data = {
-        "key_entities": key_entities_result,
-        "summary": summary_result,
-        "detailed_analysis": risk_analysis_results,
-        "flowchart": mermaid_code
+        "key_entities": results["key_entities"],
+        "summary": results["summary"],
+        "detailed_analysis": results["detailed_analysis"],
+        "flowchart": results["flowchart"],
+        "important_dates": results["important_dates"],
+        "stage_timings": stage_timings
     }
-    if salary_analysis_result:
-        response_data["salary_analysis"] = salary_analysis_result
-        
+    if results.get("salary_analysis"):
+        response_data["salary_analysis"] = results["salary_analysis"]
+    if previous:
+        statuses = [status for _, status in results["revision"]["matches"]]
+        response_data["revision"] = {
+            "unchanged": statuses.count("unchanged"),
+            "modified": statuses.count("modified"),
+            "added": statuses.count("added"),
+            "removed": [previous_items[j]["original_clause"] for j in results["revision"]["removed"]],
+            "material_change": results["revision"]["material_change"],
+            "reused_stages": sorted(reused_stages),
+        }
+    if degraded_stages:
+        response_data["degraded_stages"] = sorted(degraded_stages)
+
     return response_data
 
 
@@ -280,14 +514,14 @@ Analyze the document below and extract all key dates and their significance.
 
 **Example Output:**
 [
-  {
+  {{
     "date": "2025-09-10",
     "description": "Employment Start Date"
-  },
-  {
+  }},
+  {{
     "date": "2026-03-10",
     "description": "Probation Period Ends"
-  }
+  }}
 ]
 
 Document Text:
@@ -329,75 +563,288 @@ Return ONLY a VALID JSON object with EXACTLY these keys:
 """
 
 # ---- Wrappers ----
-def rental_response(document_text: str):
-    return jsonify(process_contract(
-        document_text,
-        summary_prompt=rental_summary_prompt,
-        analysis_prompt_template=rental_analysis_prompt,
-        pinecone_index=rental_pinecone_index,
-        contract_type='rental'
-    ))
-
-def employment_response(document_text: str):
-    return jsonify(process_contract(
-        document_text,
-        summary_prompt=employment_summary_prompt,
-        analysis_prompt_template=employment_analysis_prompt,
-        pinecone_index=employment_pinecone_index,
-        contract_type='employment'
-    ))
-
-def loan_response(document_text: str):
-    return jsonify(process_contract(
-        document_text,
-        summary_prompt=loan_summary_prompt,
-        analysis_prompt_template=loan_analysis_prompt,
-        pinecone_index=loan_pinecone_index,
-        contract_type='loan'
-    ))
+CONTRACT_PIPELINES = {
+    'rental': dict(summary_prompt=rental_summary_prompt, analysis_prompt_template=rental_analysis_prompt, retriever=rental_retriever),
+    'employment': dict(summary_prompt=employment_summary_prompt, analysis_prompt_template=employment_analysis_prompt, retriever=employment_retriever),
+    'loan': dict(summary_prompt=loan_summary_prompt, analysis_prompt_template=loan_analysis_prompt, retriever=loan_retriever),
+}
+
+def analyze_contract(document_text: str, contract_type: str, on_event=None, cancel_event=None, clauses=None, previous=None) -> dict:
+    return process_contract(document_text, contract_type=contract_type, on_event=on_event, cancel_event=cancel_event, clauses=clauses, previous=previous,
+                            **CONTRACT_PIPELINES[contract_type])
+
+
+# ---- Result cache ----
+# Keys cover the normalized text plus every prompt and model name, so editing a prompt
+# or switching models never serves a stale analysis.
+ANALYSIS_PIPELINE_VERSION = "2"
+ANALYSIS_CACHE_VERSION = make_cache_key(
+    ANALYSIS_PIPELINE_VERSION, GENERATION_MODEL_NAME, EMBEDDING_MODEL_NAME,
+    key_entity_extraction_prompt, salary_extraction_prompt, date_extraction_prompt,
+    *(prompt for pipeline in CONTRACT_PIPELINES.values() for prompt in (pipeline['summary_prompt'], pipeline['analysis_prompt_template']))
+)
+analysis_cache = ResultCache()
+
+def analysis_cache_key(document_text: str) -> str:
+    return make_cache_key(ANALYSIS_CACHE_VERSION, normalize_text(document_text))
+
+
+UNSUPPORTED_CONTRACT_ERROR = "Unsupported contract type. Only rental and employment agreements are supported."
+CACHE_MODES = ('use', 'refresh', 'bypass')
+CACHE_MODE_ERROR = "'cache' must be one of: use, refresh, bypass"
+
+def run_analysis(document_text: str, cache_mode: str = 'use', on_event=None, cancel_event=None, clauses=None, previous_key=None):
+    """
+    Cache lookup, classification and the full pipeline, shared by /analyze,
+    /analyze/stream and analysis jobs. Returns the response payload, or None when
+    the contract type is unsupported. With `on_event`, a cache hit is replayed as
+    the same events a fresh run would emit.
+
+    `previous_key` is the cache key of an earlier version's analysis; when it is
+    still cached, only the clauses that changed are re-analyzed (see process_contract).
+    """
+    start = time.perf_counter()
+    cache_key = analysis_cache_key(document_text)
+
+    previous = analysis_cache.get(previous_key) if previous_key else None
+    if previous_key and previous is None:
+        print("previous version is no longer cached; running a full analysis.")
+
+    # a cached copy of this exact text carries no revision marks, so revision mode recomputes them
+    if cache_mode == 'use' and not previous:
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            print("✅ analysis served from cache.")
+            if on_event:
+                on_event("cached", {"key": cache_key})
+                for name in ("key_entities", "summary", "important_dates", "salary_analysis", "flowchart"):
+                    if name in cached:
+                        on_event(name, cached[name])
+                on_event("clauses", {"total": len(cached["detailed_analysis"])})
+                for i, item in enumerate(cached["detailed_analysis"]):
+                    on_event("clause", {"index": i, **item})
+            if previous_key:
+                cached = {**cached, "revision": {"previous_key": previous_key, "found": False}}
+            return {**cached, "cache": {"hit": True, "key": cache_key}}
+
+    contract_type = detect_contract_type(document_text)
+    classification_ms = round((time.perf_counter() - start) * 1000)
+
+    print(f"Detected contract type: {contract_type}")
+    if on_event:
+        on_event("contract_type", {"contract_type": contract_type, "elapsed_ms": classification_ms})
+
+    if contract_type not in CONTRACT_PIPELINES:
+        return None
+
+    result = analyze_contract(document_text, contract_type, on_event=on_event, cancel_event=cancel_event, clauses=clauses, previous=previous)
+    result["stage_timings"]["classification"] = classification_ms
+    # a partial or placeholder result would otherwise be served until it expires
+    if cache_mode != 'bypass' and not (cancel_event and cancel_event.is_set()) and not result.get("degraded_stages"):
+        # revision marks only make sense relative to the version they were computed against
+        analysis_cache.set(cache_key, {
+            **{name: value for name, value in result.items() if name != "revision"},
+            "detailed_analysis": [{name: value for name, value in item.items() if name != "revision"} for item in result["detailed_analysis"]],
+        })
+    if previous_key:
+        result["revision"] = {"previous_key": previous_key, "found": previous is not None, **result.get("revision", {})}
+    return {**result, "cache": {"hit": False, "key": cache_key}}
 
 
 # ---- Endpoint ----
 @app.route('/analyze', methods=['POST'])
 def analyze_document():
+    """
+    Optional 'cache' field: "use" (default), "refresh" (recompute and overwrite the
+    cached entry) or "bypass" (neither read nor write the cache). Results with
+    'degraded_stages' (a stage fell back or a clause failed) are never cached.
+
+    Optional 'previous_key': the cache.key of an earlier version's analysis. Only
+    added or modified clauses are re-analyzed; each clause gets a 'revision' entry
+    (status 'unchanged'/'modified'/'added', previous_index, reused) and the response
+    a 'revision' summary, including which stages were reused.
+    """
     data = request.get_json()
     if not data or 'text' not in data:
         return jsonify({"error": "Request body must contain 'text'"}), 400
-    
-    document_text = data['text']
-    contract_type = detect_contract_type(document_text)
+    if data.get('cache', 'use') not in CACHE_MODES:
+        return jsonify({"error": CACHE_MODE_ERROR}), 400
 
-    print(f"Detected contract type: {contract_type}")
+    result = run_analysis(data['text'], data.get('cache', 'use'), previous_key=data.get('previous_key'))
+    if result is None:
+        return jsonify({"error": UNSUPPORTED_CONTRACT_ERROR}), 400
+    return jsonify(result)
 
-    if contract_type == 'rental':
-        return rental_response(document_text)
-    elif contract_type == 'employment':
-        return employment_response(document_text)
-    elif contract_type == 'loan':
-        return loan_response(document_text)
-    else:
-        return jsonify({"error": "Unsupported contract type. Only rental and employment agreements are supported."}), 400
 
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_document_stream():
+    """
+    Streaming variant of /analyze. Sends 'contract_type' first, then each stage
+    ('key_entities', 'summary', 'important_dates', 'salary_analysis', 'flowchart'),
+    the clause count ('clauses') and every 'clause' as soon as it is ready, then
+    'complete' with timings. ?format=ndjson (default) or ?format=sse.
+    Accepts the same 'cache' and 'previous_key' fields as /analyze.
+    """
+    data = request.get_json()
+    if not data or 'text' not in data:
+        return jsonify({"error": "Request body must contain 'text'"}), 400
+    if data.get('cache', 'use') not in CACHE_MODES:
+        return jsonify({"error": CACHE_MODE_ERROR}), 400
 
-@app.route('/chatbot', methods=['POST'])
-def chatbot():
+    # set when the client disconnects, so clause analyses that haven't started are skipped
+    cancel_event = threading.Event()
+
+    def run(emit):
+        start = time.perf_counter()
+        result = run_analysis(data['text'], data.get('cache', 'use'), on_event=emit, cancel_event=cancel_event,
+                              previous_key=data.get('previous_key'))
+        if result is None:
+            emit("error", {"error": UNSUPPORTED_CONTRACT_ERROR})
+            return
+        stage_timings = {**result.get("stage_timings", {}), "request_total": round((time.perf_counter() - start) * 1000)}
+        emit("complete", {"stage_timings": stage_timings, "clauses": len(result["detailed_analysis"]), "cache": result["cache"],
+                          "revision": result.get("revision")})
+
+    return stream_response(iter_events(run, cancel_event), request.args.get('format', 'ndjson'))
+
+
+@app.route('/analyze/file', methods=['POST'])
+def analyze_file():
     """
-    Chatbot endpoint to answer user questions about the contract.
-    Expects JSON input with:
-      - 'summary': summary of the contract
-      - 'detailed_analysis': list of clause analyses
-      - 'question': user's question
+    Analyzes an uploaded PDF (multipart field 'file') without a separate OCR hop.
+    Pages go through the text layer, with local OCR only for image-only pages, and
+    are segmented into clauses as they arrive. Returns the /analyze payload plus
+    'extraction' stats. With ?format=ndjson or ?format=sse the response streams
+    like /analyze/stream, with a 'page' event per extracted page and 'extracted'
+    once the whole file is read. Accepts the same 'cache' and 'previous_key' form
+    fields as /analyze.
     """
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({"error": "Request must include a PDF in the 'file' field"}), 400
+    if upload.stream.read(5) != b"%PDF-":
+        return jsonify({"error": "Uploaded file is not a PDF"}), 400
+    upload.stream.seek(0)
+    cache_mode = request.form.get('cache', 'use')
+    if cache_mode not in CACHE_MODES:
+        return jsonify({"error": CACHE_MODE_ERROR}), 400
+
+    # werkzeug already spools large uploads to disk; copy it to a path the page workers can open
+    handle, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(handle, "wb") as f:
+        shutil.copyfileobj(upload.stream, f)
+    previous_key = request.form.get('previous_key')
+
+    cancel_event = threading.Event()
+
+    def remove_upload():
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def analyze_pdf(on_event=None):
+        try:
+            extracted = extract_document(path, on_page=(lambda page: on_event("page", page)) if on_event else None)
+        finally:
+            remove_upload()
+        if on_event:
+            on_event("extracted", extracted["stats"])
+        if not extracted["text"].strip():
+            raise PDFError("No text could be extracted from the PDF.")
+        result = run_analysis(extracted["text"], cache_mode, on_event=on_event, cancel_event=cancel_event,
+                              clauses=extracted["clauses"], previous_key=previous_key)
+        return result and {**result, "extraction": extracted["stats"]}
+
+    output_format = request.args.get('format')
+    if output_format is None:
+        try:
+            result = analyze_pdf()
+        except PDFError as e:
+            return jsonify({"error": str(e)}), 400
+        if result is None:
+            return jsonify({"error": UNSUPPORTED_CONTRACT_ERROR}), 400
+        return jsonify(result)
+
+    def run(emit):
+        start = time.perf_counter()
+        try:
+            result = analyze_pdf(emit)
+        except PDFError as e:
+            emit("error", {"error": str(e)})
+            return
+        if result is None:
+            emit("error", {"error": UNSUPPORTED_CONTRACT_ERROR})
+            return
+        stage_timings = {**result.get("stage_timings", {}), "request_total": round((time.perf_counter() - start) * 1000)}
+        emit("complete", {"stage_timings": stage_timings, "clauses": len(result["detailed_analysis"]),
+                          "cache": result["cache"], "extraction": result["extraction"], "revision": result.get("revision")})
+
+    response = stream_response(iter_events(run, cancel_event), output_format)
+    # a client that disconnects before the stream starts never runs analyze_pdf
+    response.call_on_close(remove_upload)
+    return response
+
+
+# ---- Analysis jobs ----
+def run_analysis_job(payload: dict, emit, cancel_event):
+    result = run_analysis(payload['text'], payload.get('cache', 'use'), on_event=emit, cancel_event=cancel_event,
+                          previous_key=payload.get('previous_key'))
+    if result is None:
+        raise ValueError(UNSUPPORTED_CONTRACT_ERROR)
+    return result
+
+analysis_jobs = JobManager(run_analysis_job)
+
+
+@app.route('/analyze/jobs', methods=['POST'])
+def create_analysis_job():
+    """Queues an analysis and returns its job id right away (202), or 429 when the queue is full."""
     data = request.get_json()
-    if not data or 'summary' not in data or 'detailedAnalysis' not in data :
-        return jsonify({"error": "Request body must contain 'summary', 'detailed_analysis'"}), 400
+    if not data or 'text' not in data:
+        return jsonify({"error": "Request body must contain 'text'"}), 400
+    if data.get('cache', 'use') not in CACHE_MODES:
+        return jsonify({"error": CACHE_MODE_ERROR}), 400
+    try:
+        job = analysis_jobs.submit({"text": data['text'], "cache": data.get('cache', 'use'), "previous_key": data.get('previous_key')})
+    except QueueFull:
+        return jsonify({"error": "Too many analyses in progress, try again shortly."}), 429, {"Retry-After": "30"}
+    return jsonify({"job_id": job["id"], "status": job["status"]}), 202
 
-    summary = parse_summary(data['summary'])
-    detailed_analysis = data['detailedAnalysis']
-    question = data['question']
 
-    # Prepare context for the LLM
-    context = f"""
+@app.route('/analyze/jobs/<job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """Status, clause progress and partial results; 'result' holds the /analyze payload once completed."""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify(job)
+
+
+@app.route('/analyze/jobs/<job_id>', methods=['DELETE'])
+def cancel_analysis_job(job_id):
+    job = analysis_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job id"}), 404
+    return jsonify({"job_id": job_id, "status": job["status"]})
+
+
+@app.route('/analyze/cache/stats', methods=['GET'])
+def analysis_cache_stats():
+    stats = {**analysis_cache.stats(), "clause_cache": clause_cache.stats()}
+    # reported once the model is loaded; asking for stats shouldn't load it
+    if resources.loaded("embedding_model"):
+        stats["embedding_cache"] = embedding_model.stats()
+    return jsonify(stats)
+
+
+@app.route('/analyze/cache/<cache_key>', methods=['DELETE'])
+def invalidate_analysis(cache_key):
+    return jsonify({"invalidated": analysis_cache.invalidate(cache_key)})
+
+
+# ---- Chatbot ----
+chatbot_prompt_template = """
     You are a legal assistant specializing in Indian rental, employment and loan agreements. 
 
     Your job:
@@ -411,16 +858,67 @@ def chatbot():
     **Contract Summary:**
     {summary}
 
-    **Detailed Analysis of Clauses:**
-    {detailed_analysis}
-
+    **Most Relevant Clause Analyses:**
+    {clause_context}
+{history}
     **User Question:**
     {question}
 
     Keep the response small and one liner points"
     """
 
+chat_context_index = ChatContextIndex(embedding_model)
+chat_sessions = ChatSessionStore()
+
+def format_chat_history(turns: list, token_budget: int) -> str:
+    """The most recent turns that fit in `token_budget`, oldest first."""
+    lines, used = [], 0
+    for question, answer in reversed(turns):
+        turn = f"    - User: {question}\n      Assistant: {answer}"
+        if used + estimate_tokens(turn) > token_budget:
+            break
+        lines.insert(0, turn)
+        used += estimate_tokens(turn)
+    return "\n    **Conversation So Far:**\n" + "\n".join(lines) + "\n" if lines else ""
+
+def build_chatbot_prompt(summary: str, clause_index, question: str, history: list = ()) -> str:
+    """
+    Fills the chatbot prompt with the summary, only the clause analyses closest to
+    the question and as many recent turns as fit, keeping the whole prompt within
+    CHAT_MAX_PROMPT_TOKENS.
+    """
+    # the summary's share comes from the instructions alone, so its cut point doesn't move with the question
+    instruction_tokens = estimate_tokens(chatbot_prompt_template.format(summary="", clause_context="", history="", question=""))
+    summary = truncate_to_tokens(summary, (CHAT_MAX_PROMPT_TOKENS - instruction_tokens) // 2)
+    fixed_tokens = instruction_tokens + estimate_tokens(question)
+    history_text = format_chat_history(history, (CHAT_MAX_PROMPT_TOKENS - fixed_tokens) // 4)
+    clause_budget = CHAT_MAX_PROMPT_TOKENS - fixed_tokens - estimate_tokens(summary) - estimate_tokens(history_text)
+
+    clause_context = select_clause_context(clause_index, chat_context_index.embed_question(question), clause_budget)
+    return chatbot_prompt_template.format(summary=summary, clause_context=clause_context or "None relevant.",
+                                          history=history_text, question=question)
+
+
+@app.route('/chatbot', methods=['POST'])
+def chatbot():
+    """
+    Chatbot endpoint to answer user questions about the contract.
+    Expects JSON input with:
+      - 'summary': summary of the contract
+      - 'detailedAnalysis': list of clause analyses
+      - 'question': user's question
+    Only the clause analyses most relevant to the question go into the prompt.
+    """
+    data = request.get_json()
+    if not data or 'summary' not in data or 'detailedAnalysis' not in data or 'question' not in data:
+        return jsonify({"error": "Request body must contain 'summary', 'detailedAnalysis' and 'question'"}), 400
+
+    summary = parse_summary(data['summary'])
+    detailed_analysis = data['detailedAnalysis'] or []
+    question = data['question']
+
     try:
+        context = build_chatbot_prompt(summary, chat_context_index.get(detailed_analysis), question)
         response = generation_model.generate_content(context)
         answer = response.text.strip()
         return jsonify({"answer": answer})
@@ -428,16 +926,181 @@ def chatbot():
         print(f"❌ error during chatbot response: {e}")
         return jsonify({"error": "Could not generate a response."}), 500
 
+@app.route('/chatbot/stream', methods=['POST'])
+def chatbot_stream():
+    """
+    Streaming variant of /chatbot: 'token' events carry the answer as the model
+    writes it, then 'done' has token counts, time to first token and latency.
+    ?format=sse (default) or ?format=ndjson.
+    """
+    data = request.get_json()
+    if not data or 'summary' not in data or 'detailedAnalysis' not in data or 'question' not in data:
+        return jsonify({"error": "Request body must contain 'summary', 'detailedAnalysis' and 'question'"}), 400
+
+    try:
+        context = build_chatbot_prompt(parse_summary(data['summary']), chat_context_index.get(data['detailedAnalysis'] or []), data['question'])
+    except Exception as e:
+        print(f"❌ error preparing chatbot prompt: {e}")
+        return jsonify({"error": "Could not generate a response."}), 500
+    return stream_response(stream_generation(generation_model, context), request.args.get('format', 'sse'))
+
+
+# ---- Chat sessions ----
+@app.route('/chat/sessions', methods=['POST'])
+def create_chat_session():
+    """
+    Creates a chat session for one analyzed document, so later questions carry no
+    document payload. Send either 'analysis_key' (the cache.key of an /analyze
+    response) or 'summary' and 'detailedAnalysis' as for /chatbot.
+    """
+    data = request.get_json() or {}
+    if 'analysis_key' in data:
+        analysis = analysis_cache.get(data['analysis_key'])
+        if analysis is None:
+            return jsonify({"error": "Analysis not found; it may have expired from the cache"}), 404
+        summary, detailed_analysis = analysis['summary'], analysis['detailed_analysis']
+    elif 'summary' in data and 'detailedAnalysis' in data:
+        summary, detailed_analysis = data['summary'], data['detailedAnalysis'] or []
+    else:
+        return jsonify({"error": "Request body must contain 'analysis_key', or 'summary' and 'detailedAnalysis'"}), 400
+
+    try:
+        session = chat_sessions.create(parse_summary(summary), chat_context_index.get(detailed_analysis))
+    except Exception as e:
+        print(f"❌ error creating chat session: {e}")
+        return jsonify({"error": "Could not create a chat session."}), 500
+    return jsonify({"session_id": session.id, "clauses": len(session.clause_index.texts)}), 201
+
+
+@app.route('/chat/sessions/<session_id>/messages', methods=['POST'])
+def chat_session_message(session_id):
+    """Answers 'question' using the session's document and its recent turns."""
+    session = chat_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Chat session not found or expired"}), 404
+    data = request.get_json()
+    if not data or 'question' not in data:
+        return jsonify({"error": "Request body must contain 'question'"}), 400
+
+    try:
+        context = build_chatbot_prompt(session.summary, session.clause_index, data['question'], session.history())
+        response = generation_model.generate_content(context)
+        answer = response.text.strip()
+    except Exception as e:
+        print(f"❌ error during chatbot response: {e}")
+        return jsonify({"error": "Could not generate a response."}), 500
+    chat_sessions.record_turn(session, data['question'], answer)
+    return jsonify({"answer": answer})
+
+
+@app.route('/chat/sessions/<session_id>/messages/stream', methods=['POST'])
+def chat_session_message_stream(session_id):
+    """
+    Streaming variant of the messages endpoint, with the same events as
+    /chatbot/stream. The turn is only added to the session if the answer finished.
+    """
+    session = chat_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Chat session not found or expired"}), 404
+    data = request.get_json()
+    if not data or 'question' not in data:
+        return jsonify({"error": "Request body must contain 'question'"}), 400
+
+    question = data['question']
+    try:
+        context = build_chatbot_prompt(session.summary, session.clause_index, question, session.history())
+    except Exception as e:
+        print(f"❌ error preparing chatbot prompt: {e}")
+        return jsonify({"error": "Could not generate a response."}), 500
+    events = stream_generation(generation_model, context,
+                               on_complete=lambda answer: chat_sessions.record_turn(session, question, answer))
+    return stream_response(events, request.args.get('format', 'sse'))
+
+
+@app.route('/chat/sessions/<session_id>', methods=['GET'])
+def get_chat_session(session_id):
+    session = chat_sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": "Chat session not found or expired"}), 404
+    return jsonify(session.describe())
+
+
+@app.route('/chat/sessions/<session_id>', methods=['DELETE'])
+def delete_chat_session(session_id):
+    if not chat_sessions.delete(session_id):
+        return jsonify({"error": "Chat session not found or expired"}), 404
+    return jsonify({"deleted": session_id})
+
+
+@app.route('/chat/sessions/stats', methods=['GET'])
+def chat_session_stats():
+    return jsonify(chat_sessions.stats())
+
+# market-rate searches are cached by normalized query, refreshed in the background and coalesced
+market_rates = make_market_rate_cache(tavily_search_tool)
+
+loan_explanation_prompt = """
+You are a friendly financial advisor in India. Explain this loan comparison to a borrower in 3-4 short, plain-English bullet points.
+Use only the numbers given; do not invent rates or lenders.
+
+{comparison}
+"""
+
 @app.route('/loan_comparison', methods=['POST'])
 def loan_comparison():
-    data = request.get_json()
-    if 'summary' not in data:
+    """
+    Compares the loan described in 'summary' (plus optional 'key_entities' text)
+    against market offers locally: EMI, total interest, fees and effective annual
+    cost for each offer, ranked, with EMI and total cost over several tenures.
+    Optional fields:
+      - 'offers': list of {lender, annual_rate, processing_fee_pct} to compare against
+      - 'live_rates': true to take offers from a (cached) web search instead
+      - 'tenures': tenures in months for the scenario grid
+      - 'explain': true to have the LLM phrase the explanation
+    Falls back to the LLM comparison when principal, rate or tenure can't be found.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('summary'), str):
         return jsonify({"error": "Request body must contain 'summary'"}), 400
+    try:
+        if data.get('offers') is not None:
+            validate_offers(data['offers'])
+        if data.get('tenures') is not None:
+            validate_tenures(data['tenures'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     summary = parse_summary(data['summary'])
+    terms = parse_loan_terms(summary + "\n" + str(data.get('key_entities', '')))
+    if (None in (terms["principal"], terms["annual_rate"], terms["tenure_months"]) or terms["principal"] <= 0
+            or not 0 < terms["tenure_months"] <= LOAN_MAX_TENURE_MONTHS or terms["annual_rate"] > LOAN_MAX_RATE):
+        print(f"loan terms incomplete ({terms}); falling back to the LLM comparison.")
+        return llm_loan_comparison(summary)
+
+    offers = data.get('offers')
+    if not offers and data.get('live_rates'):
+        try:
+            offers = offers_from_search_results(market_rates.search(f"current personal loan interest rates India {time.strftime('%B %Y')}"))
+        except Exception as e:
+            print(f"❌ error during market rate search, using the offer table: {e}")
+    offers = offers or load_market_offers()
+
+    comparison = compare_offers(terms, offers, data.get('tenures'))
+    comparison["comparison"] = describe_comparison(comparison)
+    if data.get('explain'):
+        try:
+            explanation = generation_model.generate_content(loan_explanation_prompt.format(
+                comparison=json.dumps({key: comparison[key] for key in ("terms", "agreement", "offers")}, indent=1)))
+            comparison["comparison"] = explanation.text.strip()
+        except Exception as e:
+            print(f"❌ error phrasing the loan comparison, keeping the plain summary: {e}")
+    return jsonify(comparison)
+
+
+def llm_loan_comparison(summary: str):
     agreement_rate = extract_interest_rate(summary)
 
-    query = f"current personal loan interest rates India September 2025"
+    query = f"current personal loan interest rates India {time.strftime('%B %Y')}"
 
     # Step 1: Ask Gemini with tool binding
     response = llm_tools.invoke(
@@ -450,7 +1113,11 @@ def loan_comparison():
         tool_call = response.tool_calls[0]
         if tool_call["name"] == "tavily_search_tool":
             tool_args = tool_call["args"]
-            tool_result = tavily_search_tool(**tool_args)   # actually call your function
+            try:
+                tool_result = market_rates.search(tool_args.get("query", query))
+            except Exception as e:
+                print(f"❌ error during market rate search: {e}")
+                return jsonify({"error": "Could not fetch current market rates."}), 502
 
             # Step 3: Send tool result back to Gemini for reasoning
             followup = llm_tools.invoke(
@@ -462,6 +1129,43 @@ def loan_comparison():
 
     return jsonify({"answer": response.content})
 
+
+@app.route('/loan_comparison/market_rates/stats', methods=['GET'])
+def market_rate_stats():
+    return jsonify(market_rates.stats())
+
+@app.route('/simulate', methods=['POST'])
+def simulate_scenarios():
+    """
+    What-if outcomes computed locally from the Stage 0 key entities, no LLM call.
+    Send 'key_entities' (the /analyze output) or 'analysis_key', plus optional
+    'scenarios' grids, e.g. {"late_payment": {"months_late": [1, 2, 3]},
+    "early_exit": {"exit_month": [3, 6, 9]}, "prepay": {"amount": [100000], "month": [12]}},
+    and 'overrides' for any term (rent, deposit, lock_in_months, notice_months,
+    principal, annual_rate, term_months, prepayment_fee_pct).
+    """
+    data = request.get_json() or {}
+    key_entities = data.get('key_entities')
+    if key_entities is None and 'analysis_key' in data:
+        analysis = analysis_cache.get(data['analysis_key'])
+        if analysis is None:
+            return jsonify({"error": "Analysis not found; it may have expired from the cache"}), 404
+        key_entities = analysis['key_entities']
+    if key_entities is None:
+        return jsonify({"error": "Request body must contain 'key_entities' or 'analysis_key'"}), 400
+    if not isinstance(key_entities, str):
+        return jsonify({"error": "'key_entities' must be a string"}), 400
+
+    start = time.perf_counter()
+    try:
+        result = simulate(key_entities, data.get('scenarios'), data.get('overrides'))
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": f"Invalid scenarios: {e}"}), 400
+    if "missing" in result:
+        return jsonify({"error": "Could not find the terms needed to simulate", **result}), 422
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return jsonify(result)
+
 # put flowchart api here
 import re
 import logging
@@ -472,6 +1176,8 @@ logger = logging.getLogger(__name__)
 import re
 import logging
 
+FLOWCHART_ERROR = "graph TD;\n    A[Error generating flowchart];"
+
 def get_flowchart_mermaid_from_summary(summary_text: str) -> str:
     """
     Generates Mermaid flowchart code from a summary of a legal document using the generative model.
@@ -510,8 +1216,7 @@ def get_flowchart_mermaid_from_summary(summary_text: str) -> str:
     except Exception as error:
         logging.error(f"❌ Error during flowchart generation: {error}", exc_info=True)
         # Return minimal fallback flowchart on failure
-        return "graph TD;\n    A[Error generating flowchart];"
-s
+        return FLOWCHART_ERROR
 
     
 def parse_summary(summary: str) -> str:
@@ -538,7 +1243,18 @@ def parse_summary(summary: str) -> str:
 def detect_contract_type(document_text: str) -> str:
     """
     Identify contract type from text. Returns one of 'rental', 'employment', 'loan' or 'unknown'.
+    The local classifier answers when it is confident enough; otherwise, or if it
+    fails (e.g. the embedding model can't load), the LLM decides.
     """
+    try:
+        label, confidence = classify_contract(document_text, embedding_model)
+    except Exception as e:
+        print(f"❌ error in local contract classification, asking the LLM: {e}")
+        label, confidence = "unknown", 0.0
+    if confidence >= CONTRACT_CLASSIFIER_MIN_CONFIDENCE:
+        print(f"local classifier: {label} ({confidence:.2f})")
+        return label
+
     try:
         classification_prompt = f"""
         You are a contract classifier.
@@ -616,6 +1332,16 @@ def calculate_in_hand_salary(salary_components: dict) -> dict:
     except Exception as e:
         return {"error": f"An error occurred during salary calculation: {e}"}
 
+# ---- Readiness ----
+@app.route('/ready', methods=['GET'])
+def readiness():
+    """200 once every required model and index handle is loaded, 503 before; always lists each resource."""
+    status = resources.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+resources.start(RESOURCE_WARMUP)
+print(f"Initializations complete. Server is ready ({RESOURCE_WARMUP} model loading).")
+
 if __name__ == "__main__":
     import os
     app.run(
@@ -0,0 +1,136 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+MARKET_RATE_TTL_SECONDS = int(os.environ.get("MARKET_RATE_TTL_SECONDS", 6 * 3600))
+MARKET_RATE_STALE_SECONDS = int(os.environ.get("MARKET_RATE_STALE_SECONDS", 48 * 3600))
+MARKET_RATE_PROVIDER = os.environ.get("MARKET_RATE_PROVIDER", "tavily")
+
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation and spacing don't change what a search returns."""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w%.]+", " ", query.lower())).strip()
+
+
+class FakeSearchProvider:
+    """Canned market-rate results with a configurable delay, for tests and offline runs."""
+
+    RESULTS = [
+        {"title": "State Bank of India personal loan", "snippet": "Personal loan interest rates from 11.45% p.a.", "url": "https://example.com/sbi"},
+        {"title": "HDFC Bank personal loan", "snippet": "Interest rates starting at 10.90% p.a.", "url": "https://example.com/hdfc"},
+        {"title": "ICICI Bank personal loan", "snippet": "Rates from 10.85% to 16.65% p.a.", "url": "https://example.com/icici"},
+    ]
+
+    def __init__(self, results: list = None, latency_seconds: float = 0.0, fail: bool = False):
+        self.results = results if results is not None else self.RESULTS
+        self.latency_seconds = latency_seconds
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, query: str) -> list:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency_seconds)
+        if self.fail:
+            raise RuntimeError("fake search provider failure")
+        return [dict(result) for result in self.results]
+
+
+class MarketRateCache:
+    """
+    Caches `provider(query)` results by normalized query.
+
+    Results younger than `ttl_seconds` are served directly. Older ones, up to
+    `stale_seconds`, are served immediately while one background refresh replaces
+    them. Anything older, or missing, is fetched inline. Concurrent lookups of the
+    same query share a single upstream call, and when that call fails a stale
+    result is served if there is one.
+    """
+
+    def __init__(self, provider, ttl_seconds: float = MARKET_RATE_TTL_SECONDS, stale_seconds: float = MARKET_RATE_STALE_SECONDS):
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._entries = {}    # key -> (fetched_at, results)
+        self._in_flight = {}  # key -> Future shared by every caller waiting on that key
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="market-rate-refresh")
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+                          "upstream_calls": 0, "upstream_errors": 0, "background_refreshes": 0}
+        self._lock = threading.Lock()
+
+    def search(self, query: str) -> list:
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.time() - entry[0] if entry else None
+            if entry and age < self.ttl_seconds:
+                self._counters["hits"] += 1
+                return entry[1]
+            if entry and age < self.stale_seconds:
+                self._counters["stale_hits"] += 1
+                if key not in self._in_flight:
+                    self._counters["background_refreshes"] += 1
+                    self._in_flight[key] = Future()
+                    self._refresher.submit(self._fetch, key, query)
+                return entry[1]
+
+            self._counters["misses"] += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                owner = False
+            else:
+                future = self._in_flight[key] = Future()
+                owner = True
+
+        if owner:
+            self._fetch(key, query)
+        try:
+            return future.result()
+        except Exception:
+            if entry is not None:
+                print("❌ market rate lookup failed, serving the last known results.")
+                return entry[1]
+            raise
+
+    def _fetch(self, key: str, query: str):
+        with self._lock:
+            future = self._in_flight[key]
+            self._counters["upstream_calls"] += 1
+        try:
+            results = self.provider(query)
+        except Exception as e:
+            print(f"❌ error fetching market rates: {e}")
+            with self._lock:
+                self._counters["upstream_errors"] += 1
+                del self._in_flight[key]
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), results)
+            del self._in_flight[key]
+        future.set_result(results)
+
+    def invalidate(self, query: str = None):
+        with self._lock:
+            if query is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(normalize_query(query), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+def make_market_rate_cache(tavily_search_tool) -> MarketRateCache:
+    if MARKET_RATE_PROVIDER == "fake":
+        return MarketRateCache(FakeSearchProvider())
+    return MarketRateCache(tavily_search_tool)
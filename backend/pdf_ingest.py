@@ -0,0 +1,196 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pypdf import PdfReader
+
+from segmenter import ClauseSegmenter
+
+try:
+    import pytesseract
+    from pdf2image import convert_from_path
+except ImportError:
+    pytesseract = convert_from_path = None
+
+PDF_EXTRACT_WORKERS = int(os.environ.get("PDF_EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", 8))
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", 500))
+PDF_MIN_TEXT_CHARS = int(os.environ.get("PDF_MIN_TEXT_CHARS", 20))
+PDF_OCR_ENABLED = os.environ.get("PDF_OCR_ENABLED", "1") == "1"
+PDF_OCR_DPI = int(os.environ.get("PDF_OCR_DPI", 200))
+PDF_OCR_LANG = os.environ.get("PDF_OCR_LANG", "eng")
+# forking a multi-threaded server can copy a held lock into the child; forkserver starts
+# workers from a clean single-threaded process instead (spawn where it isn't available)
+PDF_POOL_START_METHOD = os.environ.get(
+    "PDF_POOL_START_METHOD", "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+OCR_AVAILABLE = pytesseract is not None and convert_from_path is not None
+
+_pool, _pool_workers = None, 0
+_pool_lock = threading.Lock()
+_reader = (None, None)  # (path, PdfReader), reused by a worker across the pages of one file
+
+
+class PDFError(Exception):
+    pass
+
+
+def _get_pool(workers: int):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                # runs already submitted by other requests still finish
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(PDF_POOL_START_METHOD))
+            _pool_workers = workers
+        return _pool
+
+
+def _replace_broken_pool(pool) -> None:
+    """Drops `pool` after a worker died (OOM kill, crash in poppler), unless another caller already has."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is pool:
+            _pool, _pool_workers = None, 0
+    pool.shutdown(wait=False)
+
+
+def _open(path: str) -> PdfReader:
+    global _reader
+    if _reader[0] != path:
+        _reader = (path, PdfReader(path))
+    return _reader[1]
+
+
+def extract_page(path: str, page_number: int, ocr: bool = True) -> tuple:
+    """
+    Text of one page (0-based) as (page_number, text, method). The text layer is
+    used when it has at least PDF_MIN_TEXT_CHARS characters; otherwise the page is
+    rendered alone and OCR'd, if pytesseract and pdf2image are installed. `method`
+    is 'text', 'ocr' or 'empty'.
+    """
+    try:
+        text = _open(path).pages[page_number].extract_text() or ""
+    except Exception as e:
+        print(f"❌ error reading text layer of page {page_number + 1}: {e}")
+        text = ""
+    if len(text.strip()) >= PDF_MIN_TEXT_CHARS or not (ocr and OCR_AVAILABLE):
+        return page_number, text, "text" if text.strip() else "empty"
+
+    try:
+        # only this page is rasterized, so memory stays bounded by one image per worker
+        images = convert_from_path(path, dpi=PDF_OCR_DPI, first_page=page_number + 1, last_page=page_number + 1)
+        ocr_text = "\n".join(pytesseract.image_to_string(image, lang=PDF_OCR_LANG) for image in images)
+    except Exception as e:
+        # a bad page (or a missing poppler/tesseract binary) keeps whatever text layer it has
+        print(f"❌ error running OCR on page {page_number + 1}, using its text layer: {e}")
+        return page_number, text, "text" if text.strip() else "empty"
+    return page_number, ocr_text, "ocr" if ocr_text.strip() else "empty"
+
+
+def extract_pages(path: str, first_page: int, last_page: int, ocr: bool = True) -> list:
+    """extract_page for a run of pages, so a worker opens the file once per task."""
+    return [extract_page(path, page_number, ocr) for page_number in range(first_page, last_page)]
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool, _pool_workers = None, 0
+
+
+def count_pages(path: str) -> int:
+    try:
+        return len(PdfReader(path).pages)
+    except Exception as e:
+        raise PDFError(f"Could not read PDF: {e}")
+
+
+def iter_pages(path: str, workers: int = None, ocr: bool = None):
+    """
+    Yields (page_number, text, method) in page order. Runs of PDF_PAGES_PER_TASK
+    pages are extracted in a process pool with at most two runs in flight per
+    worker, so a large scan is never rendered all at once.
+
+    If a worker dies, the pool is replaced and the unfinished runs are resubmitted;
+    a run that breaks the pool a second time is read here from its text layer only.
+    """
+    workers = workers if workers is not None else PDF_EXTRACT_WORKERS
+    ocr = PDF_OCR_ENABLED if ocr is None else ocr
+    page_count = count_pages(path)
+    if page_count > PDF_MAX_PAGES:
+        raise PDFError(f"PDF has {page_count} pages; the limit is {PDF_MAX_PAGES}.")
+
+    if workers <= 1:
+        for page_number in range(page_count):
+            yield extract_page(path, page_number, ocr)
+        return
+
+    pool = _get_pool(workers)
+    in_flight, next_page, retried = [], 0, set()  # in_flight: (first_page, last_page, future)
+    while in_flight or next_page < page_count:
+        try:
+            while next_page < page_count and len(in_flight) < 2 * workers:
+                last_page = min(next_page + PDF_PAGES_PER_TASK, page_count)
+                in_flight.append((next_page, last_page, pool.submit(extract_pages, path, next_page, last_page, ocr)))
+                next_page = last_page
+            first_page, last_page, future = in_flight[0]
+            pages = future.result()
+        except BrokenProcessPool:
+            first_page, last_page, _ = in_flight[0] if in_flight else (next_page, next_page, None)
+            print(f"❌ PDF worker died near pages {first_page + 1}-{last_page}; restarting the pool.")
+            _replace_broken_pool(pool)
+            pool = _get_pool(workers)
+            if in_flight and first_page in retried:
+                in_flight.pop(0)
+                yield from extract_pages(path, first_page, last_page, ocr=False)
+            retried.add(first_page)
+            # runs that finished before the crash keep their results
+            in_flight = [(first, last, run if run.done() and not run.cancelled() and run.exception() is None else
+                          pool.submit(extract_pages, path, first, last, ocr)) for first, last, run in in_flight]
+            continue
+        in_flight.pop(0)
+        yield from pages
+
+
+def extract_document(path: str, workers: int = None, ocr: bool = None, on_page=None) -> dict:
+    """
+    Streams the pages of a PDF through extraction and into the clause segmenter.
+    Returns the document text, its clauses and extraction stats. `on_page(data)`,
+    when given, is called once per page in order.
+    """
+    start = time.perf_counter()
+    segmenter = ClauseSegmenter()
+    parts, clauses = [], []
+    methods = {"text": 0, "ocr": 0, "empty": 0}
+    for page_number, text, method in iter_pages(path, workers, ocr):
+        methods[method] += 1
+        # a clause may run on to the next page, so pages are joined with a single newline
+        page_text = text.strip("\n") + "\n"
+        parts.append(page_text)
+        clauses.extend(segmenter.feed(page_text))
+        if on_page:
+            on_page({"page": page_number + 1, "method": method, "chars": len(text), "clauses": len(clauses)})
+    clauses.extend(segmenter.finish())
+
+    elapsed = time.perf_counter() - start
+    pages = sum(methods.values())
+    return {
+        "text": "".join(parts),
+        "clauses": clauses,
+        "stats": {
+            "pages": pages,
+            "text_pages": methods["text"],
+            "ocr_pages": methods["ocr"],
+            "empty_pages": methods["empty"],
+            "ocr_available": OCR_AVAILABLE,
+            "elapsed_ms": round(elapsed * 1000),
+            "pages_per_second": round(pages / elapsed, 1) if elapsed else None,
+        },
+    }
@@ -0,0 +1,84 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+CLAUSE_ANALYSIS_MAX_WORKERS = int(os.environ.get("CLAUSE_ANALYSIS_MAX_WORKERS", 8))
+
+
+def analyze_clauses(chunks: list, analyze_chunk, max_workers: int = None, on_result=None) -> list:
+    """
+    Runs analyze_chunk(i, chunk) for every chunk with at most max_workers calls in flight.
+    Results are returned in the original clause order. A chunk whose analysis raises
+    (or returns None) is left out, the same way the serial loop used to `continue`.
+    If given, on_result(i, result) is called from the worker thread as soon as each
+    chunk finishes, in completion order.
+    """
+    if not chunks:
+        return []
+    max_workers = max(1, min(max_workers or CLAUSE_ANALYSIS_MAX_WORKERS, len(chunks)))
+
+    def run(i, chunk):
+        result = analyze_chunk(i, chunk)
+        if on_result is not None and result is not None:
+            on_result(i, result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="clause") as executor:
+        futures = [executor.submit(run, i, chunk) for i, chunk in enumerate(chunks)]
+
+        results = []
+        for i, future in enumerate(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ error processing chunk {i+1}: {e}")
+                continue
+            if result is not None:
+                results.append(result)
+    return results
+
+
+def run_stages(stages: dict, on_result=None) -> tuple:
+    """
+    Runs a small DAG of pipeline stages, each one as soon as its dependencies are done.
+
+    `stages` maps a stage name to `(fn, [dependency names])`. Each fn is called with the
+    results of its dependencies as keyword arguments, so independent stages run at the
+    same time and a dependent one starts the moment its inputs are ready.
+    Returns `(results, timings)` where timings holds each stage's duration in ms.
+    If given, on_result(name, result) is called as each stage completes.
+    """
+    for name, (_, deps) in stages.items():
+        unknown = [dep for dep in deps if dep not in stages]
+        if unknown:
+            raise ValueError(f"stage '{name}' depends on unknown stage(s): {unknown}")
+
+    results, timings = {}, {}
+
+    def timed(name, fn, kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(**kwargs)
+        finally:
+            timings[name] = round((time.perf_counter() - start) * 1000)
+
+    pending = dict(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(stages)), thread_name_prefix="stage") as executor:
+        while pending or running:
+            ready = [name for name, (_, deps) in pending.items() if all(dep in results for dep in deps)]
+            if not ready and not running:
+                raise ValueError(f"stage dependency cycle between: {sorted(pending)}")
+            for name in ready:
+                fn, deps = pending.pop(name)
+                kwargs = {dep: results[dep] for dep in deps}
+                running[executor.submit(timed, name, fn, kwargs)] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                if on_result is not None:
+                    on_result(name, results[name])
+
+    return results, timings
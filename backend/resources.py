@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+
+# background: start serving at once and load models/index handles on a warm-up thread
+# lazy: load each one on first use only
+# eager: load everything before the app is importable (the old behaviour; use with gunicorn --preload)
+RESOURCE_WARMUP = os.environ.get("RESOURCE_WARMUP", "background").lower()
+
+
+class Resource:
+    """A value built by `factory` on first use. Concurrent first callers wait for a single build."""
+
+    def __init__(self, name: str, factory, required: bool = True):
+        self.name = name
+        self.factory = factory
+        self.required = required
+        self._value = None
+        self._loaded = False
+        self._loading = False
+        self._lock = threading.Lock()
+        self.load_seconds = None
+        self.error = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                self._loading = True
+                start = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    # not cached: the next caller retries
+                    self.error = f"{type(e).__name__}: {e}"
+                    raise
+                finally:
+                    self._loading = False
+                self.load_seconds = round(time.perf_counter() - start, 3)
+                self.error = None
+                self._loaded = True
+        return self._value
+
+    def status(self) -> dict:
+        return {"loaded": self._loaded, "loading": self._loading, "required": self.required,
+                "load_seconds": self.load_seconds, "error": self.error}
+
+
+class LazyProxy:
+    """
+    Stands in for a resource's value so module-level names such as
+    `generation_model` keep working: the first attribute access loads it.
+    """
+
+    __slots__ = ("_resource",)
+
+    def __init__(self, resource: Resource):
+        object.__setattr__(self, "_resource", resource)
+
+    def __getattr__(self, name):
+        return getattr(self._resource.get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resource.get(), name, value)
+
+    def __repr__(self):
+        state = "loaded" if self._resource.loaded else "not loaded"
+        return f"<lazy {self._resource.name} ({state})>"
+
+
+class ResourceRegistry:
+    """Named lazy resources, with warm-up in the foreground or on a background thread."""
+
+    def __init__(self):
+        self._resources = {}
+        self._warmup_thread = None
+        self.started_at = time.time()
+        self.warmup_seconds = None
+
+    def register(self, name: str, factory, required: bool = True) -> LazyProxy:
+        resource = self._resources[name] = Resource(name, factory, required)
+        return LazyProxy(resource)
+
+    def get(self, name: str):
+        return self._resources[name].get()
+
+    def loaded(self, name: str) -> bool:
+        return self._resources[name].loaded
+
+    def warm_up(self, names: list = None):
+        """Loads resources in registration order; a failure is logged and left for first use to retry."""
+        start = time.perf_counter()
+        for name in names or list(self._resources):
+            try:
+                self._resources[name].get()
+                print(f"✅ {name} loaded in {self._resources[name].load_seconds}s")
+            except Exception as e:
+                print(f"❌ error loading {name}: {e}")
+        self.warmup_seconds = round(time.perf_counter() - start, 3)
+
+    def warm_up_in_background(self, names: list = None) -> threading.Thread:
+        if self._warmup_thread is None:
+            self._warmup_thread = threading.Thread(target=self.warm_up, args=(names,), name="resource-warmup", daemon=True)
+            self._warmup_thread.start()
+        return self._warmup_thread
+
+    def start(self, mode: str = None):
+        """Applies a RESOURCE_WARMUP mode: load everything now, on a background thread, or only on first use."""
+        mode = mode or RESOURCE_WARMUP
+        if mode == "eager":
+            self.warm_up()
+        elif mode == "background":
+            self.warm_up_in_background()
+
+    def ready(self) -> bool:
+        return all(resource.loaded for resource in self._resources.values() if resource.required)
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready(),
+            "warmup": RESOURCE_WARMUP,
+            "warmup_seconds": self.warmup_seconds,
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "resources": {name: resource.status() for name, resource in self._resources.items()},
+        }
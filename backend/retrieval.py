@@ -0,0 +1,160 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+RETRIEVAL_MAX_CONCURRENCY = int(os.environ.get("RETRIEVAL_MAX_CONCURRENCY", 16))
+# relevance vs. novelty trade-off for maximal marginal relevance; 1 turns the diversity step off
+RETRIEVAL_MMR_LAMBDA = float(os.environ.get("RETRIEVAL_MMR_LAMBDA", 0.7))
+# candidates fetched per returned match, for MMR to choose from
+RETRIEVAL_MMR_FETCH_FACTOR = int(os.environ.get("RETRIEVAL_MMR_FETCH_FACTOR", 3))
+# candidates this close to one already picked are repeats and never returned
+RETRIEVAL_DUPLICATE_SIMILARITY = float(os.environ.get("RETRIEVAL_DUPLICATE_SIMILARITY", 0.97))
+
+# Shared by every request: queries are leaf tasks, so one process-wide pool bounds the
+# number of in-flight index calls and lets them reuse the index client's HTTP connections.
+_query_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_MAX_CONCURRENCY, thread_name_prefix="retrieval")
+
+
+class RetrievalBackend:
+    """
+    Fetches top-k knowledge-base matches for many query vectors at once.
+
+    `query_many` returns one list of matches per input vector, in the same order.
+    Each match is a dict with 'id', 'score' and 'metadata' (and 'values', the stored
+    vector, with include_values=True). A slot is None when the lookup for that vector
+    failed, so callers can drop just that clause.
+    """
+
+    def query_many(self, vectors, top_k: int = 4, include_values: bool = False) -> list:
+        raise NotImplementedError
+
+
+class PineconeBackend(RetrievalBackend):
+    """Fans the queries for a document out over the shared pool, against one Index handle."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def _query(self, vector, top_k, include_values):
+        response = self.index.query(vector=vector, top_k=top_k, include_metadata=True, include_values=include_values)
+        matches = []
+        for match in response['matches']:
+            matches.append({"id": match.get('id'), "score": match.get('score'), "metadata": match.get('metadata', {}) or {}})
+            if include_values:
+                matches[-1]["values"] = np.asarray(match.get('values'), dtype=np.float32)
+        return matches
+
+    def query_many(self, vectors, top_k: int = 4, include_values: bool = False) -> list:
+        futures = [_query_executor.submit(self._query, np.asarray(v).tolist(), top_k, include_values) for v in vectors]
+        results = []
+        for i, future in enumerate(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"❌ error querying index for chunk {i+1}: {e}")
+                results.append(None)
+        return results
+
+
+class InMemoryBackend(RetrievalBackend):
+    """
+    Exact cosine search over records held in process, with no network.
+    `records` are Pinecone-style dicts: {"id", "values", "metadata"}.
+    """
+
+    def __init__(self, records: list):
+        self.ids = [r["id"] for r in records]
+        self.metadata = [r.get("metadata", {}) for r in records]
+        matrix = np.asarray([r["values"] for r in records], dtype=np.float32)
+        if matrix.ndim != 2:
+            matrix = matrix.reshape(len(records), -1 if records else 0)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.maximum(norms, 1e-12)
+
+    def query_many(self, vectors, top_k: int = 4, include_values: bool = False) -> list:
+        queries = np.asarray(vectors, dtype=np.float32)
+        if len(queries) == 0 or len(self.ids) == 0:
+            return [[] for _ in range(len(queries))]
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        scores = queries @ self.matrix.T
+        k = min(top_k, len(self.ids))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(scores, top):
+            ranked = candidates[np.argsort(-row[candidates])]
+            results.append([
+                {"id": self.ids[j], "score": float(row[j]), "metadata": self.metadata[j],
+                 **({"values": self.matrix[j]} if include_values else {})}
+                for j in ranked
+            ])
+        return results
+
+
+def mmr_select(query, candidates, k: int, diversity_lambda: float = RETRIEVAL_MMR_LAMBDA,
+               duplicate_similarity: float = RETRIEVAL_DUPLICATE_SIMILARITY) -> list:
+    """
+    Maximal marginal relevance: indices of up to k rows of `candidates`, each pick
+    maximizing lambda * sim(query, c) - (1 - lambda) * max sim(c, picked so far).
+    Rows at least `duplicate_similarity` to a pick are dropped, so fewer than k can
+    come back when the candidates repeat each other.
+    """
+    candidates = np.asarray(candidates, dtype=np.float32).reshape(len(candidates), -1)
+    if len(candidates) == 0:
+        return []
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query, dtype=np.float32)
+    relevance = candidates @ (query / max(float(np.linalg.norm(query)), 1e-12))
+    pairwise = candidates @ candidates.T
+    redundancy = np.zeros(len(candidates), dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    picked = []
+    while len(picked) < k and available.any():
+        scores = np.where(available, diversity_lambda * relevance - (1 - diversity_lambda) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        picked.append(best)
+        available &= pairwise[best] < duplicate_similarity
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return picked
+
+
+class DiversifiedBackend(RetrievalBackend):
+    """
+    Wraps another backend: fetches `fetch_factor` x top_k candidates with their vectors
+    and keeps top_k of them by maximal marginal relevance, so boilerplate that is
+    repeated across the knowledge base doesn't fill every slot of the expert context.
+    """
+
+    def __init__(self, backend: RetrievalBackend, diversity_lambda: float = RETRIEVAL_MMR_LAMBDA,
+                 fetch_factor: int = RETRIEVAL_MMR_FETCH_FACTOR):
+        self.backend = backend
+        self.diversity_lambda = diversity_lambda
+        self.fetch_factor = fetch_factor
+
+    def query_many(self, vectors, top_k: int = 4, include_values: bool = False) -> list:
+        results = []
+        for query, matches in zip(vectors, self.backend.query_many(vectors, top_k * self.fetch_factor, include_values=True)):
+            if matches is None:
+                results.append(None)
+                continue
+            picked = [matches[i] for i in mmr_select(query, [m["values"] for m in matches], top_k, self.diversity_lambda)]
+            if not include_values:
+                picked = [{key: value for key, value in match.items() if key != "values"} for match in picked]
+            results.append(picked)
+        return results
+
+
+def format_expert_context(matches: list) -> str:
+    """Renders retrieved matches into the 'Expert Context' block of the analysis prompts."""
+    similar_clauses_context = ""
+    for match in matches:
+        metadata = match.get('metadata', {})
+        # indexes built by tools/ingest_kb.py store the chunk under 'text'
+        similar_clauses_context += (
+            f"- Context: '{metadata.get('clause_text') or metadata.get('text', 'N/A')}'\n"
+            f"  - Risk: {metadata.get('risk_level', 'N/A')}\n"
+            f"  - Explanation: {metadata.get('risk_explanation', 'N/A')}\n"
+        )
+    return similar_clauses_context
@@ -0,0 +1,91 @@
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from cache import make_cache_key, normalize_text
+
+REVISION_MATCH_SIMILARITY = float(os.environ.get("REVISION_MATCH_SIMILARITY", 0.80))
+REVISION_REUSE_SIMILARITY = float(os.environ.get("REVISION_REUSE_SIMILARITY", 0.97))
+
+# leading clause numbers are dropped before comparing, so inserting a clause and
+# renumbering the rest doesn't count as a change to every later clause
+_LEADING_LABEL = re.compile(
+    r"^\s*(?:(?:ARTICLE|SECTION|CLAUSE|Article|Section|Clause)\s+[\w.]+[.:]?|\(?(?:\d{1,3}(?:\.\d{1,3})*|[a-zA-Z]|[ivxlcdmIVXLCDM]{1,6})[.)])\s+"
+)
+# amounts, percentages, dates, durations: the terms a summary is built from
+_MATERIAL_TERM = re.compile(
+    r"\d[\d,]*(?:\.\d+)?\s*%?"
+    r"|\b(?:one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|fifteen|twenty|thirty|forty|"
+    r"forty-five|fifty|sixty|ninety|hundred|thousand|lakh|lakhs|crore|crores|million)\b",
+    re.IGNORECASE,
+)
+
+
+def clause_body(text: str) -> str:
+    return normalize_text(_LEADING_LABEL.sub("", text, count=1))
+
+
+def clause_hash(text: str) -> str:
+    return make_cache_key(clause_body(text).lower())
+
+
+def material_terms(text: str) -> Counter:
+    """Multiset of numeric and number-word terms in a clause, ignoring its leading label."""
+    return Counter(re.sub(r"[\s,]", "", term).lower() for term in _MATERIAL_TERM.findall(clause_body(text)))
+
+
+def align_clauses(old_chunks: list, new_chunks: list, encode=None) -> dict:
+    """
+    Aligns the clauses of a new version to the previous one.
+
+    Clauses whose text (minus numbering and whitespace) is identical are matched
+    first; the rest are paired greedily by embedding similarity, most similar first,
+    when `encode(texts)` is given and the similarity is at least
+    REVISION_MATCH_SIMILARITY. Returns:
+
+        {"matches": [(old_index or None, status) per new clause],
+         "removed": [old indices with no counterpart],
+         "material_change": bool}
+
+    where status is 'unchanged' (same text, or at least REVISION_REUSE_SIMILARITY
+    similar with the same material terms), 'modified' or 'added'. A change is
+    material when the document's material terms differ or a clause was added or
+    removed; rewording alone is not.
+    """
+    old_by_hash = {}
+    for j, chunk in enumerate(old_chunks):
+        old_by_hash.setdefault(clause_hash(chunk), []).append(j)
+
+    matches = [None] * len(new_chunks)
+    for i, chunk in enumerate(new_chunks):
+        candidates = old_by_hash.get(clause_hash(chunk))
+        if candidates:
+            matches[i] = (candidates.pop(0), "unchanged")
+
+    unmatched_new = [i for i, match in enumerate(matches) if match is None]
+    matched_old = {match[0] for match in matches if match is not None}
+    unmatched_old = [j for j in range(len(old_chunks)) if j not in matched_old]
+
+    if encode is not None and unmatched_new and unmatched_old:
+        vectors = np.asarray(encode([new_chunks[i] for i in unmatched_new] + [old_chunks[j] for j in unmatched_old]), dtype=np.float32)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        similarity = vectors[:len(unmatched_new)] @ vectors[len(unmatched_new):].T
+        for flat in np.argsort(-similarity, axis=None):
+            a, b = divmod(int(flat), len(unmatched_old))
+            if similarity[a, b] < REVISION_MATCH_SIMILARITY:
+                break
+            i, j = unmatched_new[a], unmatched_old[b]
+            if matches[i] is not None or j in matched_old:
+                continue
+            same_terms = material_terms(new_chunks[i]) == material_terms(old_chunks[j])
+            matches[i] = (j, "unchanged" if same_terms and similarity[a, b] >= REVISION_REUSE_SIMILARITY else "modified")
+            matched_old.add(j)
+
+    matches = [match or (None, "added") for match in matches]
+    removed = [j for j in range(len(old_chunks)) if j not in matched_old]
+    old_terms = sum((material_terms(chunk) for chunk in old_chunks), Counter())
+    new_terms = sum((material_terms(chunk) for chunk in new_chunks), Counter())
+    material_change = old_terms != new_terms or bool(removed) or any(status == "added" for _, status in matches)
+    return {"matches": matches, "removed": removed, "material_change": material_change}
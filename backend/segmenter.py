@@ -0,0 +1,288 @@
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+MAX_CLAUSE_TOKENS = int(os.environ.get("MAX_CLAUSE_TOKENS", 400))
+MIN_CLAUSE_CHARS = int(os.environ.get("MIN_CLAUSE_CHARS", 40))
+
+# clause markers, checked in order; each maps to a nesting level
+_NUMBERED = re.compile(r"(\d{1,3}(?:\.\d{1,3})*)[.)]\s+\S|(\d{1,3}(?:\.\d{1,3})+)\s+\S")
+_LETTERED = re.compile(r"(\([a-zA-Z]\)|[a-z]\))\s+\S|([a-z])\.\s+\S")
+_ROMAN = re.compile(r"\(?([ivxlcdm]{1,6}|[IVXLCDM]{1,6})[.)]\s+\S")
+_BULLET = re.compile(r"[*•\-]\s+\S")
+_SECTION = re.compile(r"(?:ARTICLE|SECTION|CLAUSE|SCHEDULE|ANNEXURE|PART|Article|Section|Schedule|Annexure)\s+(?:\d+[\w.]*|[IVXLC]+\b|[A-Z]\b)")
+_SENTENCE_END = re.compile(r"(?<=[.;!?])\s+(?=[\"'(\[A-Z0-9])")
+_ROMAN_VALUES = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100, "d": 500, "m": 1000}
+
+
+def _tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+@dataclass
+class Clause:
+    """
+    One clause; `start`/`end` are its character offsets in the document. `spans`
+    holds (offset in text, offset in document) where each contiguous run of the
+    text starts, since merged clauses skip the blank lines between their parts.
+    """
+    text: str
+    start: int
+    end: int
+    label: str = ""
+    path: list = field(default_factory=list)
+    heading: str = ""
+    spans: list = field(default_factory=list, repr=False, compare=False)
+
+    def document_offset(self, position: int) -> int:
+        """Document offset of the character at `position` in `text`."""
+        run_start, offset = 0, self.start
+        for text_offset, document_offset in self.spans:
+            if text_offset > position:
+                break
+            run_start, offset = text_offset, document_offset
+        return offset + position - run_start
+
+
+@lru_cache(maxsize=1024)
+def _roman_value(label: str):
+    """Value of a well-formed roman numeral ('iv' -> 4), else None."""
+    values = [_ROMAN_VALUES[c] for c in label.lower()]
+    total = sum(-v if i + 1 < len(values) and v < values[i + 1] else v for i, v in enumerate(values))
+    canonical, rest = "", total
+    for value, numeral in ((1000, "m"), (900, "cm"), (500, "d"), (400, "cd"), (100, "c"), (90, "xc"),
+                           (50, "l"), (40, "xl"), (10, "x"), (9, "ix"), (5, "v"), (4, "iv"), (1, "i")):
+        count, rest = divmod(rest, value)
+        canonical += numeral * count
+    return total if canonical == label.lower() else None
+
+
+def _is_roman(label: str, form: str, stack: list) -> bool:
+    """
+    Whether a single letter that is also a roman numeral ('(i)', '(v)', '(c)') is one,
+    judging by the open list it would continue: after '(b)', '(c)' is a letter; '(v)'
+    is roman only after '(iv)'. With no such sibling, only 'i' starts a roman list.
+    """
+    siblings = {kind: label for _, label, kind in stack}
+    previous = siblings.get("lettered" + form)
+    if previous is not None and ord(label.lower()) - ord(previous.lower()) == 1:
+        return False
+    previous = siblings.get("roman" + form)
+    if previous is not None and _roman_value(previous) is not None and _roman_value(label) == _roman_value(previous) + 1:
+        return True
+    return label.lower() == "i"
+
+
+def _list_form(stripped: str, label: str) -> str:
+    """Marker shape with the label abstracted, e.g. '(iv)' -> '(a)', 'B.' -> 'A.'."""
+    opening = "(" if stripped.startswith("(") else ""
+    return opening + ("a" if label.islower() else "A") + stripped[len(opening) + len(label)]
+
+
+def _match_marker(line: str, stack: list = ()):
+    """
+    (label, level, kind) when the line opens a new clause, else None. `stack` holds
+    the (level, label, kind) of the enclosing clauses. List items (lettered, roman,
+    bulleted) get level None: their nesting depends on which lists are open.
+    """
+    stripped = line.lstrip()
+    if not stripped:
+        return None
+    if _SECTION.match(stripped):
+        return stripped.split()[0] + " " + stripped.split()[1].rstrip(".:"), 1, "section"
+    match = _NUMBERED.match(stripped)
+    if match:
+        label = match.group(1) or match.group(2)
+        return label, 1 + label.count("."), "numbered"
+    roman = _ROMAN.match(stripped)
+    lettered = _LETTERED.match(stripped)
+    if roman and _roman_value(roman.group(1)) is not None:
+        label = roman.group(1)
+        form = _list_form(stripped, label)
+        if len(label) > 1 or not lettered or _is_roman(label, form, stack):
+            return label, None, "roman" + form
+    if lettered:
+        label = (lettered.group(1) or lettered.group(2)).strip("()")
+        return label, None, "lettered" + _list_form(stripped, label)
+    if _BULLET.match(stripped):
+        return "*", None, "bullet"
+    return None
+
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    letters = [c for c in stripped if c.isalpha()]
+    return 0 < len(stripped) <= 80 and len(letters) >= 3 and all(c.isupper() for c in letters) and not stripped.endswith((".", ";"))
+
+
+class ClauseSegmenter:
+    """
+    Single-pass, linear-time clause segmenter that can be fed text incrementally.
+
+    A clause starts at a numbered (1., 2.3), lettered ((a), b)), roman (IV.) or
+    bulleted line, at an ARTICLE/SECTION line, or after a blank line. Each clause
+    records its numbering path (e.g. ['3', '3.2', 'a']) and the nearest ALL-CAPS
+    heading above it. A list item continues the open list with the same marker
+    shape, or else nests under the current clause. Clauses over `max_tokens` are split on sentence boundaries;
+    fragments under `min_chars` are merged into a neighbour so nothing is silently
+    dropped: forward for headings and lead-ins ending in ':', backward for finished
+    sentences, except that a labelled fragment is never merged into a deeper list item.
+    """
+
+    def __init__(self, max_tokens: int = None, min_chars: int = None):
+        self.max_tokens = max_tokens or MAX_CLAUSE_TOKENS
+        self.min_chars = min_chars if min_chars is not None else MIN_CLAUSE_CHARS
+        self._buffer = ""          # unterminated last line
+        self._offset = 0           # absolute offset of _buffer[0]
+        self._lines = []           # (start, text) lines of the clause being built
+        self._label, self._path = "", []
+        self._stack = []           # (level, label, kind) of enclosing clauses
+        self._heading = ""
+        self._carry = None         # heading-like fragment waiting to merge forward
+        self._held = None          # last finished clause, held back for possible backward merges
+
+    def feed(self, text: str) -> list:
+        """Adds text and returns the clauses that are now complete."""
+        out = []
+        data = self._buffer + text
+        position = 0
+        while True:
+            newline = data.find("\n", position)
+            if newline < 0:
+                break
+            self._line(self._offset + position, data[position:newline], out)
+            position = newline + 1
+        self._buffer = data[position:]
+        self._offset += position
+        return out
+
+    def finish(self) -> list:
+        """Flushes everything still buffered; call once at the end of the document."""
+        out = []
+        if self._buffer:
+            self._line(self._offset, self._buffer, out)
+            self._offset += len(self._buffer)
+            self._buffer = ""
+        self._close(out)
+        if self._carry is not None:
+            self._merge_backward(self._carry, out)
+            self._carry = None
+        if self._held is not None:
+            out.extend(self._split(self._held))
+            self._held = None
+        return out
+
+    def _line(self, start: int, line: str, out: list):
+        if not line.strip():
+            self._close(out)
+            return
+        marker = _match_marker(line, self._stack)
+        if marker is not None or _is_heading(line):
+            self._close(out)
+            if marker is not None:
+                label, level, kind = marker
+                if level is None:
+                    # '(a)' or '(i)' starts a new list even when one of the same shape is open further out
+                    starts_list = label.lower() == ("a" if kind.startswith("lettered") else "i")
+                    level = None if starts_list else next((entry[0] for entry in reversed(self._stack) if entry[2] == kind), None)
+                    if level is None:
+                        level = self._stack[-1][0] + 1 if self._stack else 2
+                while self._stack and self._stack[-1][0] >= level:
+                    self._stack.pop()
+                self._stack.append((level, label, kind))
+                self._label, self._path = label, [entry[1] for entry in self._stack]
+            else:
+                self._heading = line.strip()
+        self._lines.append((start, line))
+
+    def _close(self, out: list):
+        if not self._lines:
+            return
+        first_start, first_line = self._lines[0]
+        last_start, last_line = self._lines[-1]
+        lead = len(first_line) - len(first_line.lstrip())
+        start = first_start + lead
+        end = last_start + len(last_line.rstrip())
+        text = "\n".join(line for _, line in self._lines)[lead:].rstrip()
+        clause = Clause(text=text, start=start, end=end, label=self._label, path=list(self._path), heading=self._heading,
+                        spans=[(0, start)])
+        self._lines, self._label = [], ""
+
+        if self._carry is not None:
+            clause = self._join(self._carry, clause)
+            self._carry = None
+        if len(clause.text) < self.min_chars:
+            # an unfinished fragment or one ending in ':' ("2. Deposit:") introduces what follows
+            if not clause.text.rstrip().endswith((".", ";")) or self._held is None:
+                self._carry = clause
+                return
+            # a labelled fragment shallower than the held clause ("3. Lock-in." after "(d) ...") stands alone
+            if not (clause.label and len(clause.path) < len(self._held.path)):
+                self._merge_backward(clause, out)
+                return
+        if self._held is not None:
+            out.extend(self._split(self._held))
+        self._held = clause
+
+    def _merge_backward(self, clause: Clause, out: list):
+        if self._held is None:
+            self._held = clause
+        else:
+            self._held = self._join(self._held, clause, keep_first_label=True)
+
+    @staticmethod
+    def _join(first: Clause, second: Clause, keep_first_label: bool = False) -> Clause:
+        owner = first if keep_first_label else second
+        return Clause(
+            text=first.text + "\n" + second.text,
+            start=first.start, end=second.end,
+            label=owner.label or first.label, path=owner.path or first.path,
+            heading=owner.heading or first.heading,
+            spans=(first.spans or [(0, first.start)])
+            + [(len(first.text) + 1 + i, offset) for i, offset in (second.spans or [(0, second.start)])],
+        )
+
+    def _split(self, clause: Clause) -> list:
+        """Splits an oversized clause on sentence boundaries (then whitespace) to fit max_tokens."""
+        if _tokens(clause.text) <= self.max_tokens:
+            return [clause]
+        max_chars = self.max_tokens * 4
+        boundaries = [m.end() for m in _SENTENCE_END.finditer(clause.text)] + [len(clause.text)]
+        pieces, piece_start, last_boundary = [], 0, 0
+        for boundary in boundaries:
+            if boundary - piece_start <= max_chars:
+                last_boundary = boundary
+                continue
+            if last_boundary > piece_start:
+                # close the piece at the previous sentence end
+                pieces.append((piece_start, last_boundary))
+                piece_start = last_boundary
+            while boundary - piece_start > max_chars:
+                # a single sentence longer than the limit: cut at the last space that fits
+                space = clause.text.rfind(" ", piece_start + 1, piece_start + max_chars)
+                cut = space if space > piece_start else piece_start + max_chars
+                pieces.append((piece_start, cut))
+                piece_start = cut
+            last_boundary = boundary
+        if piece_start < len(clause.text):
+            pieces.append((piece_start, len(clause.text)))
+
+        result = []
+        for a, b in pieces:
+            raw = clause.text[a:b]
+            text = raw.strip()
+            if not text:
+                continue
+            first = a + (len(raw) - len(raw.lstrip()))
+            last = first + len(text) - 1
+            runs = [(i - first, offset) for i, offset in clause.spans if first < i <= last]
+            result.append(Clause(text=text, start=clause.document_offset(first), end=clause.document_offset(last) + 1,
+                                 label=clause.label, path=list(clause.path), heading=clause.heading,
+                                 spans=[(0, clause.document_offset(first))] + runs))
+        return result
+
+
+def segment_clauses(document_text: str, max_tokens: int = None, min_chars: int = None) -> list:
+    segmenter = ClauseSegmenter(max_tokens=max_tokens, min_chars=min_chars)
+    return segmenter.feed(document_text) + segmenter.finish()
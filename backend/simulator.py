@@ -0,0 +1,251 @@
+import re
+
+import numpy as np
+
+from loan_engine import emi, parse_amount
+
+# key_entities label keywords -> term; the first matching rule wins for each line
+_TERM_RULES = [
+    ("penalty", r"penal|default|late|overdue|delay"),
+    ("prepayment_fee_pct", r"prepayment|pre-payment|foreclosure|part[- ]payment"),
+    ("deposit", r"deposit|advance"),
+    ("rent", r"rent|licen[cs]e fee"),
+    ("lock_in_months", r"lock[- ]?in"),
+    ("notice_months", r"notice"),
+    ("principal", r"loan amount|principal|sanctioned amount|amount borrowed"),
+    ("annual_rate", r"interest|rate"),
+    ("term_months", r"term|tenure|duration|period"),
+]
+
+SIMULATION_MAX_GRID_VALUES = 1000
+_MONTH_AXES = {"months_late", "exit_month", "month"}
+
+DEFAULT_GRIDS = {
+    "late_payment": {"months_late": [1, 2, 3, 6]},
+    "early_exit": {"exit_month": None},  # every month of the term
+    "prepay": {"amount_pct": [10, 25, 50], "month": [6, 12, 24]},
+}
+
+
+def parse_key_entities(key_entities: str) -> dict:
+    """'* Label: Value' lines from the Stage 0 output as {label: value}."""
+    entities = {}
+    for line in key_entities.splitlines():
+        match = re.match(r"\s*[*\-•]\s*\**([^:*]+?)\**\s*:\s*(.+)", line)
+        if match:
+            entities[match.group(1).strip()] = match.group(2).strip()
+    return entities
+
+
+def parse_months(value: str):
+    match = re.search(r"(\d+(?:\.\d+)?)\s*(days?|weeks?|months?|years?|yrs?)", value, re.IGNORECASE)
+    if not match:
+        return None
+    number, unit = float(match.group(1)), match.group(2).lower()
+    return number * {"d": 1 / 30, "w": 7 / 30, "m": 1, "y": 12}[unit[0]]
+
+
+def _parse_penalty(value: str) -> dict:
+    """'2% per month', '24% p.a.' or 'Rs. 500 per day' as a monthly rate or a fixed charge."""
+    percent = re.search(r"(\d+(?:\.\d+)?)\s*%", value)
+    if percent:
+        rate = float(percent.group(1))
+        yearly = re.search(r"p\.?\s?a\.?|per annum|annual|per year|yearly", value, re.IGNORECASE)
+        return {"monthly_rate_pct": rate / 12 if yearly else rate}
+    amount = parse_amount(value)
+    if amount is None:
+        return {}
+    if re.search(r"per day|a day|daily", value, re.IGNORECASE):
+        return {"per_day": amount}
+    return {"fixed": amount}
+
+
+def extract_terms(entities: dict) -> dict:
+    """Scenario inputs (rent, deposit, lock-in, notice, principal, rates...) from parsed key entities."""
+    terms = {}
+    for label, value in entities.items():
+        for term, pattern in _TERM_RULES:
+            if term in terms or not re.search(pattern, label, re.IGNORECASE):
+                continue
+            if term == "penalty":
+                parsed = _parse_penalty(value)
+            elif term in ("annual_rate", "prepayment_fee_pct"):
+                match = re.search(r"(\d+(?:\.\d+)?)\s*%", value)
+                parsed = float(match.group(1)) if match else None
+            elif term.endswith("_months"):
+                parsed = parse_months(value)
+            else:
+                parsed = parse_amount(value)
+            if parsed:
+                terms[term] = parsed
+                break
+    return terms
+
+
+def simulate_rental(terms: dict, grids: dict) -> dict:
+    rent, deposit = terms["rent"], terms.get("deposit", 0.0)
+    term_months = int(terms.get("term_months") or 11)
+    lock_in, notice = terms.get("lock_in_months", 0.0), terms.get("notice_months", 1.0)
+    penalty = terms.get("penalty", {})
+    results = {}
+
+    if "late_payment" in grids:
+        months_late = np.asarray(grids["late_payment"]["months_late"], dtype=float)
+        charge = (rent * penalty.get("monthly_rate_pct", 0.0) / 100 * months_late
+                  + penalty.get("per_day", 0.0) * 30 * months_late
+                  + penalty.get("fixed", 0.0) * (months_late > 0))
+        # unpaid rent keeps accumulating while the tenant stays on
+        dues = rent * months_late + charge
+        results["late_payment"] = [
+            {"months_late": int(m), "late_charges": round(float(c), 2), "total_dues": round(float(d), 2),
+             "exceeds_deposit": bool(d > deposit)}
+            for m, c, d in zip(months_late, charge, dues)
+        ]
+
+    if "early_exit" in grids:
+        exit_month = np.asarray(grids["early_exit"]["exit_month"] or range(1, term_months + 1), dtype=float)
+        # leaving inside the lock-in usually means paying rent for the rest of it; short notice is paid in lieu
+        lock_in_charge = rent * np.clip(lock_in - exit_month, 0, None)
+        payable = lock_in_charge + rent * notice * (exit_month < term_months)
+        refund = np.clip(deposit - payable, 0, None)
+        results["early_exit"] = [
+            {"exit_month": int(m), "lock_in_charge": round(float(l), 2), "payable_without_notice": round(float(p), 2),
+             "deposit_refund": round(float(r), 2), "owed_beyond_deposit": round(float(max(p - deposit, 0)), 2)}
+            for m, l, p, r in zip(exit_month, lock_in_charge, payable, refund)
+        ]
+    return results
+
+
+def simulate_loan(terms: dict, grids: dict) -> dict:
+    principal, annual_rate = terms["principal"], terms["annual_rate"]
+    months = int(terms.get("term_months") or 12)
+    r = annual_rate / 1200
+    payment = float(emi(principal, annual_rate, months))
+    penalty = terms.get("penalty", {})
+    fee_pct = terms.get("prepayment_fee_pct", 0.0)
+    results = {"emi": round(payment, 2)}
+
+    def balance_after(k):
+        k = np.asarray(k, dtype=float)
+        if r == 0:
+            return np.clip(principal - payment * k, 0, None)
+        return np.clip(principal * (1 + r) ** k - payment * ((1 + r) ** k - 1) / r, 0, None)
+
+    if "late_payment" in grids:
+        months_late = np.asarray(grids["late_payment"]["months_late"], dtype=float)
+        # one missed EMI carried for N months
+        charge = (payment * penalty.get("monthly_rate_pct", 0.0) / 100 * months_late
+                  + penalty.get("per_day", 0.0) * 30 * months_late
+                  + penalty.get("fixed", 0.0) * (months_late > 0))
+        results["late_payment"] = [
+            {"months_late": int(m), "penalty": round(float(c), 2), "overdue_total": round(float(payment + c), 2)}
+            for m, c in zip(months_late, charge)
+        ]
+
+    if "early_exit" in grids:
+        exit_month = np.asarray(grids["early_exit"]["exit_month"] or range(1, months), dtype=float)
+        outstanding = balance_after(exit_month)
+        fee = outstanding * fee_pct / 100
+        interest_saved = payment * (months - exit_month) - outstanding - fee
+        results["early_exit"] = [
+            {"exit_month": int(m), "foreclosure_amount": round(float(o + f), 2), "fee": round(float(f), 2),
+             "net_interest_saved": round(float(s), 2)}
+            for m, o, f, s in zip(exit_month, outstanding, fee, interest_saved)
+        ]
+
+    if "prepay" in grids:
+        grid = grids["prepay"]
+        month = np.asarray(grid["month"], dtype=float)[None, :]
+        balance = balance_after(month)
+        if "amount" in grid:
+            amount = np.asarray(grid["amount"], dtype=float)[:, None]
+        else:
+            amount = principal * np.asarray(grid["amount_pct"], dtype=float)[:, None] / 100
+        amount = np.minimum(amount, balance)
+        new_balance = balance - amount
+        fee = amount * fee_pct / 100
+        # keep the EMI and shorten the loan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if r == 0:
+                remaining = new_balance / payment
+            else:
+                remaining = -np.log(1 - new_balance * r / payment) / np.log(1 + r)
+        remaining = np.nan_to_num(remaining)
+        interest_before = payment * (months - month) - balance
+        interest_after = payment * remaining - new_balance
+        results["prepay"] = [
+            {"amount": round(float(amount[i, j]), 2), "month": int(month[0, j]), "fee": round(float(fee[i, j]), 2),
+             "months_saved": round(float(months - month[0, j] - remaining[i, j]), 1),
+             "net_interest_saved": round(float(interest_before[0, j] - interest_after[i, j] - fee[i, j]), 2)}
+            for i in range(amount.shape[0]) for j in range(month.shape[1])
+        ]
+    return results
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value)
+
+
+def _check_grid(name: str, axis: str, values):
+    if not isinstance(values, list) or len(values) > SIMULATION_MAX_GRID_VALUES:
+        raise ValueError(f"{name}.{axis} must be a list of at most {SIMULATION_MAX_GRID_VALUES} values")
+    for value in values:
+        if not _is_number(value) or value < 0:
+            raise ValueError(f"{name}.{axis} values must be non-negative numbers, got {value!r}")
+        if axis in _MONTH_AXES and (value != int(value) or (axis != "months_late" and value < 1)):
+            raise ValueError(f"{name}.{axis} values must be whole months, got {value!r}")
+
+
+def _check_overrides(overrides: dict):
+    for term, value in overrides.items():
+        if term == "penalty":
+            if not isinstance(value, dict) or not all(_is_number(v) and v >= 0 for v in value.values()):
+                raise ValueError("overrides.penalty must map charge kinds to non-negative numbers")
+        elif not _is_number(value) or value < 0 or (term == "term_months" and value < 1):
+            raise ValueError(f"overrides.{term} must be a non-negative number, got {value!r}")
+
+
+def _fit_loan_months(grids: dict, scenarios: dict, months: int):
+    """
+    Exit and prepayment months must fall inside the loan, [1, months): supplied ones
+    outside it are rejected, defaults outside it (prepaying at 24 on a 12-month loan)
+    are dropped.
+    """
+    for name, axis in (("early_exit", "exit_month"), ("prepay", "month")):
+        if grids.get(name, {}).get(axis) is None:
+            continue
+        supplied = (scenarios.get(name) or {}).get(axis)
+        if supplied is not None and any(not 1 <= m < months for m in supplied):
+            raise ValueError(f"{name}.{axis} must be between 1 and {months - 1} for a {months}-month loan")
+        grids[name][axis] = [m for m in grids[name][axis] if 1 <= m < months]
+
+
+def simulate(key_entities: str, scenarios: dict = None, overrides: dict = None) -> dict:
+    """
+    Runs what-if scenarios over the terms found in Stage 0's key entities.
+    `scenarios` maps 'late_payment', 'early_exit' and 'prepay' (loans only) to their
+    grids (see DEFAULT_GRIDS); `overrides` replaces any extracted term. Each grid is
+    evaluated in one NumPy pass. Returns the terms used, the contract kind and one
+    result row per grid point, or 'missing' when the required terms weren't found.
+    """
+    if not isinstance(key_entities, str):
+        raise ValueError("key_entities must be a string")
+    if not isinstance({} if scenarios is None else scenarios, dict) or not isinstance({} if overrides is None else overrides, dict):
+        raise ValueError("scenarios and overrides must be objects")
+    _check_overrides(overrides or {})
+    terms = {**extract_terms(parse_key_entities(key_entities)), **(overrides or {})}
+    grids = {name: {**DEFAULT_GRIDS[name], **(grid or {})} for name, grid in (scenarios or DEFAULT_GRIDS).items() if name in DEFAULT_GRIDS}
+    for name, grid in grids.items():
+        for axis, values in grid.items():
+            if values is not None:
+                _check_grid(name, axis, values)
+
+    if terms.get("principal") and terms.get("annual_rate"):
+        _fit_loan_months(grids, scenarios or {}, int(terms.get("term_months") or 12))
+        kind, results = "loan", simulate_loan(terms, grids)
+    elif terms.get("rent"):
+        grids.pop("prepay", None)
+        kind, results = "rental", simulate_rental(terms, grids)
+    else:
+        return {"terms": terms, "missing": ["rent, or principal and annual_rate"]}
+    return {"kind": kind, "terms": terms, "scenarios": results}
@@ -0,0 +1,113 @@
+import json
+import queue
+import threading
+import time
+
+from flask import Response, stream_with_context
+
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+_DONE = object()
+
+
+def format_event(name: str, data, fmt: str = "ndjson") -> str:
+    """One event as an SSE frame or an NDJSON line."""
+    if fmt == "sse":
+        return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return json.dumps({"event": name, "data": data}, ensure_ascii=False) + "\n"
+
+
+def stream_response(events, fmt: str = "ndjson") -> Response:
+    """Wraps an iterator of (name, data) pairs in a streaming Flask response."""
+    def generate():
+        try:
+            for name, data in events:
+                yield format_event(name, data, fmt)
+        finally:
+            # on a client disconnect, pass the close on instead of leaving it to garbage collection
+            if hasattr(events, "close"):
+                events.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=STREAM_FORMATS.get(fmt, STREAM_FORMATS["ndjson"]),
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def iter_events(run, cancel_event: threading.Event = None):
+    """
+    Runs `run(emit)` on a background thread and yields every (name, data) it emits,
+    as it emits them. If `run` raises, an ('error', {...}) event is yielded last.
+    If the consumer closes the generator early (the client disconnected),
+    `cancel_event` is set so `run` can stop work that hasn't started yet.
+    """
+    events = queue.Queue()
+
+    def worker():
+        try:
+            run(lambda name, data: events.put((name, data)))
+        except Exception as e:
+            print(f"❌ error in streamed job: {e}")
+            events.put(("error", {"error": str(e)}))
+        finally:
+            events.put(_DONE)
+
+    threading.Thread(target=worker, daemon=True).start()
+    try:
+        while True:
+            item = events.get()
+            if item is _DONE:
+                return
+            yield item
+    except GeneratorExit:
+        if cancel_event is not None:
+            cancel_event.set()
+        raise
+
+
+def stream_generation(model, prompt: str, on_complete=None):
+    """
+    Yields ('token', {'text': ...}) for each chunk as `model` generates it, then
+    ('done', {...}) with token counts and latencies, or ('error', {...}).
+
+    When the client disconnects the WSGI server closes this generator; the
+    upstream stream is closed with it, so generation stops instead of running
+    to the end. `on_complete(answer)` is only called for a finished answer.
+    """
+    start = time.perf_counter()
+    first_token_ms = None
+    parts, usage = [], None
+    responses = None
+    try:
+        responses = model.generate_content(prompt, stream=True)
+        for chunk in responses:
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            try:
+                text = chunk.text
+            except ValueError:
+                # chunks without text (e.g. only a finish reason or a safety block)
+                continue
+            if not text:
+                continue
+            if first_token_ms is None:
+                first_token_ms = round((time.perf_counter() - start) * 1000)
+            parts.append(text)
+            yield "token", {"text": text}
+    except Exception as e:
+        print(f"❌ error during streamed generation: {e}")
+        yield "error", {"error": "Could not generate a response."}
+        return
+    finally:
+        if hasattr(responses, "close"):
+            responses.close()
+
+    answer = "".join(parts).strip()
+    if on_complete:
+        on_complete(answer)
+    yield "done", {
+        "prompt_tokens": getattr(usage, "prompt_token_count", None),
+        "output_tokens": getattr(usage, "candidates_token_count", None),
+        "total_tokens": getattr(usage, "total_token_count", None),
+        "time_to_first_token_ms": first_token_ms,
+        "latency_ms": round((time.perf_counter() - start) * 1000),
+    }
@@ -0,0 +1,24 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# set before main is imported: load models only on first use, and keep the job store out of the tree
+os.environ.setdefault("RESOURCE_WARMUP", "lazy")
+os.environ.setdefault("JOB_STORE_PATH", os.path.join(tempfile.mkdtemp(prefix="legal-analyzer-tests-"), "jobs.db"))
+
+
+@pytest.fixture(scope="session")
+def main_module():
+    for module in ("flask", "flask_cors", "dotenv", "pypdf"):
+        pytest.importorskip(module)
+    import main
+    return main
+
+
+@pytest.fixture
+def client(main_module):
+    return main_module.app.test_client()
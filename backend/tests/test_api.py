@@ -0,0 +1,85 @@
+import io
+import json
+import tempfile
+
+import pytest
+
+LOAN_SUMMARY = "The borrower takes a loan of Rs. 5,00,000 at 14% per annum, repayable in 36 equated monthly instalments."
+
+
+@pytest.mark.parametrize("body", [
+    {"offers": [{"lender": "x"}]},
+    {"tenures": ["12"]},
+    {"tenures": [0, 12]},
+    {"offers": [{"lender": "x", "annual_rate": -3}]},
+])
+def test_loan_comparison_rejects_bad_offers_and_tenures(client, body):
+    response = client.post('/loan_comparison', json={"summary": LOAN_SUMMARY, **body})
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_loan_comparison_rejects_a_missing_summary(client):
+    assert client.post('/loan_comparison', json={"summary": 5}).status_code == 400
+    assert client.post('/loan_comparison', json=[1, 2]).status_code == 400
+
+
+def test_loan_comparison_prices_valid_offers(client):
+    response = client.post('/loan_comparison', json={
+        "summary": LOAN_SUMMARY, "offers": [{"lender": "x", "annual_rate": 0}], "tenures": [1, 12]})
+    assert response.status_code == 200
+    # strict JSON: no Infinity or NaN anywhere in the body
+    body = json.loads(response.get_data(as_text=True), parse_constant=lambda name: pytest.fail(f"{name} in response"))
+    assert body["tenure_scenarios"]["tenures"] == [1, 12, 36]
+    assert body["offers"][0]["total_interest"] == 0
+
+
+def test_simulate_rejects_exit_months_beyond_the_loan(client):
+    key_entities = "* Loan Amount: Rs. 5,00,000\n* Interest Rate: 12% p.a.\n* Tenure: 24 months"
+    response = client.post('/simulate', json={"key_entities": key_entities, "scenarios": {"early_exit": {"exit_month": [30]}}})
+    assert response.status_code == 400
+    response = client.post('/simulate', json={"key_entities": key_entities, "scenarios": {"prepay": {"amount": [1], "month": [30]}}})
+    assert response.status_code == 400
+    response = client.post('/simulate', json={"key_entities": key_entities, "scenarios": {"early_exit": {"exit_month": [12]}}})
+    assert response.status_code == 200 and response.get_json()["scenarios"]["early_exit"][0]["net_interest_saved"] > 0
+
+
+@pytest.mark.parametrize("key_entities", [123, ["* Rent: Rs. 10,000"], {"rent": 10000}])
+def test_simulate_rejects_non_text_key_entities(client, key_entities):
+    response = client.post('/simulate', json={"key_entities": key_entities})
+    assert response.status_code == 400 and "key_entities" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("path", ['/analyze', '/analyze/stream', '/analyze/jobs'])
+def test_unknown_cache_modes_are_rejected(client, path):
+    response = client.post(path, json={"text": "This rental agreement is made between...", "cache": "always"})
+    assert response.status_code == 400
+    assert "cache" in response.get_json()["error"]
+
+
+def test_unknown_cache_mode_is_rejected_for_uploads(client):
+    response = client.post('/analyze/file', data={"file": (io.BytesIO(b"%PDF-1.4\n"), "lease.pdf"), "cache": "sometimes"})
+    assert response.status_code == 400
+
+
+def test_uploads_are_removed_when_the_client_leaves_before_the_stream_starts(client, main_module, monkeypatch, tmp_path):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    # a stream that is closed before its worker ever calls run(), as when the client leaves first
+    monkeypatch.setattr(main_module, "iter_events", lambda run, cancel_event=None: iter([("started", {})]))
+    response = client.post('/analyze/file?format=ndjson', data={"file": (io.BytesIO(b"%PDF-1.4\n"), "lease.pdf")}, buffered=False)
+    assert response.status_code == 200 and list(tmp_path.iterdir())
+    response.close()
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize("degraded, cached", [([], True), (["summary"], False), (["detailed_analysis"], False)])
+def test_degraded_analyses_are_not_cached(main_module, monkeypatch, degraded, cached):
+    text = f"Rental agreement {degraded}: the tenant shall pay rent of Rs. 20,000 per month."
+    result = {"summary": "...", "detailed_analysis": [], "stage_timings": {}}
+    if degraded:
+        result["degraded_stages"] = degraded
+    monkeypatch.setattr(main_module, "detect_contract_type", lambda document_text: "rental")
+    monkeypatch.setattr(main_module, "analyze_contract", lambda *args, **kwargs: dict(result, stage_timings={}))
+    response = main_module.run_analysis(text)
+    assert response["degraded_stages" if degraded else "summary"]
+    assert (main_module.analysis_cache.get(main_module.analysis_cache_key(text)) is not None) == cached
@@ -0,0 +1,135 @@
+import json
+
+import numpy as np
+import pytest
+
+from batching import CLAUSE_MARKER, build_batch_prompt, estimate_tokens, pack_clause_batches, parse_batch_response
+
+TEMPLATE = ("You are a legal risk analyzer.\nReturn keys risk_level, risk_explanation, actionable_advice, clause_category.\n\n"
+            "**User's Clause to Analyze:**\n\"\"\"{chunk}\"\"\"\n\n**Expert Context from Knowledge Base:**\n{similar_clauses_context}\n")
+
+
+def analysis(index, risk="Green"):
+    return {"clause_index": index, "risk_level": risk, "risk_explanation": "Standard.", "actionable_advice": "None.",
+            "clause_category": "Rent"}
+
+
+def entries(count, chunk_chars=400, context_chars=400):
+    return [(i, "c" * chunk_chars, "x" * context_chars) for i in range(count)]
+
+
+def test_a_well_formed_reply_covers_every_clause():
+    reply = "```json\n" + json.dumps([analysis(0), analysis(1, "Red")]) + "\n```"
+    parsed = parse_batch_response(reply, [0, 1])
+    assert sorted(parsed) == [0, 1] and parsed[1]["risk_level"] == "Red" and "clause_index" not in parsed[0]
+
+
+def test_an_array_inside_prose_is_found():
+    assert sorted(parse_batch_response("Here you go:\n" + json.dumps([analysis(3)]) + "\nThanks!", [3])) == [3]
+
+
+@pytest.mark.parametrize("reply", ["not json at all", "[{\"clause_index\": 0,", json.dumps(analysis(0)), json.dumps("text")])
+def test_malformed_replies_parse_to_nothing(reply):
+    assert parse_batch_response(reply, [0]) == {}
+
+
+def test_bad_sections_are_left_for_single_clause_calls():
+    incomplete = analysis(1)
+    del incomplete["actionable_advice"]
+    items = [analysis(0), incomplete, analysis(2), analysis(2, "Red"), analysis(9), {"clause_index": "x"}, "stray", analysis(4)]
+    # 1 lacks a key, 2 is duplicated, 3 is missing, 9 wasn't asked for
+    assert sorted(parse_batch_response(json.dumps(items), [0, 1, 2, 3, 4])) == [0, 4]
+
+
+def test_batches_stay_within_the_token_budget():
+    batch_entries = entries(20)
+    batches = pack_clause_batches(batch_entries, TEMPLATE, token_budget=1000, max_batch_size=50)
+    assert [entry for batch in batches for entry in batch] == batch_entries
+    assert len(batches) > 1 and all(len(batch) > 1 for batch in batches[:-1])
+    assert all(estimate_tokens(build_batch_prompt(TEMPLATE, batch)) <= 1000 for batch in batches)
+
+
+def test_an_oversized_clause_gets_a_batch_of_its_own():
+    batch_entries = entries(2) + [(2, "c" * 8000, "x" * 400)] + [(3, "c" * 400, "x" * 400)]
+    batches = pack_clause_batches(batch_entries, TEMPLATE, token_budget=1000)
+    assert [[entry[0] for entry in batch] for batch in batches] == [[0, 1], [2], [3]]
+
+
+def test_max_batch_size_caps_k():
+    batches = pack_clause_batches(entries(10, 10, 10), TEMPLATE, token_budget=100000, max_batch_size=4)
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+
+@pytest.mark.parametrize("count, min_batches, sizes", [
+    (24, 8, [3] * 8),
+    (20, 8, [3] * 6 + [2]),
+    (8, 8, [1] * 8),
+    (5, 8, [1] * 5),
+    (24, 1, [12, 12]),
+])
+def test_min_batches_caps_k_to_keep_workers_busy(count, min_batches, sizes):
+    batches = pack_clause_batches(entries(count, 10, 10), TEMPLATE, token_budget=100000, max_batch_size=12, min_batches=min_batches)
+    assert [len(batch) for batch in batches] == sizes
+
+
+class Embedder:
+    def encode(self, texts, **kwargs):
+        return np.random.default_rng(len(texts)).normal(size=(len(texts), 8))
+
+
+class Index:
+    def query_many(self, vectors, top_k=4, include_values=False):
+        return [[] for _ in vectors]
+
+
+class Generator:
+    """Answers batch prompts with a reply that drops or garbles some clauses, and single prompts in full."""
+
+    def __init__(self, batch_reply):
+        self.batch_reply = batch_reply
+        self.batch_prompts, self.single_prompts = [], []
+
+    def generate_content(self, prompt):
+        if "### Clause" in prompt:
+            self.batch_prompts.append(prompt)
+            indices = [int(line.split()[-1]) for line in prompt.splitlines() if line.startswith("### Clause")]
+            text = self.batch_reply(indices)
+        else:
+            if CLAUSE_MARKER in prompt:
+                self.single_prompts.append(prompt)
+            text = json.dumps({key: value for key, value in analysis(0, "Yellow").items() if key != "clause_index"})
+        return type("Response", (), {"text": text})()
+
+
+def run_batched(main_module, monkeypatch, batch_reply, clauses=6, workers=2):
+    from cache import ClauseCache
+
+    generator = Generator(batch_reply)
+    monkeypatch.setattr(main_module, "CLAUSE_BATCH_MODE", True)
+    monkeypatch.setattr(main_module, "CLAUSE_ANALYSIS_MAX_WORKERS", workers)
+    monkeypatch.setattr(main_module, "embedding_model", Embedder())
+    monkeypatch.setattr(main_module, "generation_model", generator)
+    monkeypatch.setattr(main_module, "clause_cache", ClauseCache())
+    text = "\n".join(f"{i + 1}. The Tenant shall keep fixture number {i} of the premises in good repair." for i in range(clauses))
+    result = main_module.process_contract(text, main_module.rental_summary_prompt, main_module.rental_analysis_prompt, Index(), "rental")
+    return generator, result
+
+
+def test_clauses_missing_from_a_batch_reply_are_sent_singly(main_module, monkeypatch):
+    # every batch answers only its first clause
+    generator, result = run_batched(main_module, monkeypatch, lambda indices: json.dumps([analysis(indices[0], "Red")]))
+    assert len(generator.batch_prompts) == 2 and len(generator.single_prompts) == 4
+    risks = [item["analysis"]["risk_level"] for item in result["detailed_analysis"]]
+    assert risks.count("Red") == 2 and risks.count("Yellow") == 4
+
+
+def test_a_malformed_batch_reply_falls_back_for_the_whole_batch(main_module, monkeypatch):
+    generator, result = run_batched(main_module, monkeypatch, lambda indices: "Sorry, I can't help with that.")
+    assert len(generator.batch_prompts) == 2 and len(generator.single_prompts) == 6
+    assert len(result["detailed_analysis"]) == 6
+
+
+def test_no_more_clauses_than_workers_skips_batching(main_module, monkeypatch):
+    generator, result = run_batched(main_module, monkeypatch, lambda indices: json.dumps([analysis(i) for i in indices]),
+                                    clauses=4, workers=4)
+    assert not generator.batch_prompts and len(generator.single_prompts) == 4
@@ -0,0 +1,65 @@
+import numpy as np
+
+from cache import ClauseCache
+from revisions import material_terms
+
+RENT = "The Tenant shall pay a monthly rent of Rs. 20,000 on or before the fifth day of every month."
+
+
+def embedding(seed, noise=0.0):
+    vector = np.random.default_rng(0).normal(size=16)
+    return vector + noise * np.random.default_rng(seed).normal(size=16)
+
+
+def test_similar_clause_with_the_same_terms_is_reused():
+    cache = ClauseCache()
+    cache.add("rental", "k1", embedding(1), {"risk_level": "Green"}, material_terms(RENT))
+    reworded = RENT.replace("on or before", "by")
+    assert cache.get_similar("rental", embedding(2, 0.01), material_terms(reworded)) == {"risk_level": "Green"}
+
+
+def test_similar_clause_with_other_terms_is_a_miss():
+    cache = ClauseCache()
+    cache.add("rental", "k1", embedding(1), {"risk_level": "Green"}, material_terms(RENT))
+    assert cache.get_similar("rental", embedding(2, 0.01), material_terms(RENT.replace("20,000", "2,00,000"))) is None
+    assert cache.get_similar("rental", embedding(2, 0.01), material_terms(RENT.replace("the fifth day", "day 20"))) is None
+    assert cache.stats()["similar_hits"] == 0
+
+
+def test_the_most_similar_entry_with_matching_terms_wins():
+    cache = ClauseCache()
+    higher = RENT.replace("20,000", "25,000")
+    cache.add("rental", "k1", embedding(1), {"risk_level": "Yellow"}, material_terms(higher))
+    cache.add("rental", "k2", embedding(2, 0.05), {"risk_level": "Green"}, material_terms(RENT))
+    assert cache.get_similar("rental", embedding(1), material_terms(RENT)) == {"risk_level": "Green"}
+
+
+def test_dissimilar_clauses_are_a_miss():
+    cache = ClauseCache()
+    cache.add("rental", "k1", embedding(1), {"risk_level": "Green"}, material_terms(RENT))
+    assert cache.get_similar("rental", -embedding(1), material_terms(RENT)) is None
+    assert cache.get_similar("employment", embedding(1), material_terms(RENT)) is None
+
+
+def test_exact_misses_count_against_the_hit_ratio():
+    cache = ClauseCache()
+    cache.add("rental", "k1", embedding(1), {"risk_level": "Green"}, material_terms(RENT))
+    assert cache.get("k1") == {"risk_level": "Green"}
+    # a clause whose embedding failed is only looked up by key
+    assert cache.get("k2") is None
+    # a near-duplicate: key miss, then similar hit
+    assert cache.get("k3") is None and cache.get_similar("rental", embedding(3, 0.01), material_terms(RENT)) is not None
+    # a new clause: key miss, then similar miss
+    assert cache.get("k4") is None and cache.get_similar("rental", -embedding(1), material_terms(RENT)) is None
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["exact_misses"], stats["similar_hits"], stats["misses"]) == (1, 3, 1, 1)
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_max_entries_applies_to_each_namespace():
+    cache = ClauseCache(max_entries=3)
+    for namespace in ("rental", "loan"):
+        for i in range(5):
+            cache.add(namespace, f"{namespace}{i}", embedding(i, 1.0), {"clause": i})
+    assert cache.stats()["entries"] == 6
+    assert cache.get("rental0") is None and cache.get("rental4") == {"clause": 4} and cache.get("loan2") == {"clause": 2}
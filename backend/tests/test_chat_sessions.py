@@ -0,0 +1,80 @@
+import time
+
+import numpy as np
+import pytest
+
+from chat_context import ClauseIndex
+from chat_sessions import ChatSessionStore
+
+
+def make_index(clauses=3, dim=8):
+    return ClauseIndex([f"- Clause: \"clause {i}\"" for i in range(clauses)], np.ones((clauses, dim), dtype=np.float32))
+
+
+def test_the_oldest_session_is_evicted_past_max_sessions():
+    store = ChatSessionStore(max_sessions=2)
+    first, second = store.create("a", make_index()), store.create("b", make_index())
+    store.get(first.id)  # touching it makes `second` the least recently used
+    third = store.create("c", make_index())
+    assert store.get(second.id) is None
+    assert store.get(first.id) is first and store.get(third.id) is third
+    assert store.stats()["evicted"] == 1 and store.stats()["sessions"] == 2
+
+
+def test_long_histories_are_evicted_past_max_bytes():
+    store = ChatSessionStore(max_bytes=1000)
+    old, new = store.create("summary", make_index()), store.create("summary", make_index())
+    store.record_turn(old, "question " * 20, "answer " * 60)
+    assert store.stats()["sessions"] == 2
+    store.record_turn(new, "question " * 20, "answer " * 60)
+    assert store.get(old.id) is None and store.get(new.id) is new
+
+
+def test_the_newest_session_is_kept_even_when_oversized():
+    store = ChatSessionStore(max_bytes=10)
+    session = store.create("a summary longer than ten bytes", make_index())
+    assert store.get(session.id) is session and store.stats()["evicted"] == 0
+
+
+def test_a_shared_clause_index_is_not_counted_per_session():
+    index = make_index(clauses=200, dim=384)
+    store = ChatSessionStore(max_bytes=10_000)
+    sessions = [store.create("summary", index) for _ in range(5)]
+    assert all(store.get(session.id) is session for session in sessions)
+    assert store.stats()["bytes"] == 5 * len("summary")
+
+
+def test_idle_sessions_expire():
+    store = ChatSessionStore(ttl_seconds=60)
+    session = store.create("summary", make_index())
+    session.last_used = time.time() - 61
+    assert store.get(session.id) is None and store.stats()["expired"] == 1
+
+
+def test_the_summary_cut_point_does_not_depend_on_the_question(main_module, monkeypatch):
+    class ContextIndex:
+        def embed_question(self, question):
+            return np.ones(8, dtype=np.float32)
+
+    monkeypatch.setattr(main_module, "chat_context_index", ContextIndex())
+    summary = " ".join(f"point{i}" for i in range(5000))
+
+    def summary_in(prompt):
+        return prompt.split("**Contract Summary:**")[1].split("**Most Relevant Clause Analyses:**")[0].strip()
+
+    short = main_module.build_chatbot_prompt(summary, make_index(), "Deposit?")
+    long = main_module.build_chatbot_prompt(summary, make_index(), "Can the landlord keep my deposit " * 20)
+    assert summary_in(short) == summary_in(long) != summary
+    assert main_module.estimate_tokens(long) <= main_module.CHAT_MAX_PROMPT_TOKENS
+
+
+@pytest.mark.parametrize("turns", [0, 3])
+def test_the_prompt_stays_within_budget_with_history(main_module, monkeypatch, turns):
+    class ContextIndex:
+        def embed_question(self, question):
+            return np.ones(8, dtype=np.float32)
+
+    monkeypatch.setattr(main_module, "chat_context_index", ContextIndex())
+    history = [("What is the rent? " * 30, "Rs. 20,000 per month. " * 60)] * turns
+    prompt = main_module.build_chatbot_prompt("summary " * 3000, make_index(clauses=50), "Notice period?", history)
+    assert main_module.estimate_tokens(prompt) <= main_module.CHAT_MAX_PROMPT_TOKENS
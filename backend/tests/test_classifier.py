@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+import classifier
+from classifier import classify_contract
+
+RENTAL = ("This rental agreement is made between the landlord and the tenant. The tenant shall pay "
+          "monthly rent and a security deposit for the premises.")
+# one rental and one employment keyword: the keywords alone can't decide
+AMBIGUOUS = "The parties agree to the premises described herein and the salary."
+
+
+class Embedder:
+    """One-hot by topic word, so a document sits on the centroid of its type."""
+
+    TOPICS = [("loan", 2), ("employ", 1), ("salary", 1)]
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    def _vector(self, text):
+        vector = np.zeros(3, dtype=np.float32)
+        vector[next((axis for word, axis in self.TOPICS if word in text.lower()), 0)] = 1.0
+        return vector
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("embedding model unavailable")
+        if isinstance(texts, str):
+            return self._vector(texts)
+        return np.stack([self._vector(text) for text in texts])
+
+
+class Generator:
+    def __init__(self, answer):
+        self.answer, self.prompts = answer, []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return type("Response", (), {"text": self.answer})()
+
+
+@pytest.fixture(autouse=True)
+def fresh_centroids(monkeypatch):
+    # centroids are cached by id(embedding_model), which a new fake can reuse
+    monkeypatch.setattr(classifier, "_centroids", {})
+
+
+def test_decisive_keywords_skip_the_embedding():
+    embedder = Embedder()
+    label, confidence = classify_contract(RENTAL, embedder)
+    assert label == "rental" and confidence >= classifier.CONTRACT_CLASSIFIER_DECISIVE_CONFIDENCE
+    assert embedder.calls == 0
+
+
+def test_the_centroids_decide_when_the_keywords_are_split():
+    assert classify_contract(AMBIGUOUS)[1] < classifier.CONTRACT_CLASSIFIER_MIN_CONFIDENCE
+    embedder = Embedder()
+    label, confidence = classify_contract(AMBIGUOUS, embedder)
+    assert label == "employment" and confidence > classify_contract(AMBIGUOUS)[1]
+    assert embedder.calls > 0
+
+
+def test_documents_without_keywords_are_unknown():
+    assert classify_contract("A poem about the sea.", Embedder()) == ("unknown", 0.0)
+
+
+def test_a_confident_local_answer_skips_the_llm(main_module, monkeypatch):
+    generator = Generator("loan")
+    monkeypatch.setattr(main_module, "embedding_model", Embedder())
+    monkeypatch.setattr(main_module, "generation_model", generator)
+    assert main_module.detect_contract_type(RENTAL) == "rental" and not generator.prompts
+
+
+def test_an_unsure_local_answer_asks_the_llm(main_module, monkeypatch):
+    generator = Generator("Loan")
+    monkeypatch.setattr(main_module, "embedding_model", Embedder())
+    monkeypatch.setattr(main_module, "generation_model", generator)
+    monkeypatch.setattr(main_module, "CONTRACT_CLASSIFIER_MIN_CONFIDENCE", 0.99)
+    assert main_module.detect_contract_type(AMBIGUOUS) == "loan" and len(generator.prompts) == 1
+
+
+def test_a_failing_embedding_falls_back_to_the_llm(main_module, monkeypatch):
+    generator = Generator("employment")
+    monkeypatch.setattr(main_module, "embedding_model", Embedder(fail=True))
+    monkeypatch.setattr(main_module, "generation_model", generator)
+    assert main_module.detect_contract_type(AMBIGUOUS) == "employment" and len(generator.prompts) == 1
+    # decisive keywords never touch the broken model
+    assert main_module.detect_contract_type(RENTAL) == "rental" and len(generator.prompts) == 1
@@ -0,0 +1,48 @@
+import numpy as np
+
+from dedup import ChunkDeduplicator
+
+CLAUSE = ("The Tenant shall pay to the Landlord a monthly rent of Rs. 25,000 on or before the fifth day of every "
+          "English calendar month, and shall pay the charges for electricity and water consumed in the premises "
+          "as per the bills raised by the authorities, without any delay or demur whatsoever, for a period of "
+          "eleven months from the date of this agreement, which may be renewed by mutual consent of the parties.")
+
+
+def test_copies_are_exact_duplicates():
+    dedup = ChunkDeduplicator()
+    dedup.add("a_c0", "a.pdf", CLAUSE)
+    assert dedup.find("  " + CLAUSE.upper()) == ("exact", "a_c0")
+
+
+def test_a_reworded_copy_with_the_same_terms_is_a_near_duplicate():
+    dedup = ChunkDeduplicator()
+    dedup.add("a_c0", "a.pdf", CLAUSE)
+    assert dedup.find(CLAUSE.replace("Tenant", "Lessee", 1).replace("whatsoever", "at all")) == ("near", "a_c0")
+
+
+def test_a_filled_in_template_with_other_terms_is_kept():
+    dedup = ChunkDeduplicator()
+    dedup.add("a_c0", "a.pdf", CLAUSE)
+    assert dedup.find(CLAUSE.replace("25,000", "40,000")) == (None, None)
+    assert dedup.find(CLAUSE.replace("eleven months", "twenty months")) == (None, None)
+
+
+def test_terms_survive_a_save_and_load(tmp_path):
+    dedup = ChunkDeduplicator()
+    dedup.add("a_c0", "a.pdf", CLAUSE)
+    dedup.save(str(tmp_path / "state.npz"))
+    loaded = ChunkDeduplicator.load(str(tmp_path / "state.npz"))
+    assert loaded.find(CLAUSE.replace("whatsoever", "at all")) == ("near", "a_c0")
+    assert loaded.find(CLAUSE.replace("25,000", "40,000")) == (None, None)
+
+
+def test_state_without_terms_only_matches_copies(tmp_path):
+    dedup = ChunkDeduplicator()
+    dedup.add("a_c0", "a.pdf", CLAUSE)
+    dedup.save(str(tmp_path / "state.npz"))
+    data = dict(np.load(str(tmp_path / "state.npz")))
+    del data["terms"]
+    np.savez(str(tmp_path / "old.npz"), **data)
+    loaded = ChunkDeduplicator.load(str(tmp_path / "old.npz"))
+    assert loaded.find(CLAUSE) == ("exact", "a_c0")
+    assert loaded.find(CLAUSE.replace("whatsoever", "at all")) == (None, None)
@@ -0,0 +1,38 @@
+"""
+Retrieval accuracy of the faster embedding backends against the fp32 torch vectors
+the indexes hold. Needs torch and sentence-transformers (and optimum[onnxruntime]
+for the ONNX backends) plus the model weights; skipped otherwise.
+"""
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("sentence_transformers")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from bench_embedding_backends import MIN_OVERLAP, MODEL_NAME, reference_top_k, retrieval_overlap  # noqa: E402
+from embeddings import load_embedding_model  # noqa: E402
+
+TOP_K = 4
+
+
+@pytest.fixture(scope="module")
+def reference():
+    try:
+        return reference_top_k(200, TOP_K)
+    except OSError as e:  # weights not cached and no network
+        pytest.skip(f"{MODEL_NAME} unavailable: {e}")
+
+
+@pytest.mark.parametrize("backend", ["torch-int8", "onnx", "onnx-int8"])
+def test_backend_keeps_the_fp32_top_k(reference, backend):
+    if backend.startswith("onnx"):
+        # without optimum the loader quietly falls back to torch, which would pass trivially
+        pytest.importorskip("optimum.onnxruntime")
+    queries, corpus, corpus_fp32, expected = reference
+    index_overlap, self_overlap, _ = retrieval_overlap(load_embedding_model(MODEL_NAME, backend), queries, corpus,
+                                                       corpus_fp32, expected, TOP_K)
+    assert index_overlap >= MIN_OVERLAP
+    assert self_overlap >= MIN_OVERLAP
@@ -0,0 +1,123 @@
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from cache import make_cache_key
+from embedding_cache import KEY_BYTES, KEYS_FILE, VECTORS_FILE, CachedEmbeddingModel, EmbeddingStore
+
+DIM = 16
+
+
+def keys_for(texts):
+    return [make_cache_key(text) for text in texts]
+
+
+def vectors_for(count, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, DIM)).astype(np.float32)
+
+
+def test_vectors_round_trip_through_float16(tmp_path):
+    store = EmbeddingStore(str(tmp_path), DIM)
+    keys, vectors = keys_for(f"clause {i}" for i in range(50)), vectors_for(50)
+    assert store.add_many(keys, vectors) == 50
+    stored = np.stack(store.get_many(keys))
+    assert stored.dtype == np.float32
+    # float16 keeps 11 significant bits
+    assert np.allclose(stored, vectors, rtol=2 ** -10, atol=1e-4) and not np.array_equal(stored, vectors)
+    assert store.get_many(keys_for(["never stored"])) == [None]
+
+
+def test_a_reopened_store_serves_what_was_written(tmp_path):
+    keys, vectors = keys_for(f"clause {i}" for i in range(10)), vectors_for(10)
+    EmbeddingStore(str(tmp_path), DIM).add_many(keys, vectors)
+
+    reopened = EmbeddingStore(str(tmp_path), DIM)
+    assert len(reopened) == 10 and reopened.add_many(keys, vectors) == 0
+    assert np.allclose(np.stack(reopened.get_many(keys[::-1])), vectors[::-1], rtol=2 ** -10, atol=1e-4)
+
+    readonly = EmbeddingStore(str(tmp_path), DIM, readonly=True)
+    assert readonly.get_many(keys[:1])[0] is not None and readonly.add_many(keys_for(["new"]), vectors_for(1)) == 0
+    with pytest.raises(ValueError):
+        EmbeddingStore(str(tmp_path), DIM * 2)
+
+
+def test_the_store_grows_past_its_first_mapping(tmp_path):
+    store = EmbeddingStore(str(tmp_path), DIM)
+    first_keys, first = keys_for(f"first {i}" for i in range(5)), vectors_for(5, seed=1)
+    store.add_many(first_keys, first)
+    assert store.get_many(first_keys[:1])[0] is not None  # maps 5 rows
+
+    more_keys, more = keys_for(f"more {i}" for i in range(200)), vectors_for(200, seed=2)
+    assert store.add_many(more_keys, more) == 200
+    assert np.allclose(np.stack(store.get_many(more_keys)), more, rtol=2 ** -10, atol=1e-4)
+    assert np.allclose(np.stack(store.get_many(first_keys)), first, rtol=2 ** -10, atol=1e-4)
+    assert store.nbytes() == 205 * (DIM * 2 + KEY_BYTES)
+
+
+def test_writes_stop_at_max_bytes(tmp_path):
+    store = EmbeddingStore(str(tmp_path), DIM, max_bytes=10 * (DIM * 2 + KEY_BYTES))
+    assert store.add_many(keys_for(f"clause {i}" for i in range(25)), vectors_for(25)) == 10
+    assert len(EmbeddingStore(str(tmp_path), DIM)) == 10
+
+
+def _write(path, texts, seed, ready, go):
+    store = EmbeddingStore(path, DIM)
+    ready.set()
+    go.wait(10)
+    for start in range(0, len(texts), 7):
+        store.add_many(keys_for(texts[start:start + 7]), vectors_for(len(texts), seed)[start:start + 7])
+
+
+def test_two_writers_share_one_store(tmp_path):
+    path = str(tmp_path)
+    context = multiprocessing.get_context("fork")
+    shared = [f"shared {i}" for i in range(40)]
+    texts = [shared + [f"a {i}" for i in range(60)], shared + [f"b {i}" for i in range(60)]]
+    go = context.Event()
+    readies = [context.Event(), context.Event()]
+    writers = [context.Process(target=_write, args=(path, texts[w], w, readies[w], go)) for w in range(2)]
+    for writer in writers:
+        writer.start()
+    assert all(ready.wait(10) for ready in readies)
+    go.set()
+    for writer in writers:
+        writer.join(30)
+        assert writer.exitcode == 0
+
+    store = EmbeddingStore(path, DIM)
+    # each key written once, and the files agree on the row count
+    assert len(store) == 160
+    assert os.path.getsize(os.path.join(path, KEYS_FILE)) == 160 * KEY_BYTES
+    assert os.path.getsize(os.path.join(path, VECTORS_FILE)) == 160 * DIM * 2
+    for w in range(2):
+        own = texts[w][40:]
+        expected = vectors_for(100, w)[40:]
+        assert np.allclose(np.stack(store.get_many(keys_for(own))), expected, rtol=2 ** -10, atol=1e-4)
+    # a shared key holds one writer's vector in full, never a mix
+    stored = np.stack(store.get_many(keys_for(shared)))
+    candidates = [vectors_for(100, w)[:40] for w in range(2)]
+    assert all(any(np.allclose(row, c[i], rtol=2 ** -10, atol=1e-4) for c in candidates) for i, row in enumerate(stored))
+
+
+class Model:
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        self.encoded += len(texts)
+        return np.stack([vectors_for(1, seed=len(text))[0] for text in texts])
+
+
+def test_a_new_process_reads_vectors_from_disk(tmp_path):
+    texts = ["The Tenant shall pay rent.", "The Landlord shall repair the roof."]
+    first = CachedEmbeddingModel(Model(), "model", cache_dir=str(tmp_path))
+    vectors = first.encode(texts)
+
+    model = Model()
+    second = CachedEmbeddingModel(model, "model", cache_dir=str(tmp_path))
+    assert np.allclose(second.encode(texts), vectors, rtol=2 ** -10, atol=1e-4)
+    assert model.encoded == 0 and second.stats()["disk_hits"] == 2
+    # another backend is another namespace
+    assert CachedEmbeddingModel(Model(), "model", "onnx", cache_dir=str(tmp_path))._store() is None
@@ -0,0 +1,49 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+import embeddings
+from embeddings import encode_batch, load_embedding_model
+
+
+class SentenceTransformer:
+    """Stands in for sentence_transformers' class; ONNX weights are never available."""
+
+    def __init__(self, model_name, device=None, backend="torch", model_kwargs=None):
+        if backend == "onnx":
+            raise OSError("no ONNX weights for this model")
+        self.model_name = model_name
+
+    def encode(self, texts, **kwargs):
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def sentence_transformers(monkeypatch):
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = SentenceTransformer
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+
+
+def test_the_loaded_backend_is_recorded(sentence_transformers):
+    assert load_embedding_model("model", "torch").embedding_backend == "torch"
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_an_onnx_fallback_records_torch(sentence_transformers, backend):
+    assert load_embedding_model("model", backend).embedding_backend == "torch"
+
+
+def test_the_cache_namespace_follows_the_fallback(sentence_transformers, main_module, monkeypatch):
+    monkeypatch.setattr(embeddings, "EMBEDDING_BACKEND", "onnx")
+    monkeypatch.setattr(main_module, "EMBEDDING_BACKEND", "onnx")
+    model = main_module.load_cached_embedding_model()
+    assert model.namespace == f"{main_module.EMBEDDING_MODEL_NAME}:torch"
+
+
+def test_encode_batch_keeps_the_callers_order():
+    texts = ["a much longer clause", "short", "a medium clause"]
+    vectors = encode_batch(SentenceTransformer("model"), texts)
+    assert vectors[:, 0].tolist() == [len(text) for text in texts]
@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+ingest_kb = pytest.importorskip("ingest_kb")
+
+
+class FakeSink:
+    """An index that outlives the runs, like the real Pinecone one."""
+
+    def __init__(self):
+        self.vectors = {}
+        self.failing = set()  # sources whose upserts fail
+        self.upserts = 0
+
+    def upsert(self, records):
+        if any(r["metadata"]["source"] in self.failing for r in records):
+            raise ConnectionError("index unavailable")
+        self.upserts += 1
+        self.vectors.update({r["id"]: r["metadata"]["source"] for r in records})
+
+    def commit(self, source):
+        pass
+
+    def delete_stale(self, source, ids):
+        for chunk_id in ids:
+            self.vectors.pop(chunk_id, None)
+
+    def remove_document(self, source, ids):
+        self.delete_stale(source, ids)
+
+    def finish(self, manifest):
+        pass
+
+    def ids(self, source):
+        return sorted(chunk_id for chunk_id, owner in self.vectors.items() if owner == source)
+
+
+class FakeEmbedder:
+    def encode(self, texts, **kwargs):
+        return np.array([np.random.default_rng(zlib.crc32(t.encode())).normal(size=8) for t in texts], dtype=np.float32)
+
+    def stats(self):
+        return {}
+
+
+BROKEN = set()
+
+
+def fake_parse(path, chunk_size, chunk_overlap):
+    if path in BROKEN:
+        raise ValueError("not a PDF")
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return path, [{"id": f"{path}_p1_c{i}", "text": line, "metadata": {"source": path, "page": 1, "text": line}}
+                  for i, line in enumerate(text.splitlines())]
+
+
+@pytest.fixture
+def kb(tmp_path, monkeypatch):
+    sink = FakeSink()
+    monkeypatch.setattr(ingest_kb, "make_sink", lambda args: sink)
+    monkeypatch.setattr(ingest_kb, "load_embedder", FakeEmbedder)
+    monkeypatch.setattr(ingest_kb, "parse_document", fake_parse)
+    monkeypatch.setattr(ingest_kb.time, "sleep", lambda seconds: None)
+    BROKEN.clear()
+    docs = tmp_path / "docs"
+    docs.mkdir()
+
+    def write(name, lines):
+        (docs / name).write_text("\n".join(lines), encoding="utf-8")
+        return str(docs / name)
+
+    def run(*extra):
+        ingest_kb.main([str(docs), "--index", "test", "--out-dir", str(tmp_path / "out"), "--workers", "1",
+                        "--embed-batch", "1", "--batch-size", "2", "--upsert-workers", "1", *extra])
+
+    def manifest():
+        with open(tmp_path / "out" / "manifests" / "test.pinecone.json", encoding="utf-8") as f:
+            return json.load(f)
+
+    return sink, write, run, manifest
+
+
+def lines(name, count):
+    return [f"Clause {i} of the {name} agreement sets out obligation number {i} of the parties in full." for i in range(count)]
+
+
+def test_unchanged_documents_are_skipped(kb):
+    sink, write, run, manifest = kb
+    a, b = write("a.pdf", lines("lease", 3)), write("b.pdf", lines("loan", 2))
+    run()
+    upserts = sink.upserts
+    assert len(sink.ids(a)) == 3 and len(sink.ids(b)) == 2
+    run()
+    assert sink.upserts == upserts
+    assert {entry["status"] for entry in manifest()["documents"].values()} == {"done"}
+
+
+def test_a_crashed_run_resumes_with_the_unfinished_documents(kb):
+    sink, write, run, manifest = kb
+    a, b = write("a.pdf", lines("lease", 2)), write("b.pdf", lines("loan", 2))
+    sink.failing = {b}
+    with pytest.raises(SystemExit):
+        run()
+    assert manifest()["documents"][a]["status"] == "done" and manifest()["documents"][b]["status"] == "started"
+    sink.failing = set()
+    upserts = sink.upserts
+    run()
+    assert sink.upserts == upserts + 1  # only b's batch
+    assert manifest()["documents"][b]["status"] == "done" and len(sink.ids(b)) == 2
+
+
+def test_chunks_a_changed_document_no_longer_has_are_deleted(kb):
+    sink, write, run, manifest = kb
+    a = write("a.pdf", lines("lease", 4))
+    run()
+    write("a.pdf", lines("lease", 2))
+    run()
+    assert sink.ids(a) == [f"{a}_p1_c0", f"{a}_p1_c1"]
+    assert manifest()["documents"][a]["ids"] == sink.ids(a)
+
+
+@pytest.mark.parametrize("rerun", ["force", "config change"])
+def test_a_document_that_fails_to_parse_is_removed_and_retried(kb, tmp_path, rerun):
+    sink, write, run, manifest = kb
+    a, b = write("a.pdf", lines("lease", 3)), write("b.pdf", lines("loan", 2))
+    run()
+    BROKEN.add(a)
+    if rerun == "config change":
+        data = manifest()
+        data["config"]["chunk_size"] = 500
+        (tmp_path / "out" / "manifests" / "test.pinecone.json").write_text(json.dumps(data), encoding="utf-8")
+    with pytest.raises(SystemExit):
+        run(*(["--force"] if rerun == "force" else []))
+    assert sink.ids(a) == [] and manifest()["documents"][a]["status"] == "failed"
+    BROKEN.clear()
+    run()
+    assert len(sink.ids(a)) == 3 and manifest()["documents"][a]["status"] == "done"
+    assert len(sink.ids(b)) == 2
+
+
+def test_prune_removes_documents_that_are_gone(kb):
+    sink, write, run, manifest = kb
+    a, b = write("a.pdf", lines("lease", 2)), write("b.pdf", lines("loan", 2))
+    run()
+    os.remove(b)
+    run()
+    assert len(sink.ids(b)) == 2 and b in manifest()["documents"]
+    run("--prune")
+    assert sink.ids(b) == [] and b not in manifest()["documents"]
+    assert len(sink.ids(a)) == 2
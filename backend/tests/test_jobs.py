@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+
+from jobs import InMemoryJobStore, JobCancelled, JobManager, QueueFull, SQLiteJobStore
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class FakeAnalysis:
+    """Emits a clause count, a summary and one event per clause; blocks after `pause_after` clauses until released."""
+
+    def __init__(self, clauses=3, pause_after=None):
+        self.clauses = clauses
+        self.pause_after = pause_after
+        self.paused, self.release = threading.Event(), threading.Event()
+
+    def __call__(self, payload, emit, cancel_event):
+        emit("clauses", {"total": self.clauses})
+        emit("summary", f"summary of {payload['text']}")
+        for i in range(self.clauses):
+            if i == self.pause_after:
+                self.paused.set()
+                self.release.wait(5)
+            if cancel_event.is_set():
+                raise JobCancelled()
+            emit("clause", {"index": i, "analysis": {"risk_level": "Green"}})
+        return {"summary": f"summary of {payload['text']}", "clauses": self.clauses}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return InMemoryJobStore() if request.param == "memory" else SQLiteJobStore(str(tmp_path / "jobs.db"))
+
+
+def test_a_job_runs_to_completion(store):
+    manager = JobManager(FakeAnalysis(), store, workers=1)
+    job = manager.submit({"text": "lease"})
+    assert wait_for(lambda: manager.get(job["id"])["status"] == "completed")
+    job = manager.get(job["id"])
+    assert job["result"] == {"summary": "summary of lease", "clauses": 3}
+    assert job["progress"] == {"done": 3, "total": 3} and job["partial"] == {}
+
+
+def test_progress_and_partial_results_show_while_running(store):
+    analysis = FakeAnalysis(clauses=4, pause_after=2)
+    manager = JobManager(analysis, store, workers=1)
+    job_id = manager.submit({"text": "lease"})["id"]
+    assert analysis.paused.wait(5)
+    job = manager.get(job_id)
+    assert job["status"] == "running"
+    assert job["progress"] == {"done": 2, "total": 4}
+    assert job["partial"]["summary"] == "summary of lease"
+    assert [clause["index"] for clause in job["partial"]["detailed_analysis"]] == [0, 1]
+    analysis.release.set()
+    assert wait_for(lambda: manager.get(job_id)["status"] == "completed")
+
+
+def test_a_full_queue_is_refused(store):
+    manager = JobManager(FakeAnalysis(), store, workers=0, max_queue=2)
+    first, second = manager.submit({"text": "a"}), manager.submit({"text": "b"})
+    with pytest.raises(QueueFull):
+        manager.submit({"text": "c"})
+    assert manager.get(first["id"])["status"] == "queued" and manager.get(second["id"])["status"] == "queued"
+    assert manager.stats() == {"queued": 2, "max_queue": 2}
+
+
+def test_cancelling_a_queued_job(store):
+    analysis = FakeAnalysis(pause_after=0)
+    manager = JobManager(analysis, store, workers=1)
+    running = manager.submit({"text": "first"})["id"]
+    assert analysis.paused.wait(5)
+    queued = manager.submit({"text": "second"})["id"]
+    assert manager.cancel(queued)["status"] == "cancelled"
+    analysis.release.set()
+    assert wait_for(lambda: manager.get(running)["status"] == "completed")
+    time.sleep(0.05)
+    job = manager.get(queued)
+    assert job["status"] == "cancelled" and job["started_at"] is None and job["result"] is None
+
+
+def test_cancelling_a_running_job(store):
+    analysis = FakeAnalysis(clauses=5, pause_after=1)
+    manager = JobManager(analysis, store, workers=1)
+    job_id = manager.submit({"text": "lease"})["id"]
+    assert analysis.paused.wait(5)
+    manager.cancel(job_id)
+    analysis.release.set()
+    assert wait_for(lambda: manager.get(job_id)["status"] == "cancelled")
+    job = manager.get(job_id)
+    assert job["result"] is None and job["progress"]["done"] == 1 and job["finished_at"] is not None
+
+
+def test_a_failing_analysis_marks_the_job_failed(store):
+    def analysis(payload, emit, cancel_event):
+        raise ValueError("Unsupported contract type")
+
+    manager = JobManager(analysis, store, workers=1)
+    job_id = manager.submit({"text": "poem"})["id"]
+    assert wait_for(lambda: manager.get(job_id)["status"] == "failed")
+    assert manager.get(job_id)["error"] == "Unsupported contract type"
+
+
+def test_results_survive_a_new_manager_on_sqlite(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    manager = JobManager(FakeAnalysis(), SQLiteJobStore(path), workers=1)
+    job_id = manager.submit({"text": "lease"})["id"]
+    assert wait_for(lambda: manager.get(job_id)["status"] == "completed")
+    restarted = JobManager(FakeAnalysis(), SQLiteJobStore(path), workers=0)
+    job = restarted.get(job_id)
+    assert job["status"] == "completed" and job["result"]["summary"] == "summary of lease"
+    assert restarted.cancel(job_id)["status"] == "completed"
+
+
+def test_the_jobs_endpoint_answers_429_when_the_queue_is_full(client, main_module, monkeypatch):
+    monkeypatch.setattr(main_module, "analysis_jobs", JobManager(FakeAnalysis(), InMemoryJobStore(), workers=0, max_queue=1))
+    assert client.post('/analyze/jobs', json={"text": "lease one"}).status_code == 202
+    response = client.post('/analyze/jobs', json={"text": "lease two"})
+    assert response.status_code == 429 and response.headers["Retry-After"] == "30"
+
+
+def test_the_jobs_endpoints_report_and_cancel(client, main_module, monkeypatch):
+    analysis = FakeAnalysis(pause_after=1)
+    monkeypatch.setattr(main_module, "analysis_jobs", JobManager(analysis, InMemoryJobStore(), workers=1))
+    job_id = client.post('/analyze/jobs', json={"text": "lease"}).get_json()["job_id"]
+    assert analysis.paused.wait(5)
+    status = client.get(f'/analyze/jobs/{job_id}').get_json()
+    assert status["status"] == "running" and status["progress"] == {"done": 1, "total": 3}
+    assert client.delete(f'/analyze/jobs/{job_id}').status_code == 200
+    analysis.release.set()
+    assert wait_for(lambda: client.get(f'/analyze/jobs/{job_id}').get_json()["status"] == "cancelled")
+    assert client.get('/analyze/jobs/nope').status_code == 404
@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+import pytest
+
+from loan_engine import amortization_schedule, effective_annual_rate, emi, parse_loan_terms, validate_offers, validate_tenures
+
+
+def scalar_emi(principal, annual_rate, months):
+    r = annual_rate / 1200
+    if r == 0:
+        return principal / months
+    return principal * r * (1 + r) ** months / ((1 + r) ** months - 1)
+
+
+def scalar_effective_rate(principal, annual_rate, months, fees):
+    """Newton's method on one loan, as an independent check on the vectorized bisection."""
+    payment, received, r = scalar_emi(principal, annual_rate, months), principal - fees, annual_rate / 1200 or 1e-6
+    for _ in range(100):
+        value = payment * (1 - (1 + r) ** -months) / r - received
+        slope = payment * (months * (1 + r) ** (-months - 1) / r - (1 - (1 + r) ** -months) / r ** 2)
+        r -= value / slope
+    return r * 1200
+
+
+def statement(principal, annual_rate, months, payment):
+    """Month-by-month balance, the way a bank statement would show it."""
+    balance, interest_paid = principal, 0.0
+    for _ in range(months):
+        interest = balance * annual_rate / 1200
+        interest_paid += interest
+        balance = balance + interest - payment
+    return balance, interest_paid
+
+
+def test_emi_matches_published_values():
+    assert round(float(emi(100000, 12, 12)), 2) == 8884.88
+    assert round(float(emi(500000, 10.5, 60)), 2) == 10746.95
+    assert float(emi(120000, 0, 24)) == 5000
+
+
+@pytest.mark.parametrize("principal, rate, months", [(100000, 12, 12), (750000, 9.75, 84), (2500000, 8.4, 240), (50000, 0, 10)])
+def test_amortization_schedule_matches_a_statement(principal, rate, months):
+    schedule = amortization_schedule(principal, rate, months)
+    final_balance, interest_paid = statement(principal, rate, months, schedule["emi"])
+    assert abs(final_balance) < 1e-4 and schedule["balance"][-1] < 1e-4
+    assert math.isclose(schedule["principal"].sum(), principal, rel_tol=1e-9)
+    assert math.isclose(schedule["interest"].sum(), interest_paid, rel_tol=1e-9, abs_tol=1e-6)
+    assert math.isclose(schedule["interest"].sum(), schedule["emi"] * months - principal, rel_tol=1e-9, abs_tol=1e-6)
+
+
+def test_effective_rate_without_fees_is_the_nominal_rate():
+    assert abs(float(effective_annual_rate(100000, 12, 12)) - 12) < 1e-6
+
+
+@pytest.mark.parametrize("principal, rate, months, fees", [(500000, 14, 36, 10000), (300000, 10.85, 60, 6000), (100000, 18, 12, 3500)])
+def test_effective_rate_with_fees_matches_newton(principal, rate, months, fees):
+    vectorized = float(effective_annual_rate(principal, rate, months, fees))
+    assert vectorized > rate
+    assert abs(vectorized - scalar_effective_rate(principal, rate, months, fees)) < 1e-6
+
+
+def test_emi_grid_matches_scalar_emis():
+    rates, tenures = np.array([9.5, 11.0, 14.25]), np.array([12, 36, 60])
+    grid = emi(400000, rates[:, None], tenures[None, :])
+    for i in range(3):
+        for j in range(3):
+            assert math.isclose(grid[i, j], scalar_emi(400000, rates[i], tenures[j]), rel_tol=1e-12)
+
+
+def test_parse_loan_terms():
+    terms = parse_loan_terms("Late payment attracts penal interest of 2% per month. The borrower takes a loan of Rs. 5,00,000 "
+                             "at 14% per annum, repayable in 36 equated monthly instalments, with a processing fee of 2%.")
+    assert terms == {"principal": 500000.0, "annual_rate": 14.0, "tenure_months": 36, "processing_fee": 10000.0}
+    terms = parse_loan_terms("Loan amount ₹3 lakh at an interest rate of 12.5%, tenure of 2 years, processing charges Rs. 2,500.")
+    assert terms == {"principal": 300000.0, "annual_rate": 12.5, "tenure_months": 24, "processing_fee": 2500.0}
+
+
+@pytest.mark.parametrize("offers", [
+    [{"lender": "x"}],
+    [{"lender": "x", "annual_rate": "10"}],
+    [{"lender": "x", "annual_rate": -1}],
+    [{"lender": "x", "annual_rate": float("nan")}],
+    [{"lender": "x", "annual_rate": True}],
+    [{"annual_rate": 10}],
+    [{"lender": "x", "annual_rate": 10, "processing_fee_pct": -2}],
+    ["x"],
+    [],
+    {"lender": "x", "annual_rate": 10},
+])
+def test_validate_offers_rejects(offers):
+    with pytest.raises(ValueError):
+        validate_offers(offers)
+
+
+@pytest.mark.parametrize("tenures", [["12"], [0, 12], [-12], [12.5], [True], [10 ** 6], [], 12])
+def test_validate_tenures_rejects(tenures):
+    with pytest.raises(ValueError):
+        validate_tenures(tenures)
+
+
+def test_validators_accept_good_input():
+    assert validate_offers([{"lender": "x", "annual_rate": 0, "processing_fee_pct": 1.5}])
+    assert validate_tenures([1, 12, 600])
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from local_index import LocalIndex, save_local_index
+
+
+@pytest.fixture(scope="module")
+def index_dir(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, 32))
+    vectors = centers[rng.integers(0, 20, 2000)] + 0.5 * rng.normal(size=(2000, 32))
+    path = str(tmp_path_factory.mktemp("index"))
+    save_local_index(path, [f"r{i}" for i in range(len(vectors))], vectors, [{"row": i} for i in range(len(vectors))], ivf_lists=16)
+    return path, vectors
+
+
+def queries(vectors, count, seed=1):
+    rng = np.random.default_rng(seed)
+    return vectors[rng.integers(0, len(vectors), count)] + 0.1 * rng.normal(size=(count, vectors.shape[1]))
+
+
+def ids(results):
+    return [[match["id"] for match in matches] for matches in results]
+
+
+def test_ivf_probing_every_list_matches_exact_search(index_dir):
+    path, vectors = index_dir
+    batch = queries(vectors, 40)
+    exact = LocalIndex(path, mode="exact").query_many(batch, top_k=5)
+    assert ids(LocalIndex(path, mode="ivf", nprobe=16).query_many(batch, top_k=5)) == ids(exact)
+
+
+def test_ivf_recall_with_few_lists_probed(index_dir):
+    path, vectors = index_dir
+    batch = queries(vectors, 100)
+    exact = ids(LocalIndex(path, mode="exact").query_many(batch, top_k=4))
+    ivf = ids(LocalIndex(path, mode="ivf", nprobe=2).query_many(batch, top_k=4))
+    recall = np.mean([len(set(a) & set(b)) / 4 for a, b in zip(exact, ivf)])
+    assert recall >= 0.9
+
+
+def test_ivf_batches_match_single_queries(index_dir):
+    path, vectors = index_dir
+    index, batch = LocalIndex(path, mode="ivf", nprobe=4), queries(vectors, 12)
+    batched = index.query_many(batch, top_k=3, include_values=True)
+    for query, matches in zip(batch, batched):
+        single = index.query_many([query], top_k=3)[0]
+        assert [m["id"] for m in matches] == [m["id"] for m in single]
+        assert np.allclose([m["score"] for m in matches], [m["score"] for m in single], atol=1e-5)
+        assert all(m["metadata"]["row"] == int(m["id"][1:]) and len(m["values"]) == 32 for m in matches)
+
+
+def test_top_k_larger_than_the_probed_lists(index_dir):
+    path, vectors = index_dir
+    results = LocalIndex(path, mode="ivf", nprobe=1).query_many(queries(vectors, 3), top_k=1000)
+    for matches in results:
+        scores = [m["score"] for m in matches]
+        assert 0 < len(matches) <= 1000 and scores == sorted(scores, reverse=True)
+        assert len({m["id"] for m in matches}) == len(matches)
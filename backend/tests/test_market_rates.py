@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+from market_rates import FakeSearchProvider, MarketRateCache, normalize_query
+
+
+class GatedProvider(FakeSearchProvider):
+    """A FakeSearchProvider whose calls block until `gate` is set."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.gate = threading.Event()
+
+    def __call__(self, query: str) -> list:
+        self.gate.wait(5)
+        return super().__call__(query)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def age(cache, query, seconds):
+    fetched_at, results = cache._entries[normalize_query(query)]
+    cache._entries[normalize_query(query)] = (fetched_at - seconds, results)
+
+
+def test_hits_and_misses_are_counted_by_normalized_query():
+    provider = FakeSearchProvider()
+    cache = MarketRateCache(provider)
+    first = cache.search("Personal loan rates, India")
+    assert cache.search("personal  LOAN rates india") == first
+    stats = cache.stats()
+    assert provider.calls == 1
+    assert (stats["hits"], stats["misses"], stats["upstream_calls"], stats["entries"]) == (1, 1, 1, 1)
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_concurrent_misses_share_one_provider_call():
+    provider = GatedProvider()
+    cache = MarketRateCache(provider)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.search("home loan rates"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert wait_for(lambda: cache.stats()["coalesced"] == 7)
+    provider.gate.set()
+    for thread in threads:
+        thread.join(5)
+    stats = cache.stats()
+    assert provider.calls == 1 and stats["upstream_calls"] == 1
+    assert stats["misses"] == 8 and len(results) == 8 and all(r == results[0] for r in results)
+
+
+def test_a_stale_entry_is_served_while_one_background_refresh_runs():
+    provider = GatedProvider(results=[{"title": "old", "snippet": "11% p.a.", "url": "https://example.com/old"}])
+    cache = MarketRateCache(provider, ttl_seconds=60, stale_seconds=3600)
+    provider.gate.set()
+    old = cache.search("car loan rates")
+    age(cache, "car loan rates", 120)
+
+    provider.gate.clear()
+    provider.results = [{"title": "new", "snippet": "9% p.a.", "url": "https://example.com/new"}]
+    assert [cache.search("car loan rates") for _ in range(5)] == [old] * 5
+    stats = cache.stats()
+    assert stats["stale_hits"] == 5 and stats["background_refreshes"] == 1
+
+    provider.gate.set()
+    assert wait_for(lambda: cache.search("car loan rates")[0]["title"] == "new")
+    assert provider.calls == 2 and cache.stats()["upstream_calls"] == 2
+
+
+def test_entries_past_the_stale_window_are_fetched_inline():
+    provider = FakeSearchProvider()
+    cache = MarketRateCache(provider, ttl_seconds=60, stale_seconds=600)
+    cache.search("gold loan rates")
+    age(cache, "gold loan rates", 601)
+    cache.search("gold loan rates")
+    stats = cache.stats()
+    assert provider.calls == 2 and stats["misses"] == 2 and stats["background_refreshes"] == 0
+
+
+def test_a_failed_refresh_serves_the_last_known_results():
+    provider = FakeSearchProvider()
+    cache = MarketRateCache(provider, ttl_seconds=60, stale_seconds=600)
+    known = cache.search("education loan rates")
+    age(cache, "education loan rates", 601)
+    provider.fail = True
+    assert cache.search("education loan rates") == known
+    assert cache.stats()["upstream_errors"] == 1
+
+
+def test_a_failed_miss_with_nothing_cached_raises():
+    cache = MarketRateCache(FakeSearchProvider(fail=True))
+    with pytest.raises(RuntimeError):
+        cache.search("loan against property rates")
+    assert cache.stats()["upstream_errors"] == 1 and cache.stats()["entries"] == 0
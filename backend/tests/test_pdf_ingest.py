@@ -0,0 +1,65 @@
+import os
+import signal
+import sys
+
+import pytest
+
+pytest.importorskip("pypdf")
+
+import pdf_ingest
+from pdf_ingest import extract_document
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from bench_pdf_ingest import write_text_pdf  # noqa: E402
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = str(tmp_path / "lease.pdf")
+    write_text_pdf(path, 6)
+    yield path
+    pdf_ingest.shutdown_pool()
+
+
+def test_pool_and_serial_extraction_agree(pdf, monkeypatch):
+    monkeypatch.setattr(pdf_ingest, "PDF_PAGES_PER_TASK", 2)
+    serial, pooled = extract_document(pdf, workers=1), extract_document(pdf, workers=2)
+    assert pooled["text"] == serial["text"] and pooled["stats"]["text_pages"] == 6
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="needs SIGKILL")
+def test_extraction_recovers_after_a_worker_is_killed(pdf, monkeypatch):
+    monkeypatch.setattr(pdf_ingest, "PDF_PAGES_PER_TASK", 2)
+    expected = extract_document(pdf, workers=1)["text"]
+    pool = pdf_ingest._get_pool(2)
+    assert extract_document(pdf, workers=2)["text"] == expected
+    os.kill(next(iter(pool._processes)), signal.SIGKILL)
+    assert extract_document(pdf, workers=2)["text"] == expected
+    assert pdf_ingest._get_pool(2) is not pool
+
+
+def test_changing_the_worker_count_shuts_the_old_pool_down(pdf):
+    pool = pdf_ingest._get_pool(2)
+    extract_document(pdf, workers=2)
+    assert pdf_ingest._get_pool(3) is not pool
+    with pytest.raises(RuntimeError):
+        pool.submit(print)
+
+
+def test_ocr_errors_fall_back_to_the_text_layer(pdf, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("poppler not found")
+
+    monkeypatch.setattr(pdf_ingest, "OCR_AVAILABLE", True)
+    monkeypatch.setattr(pdf_ingest, "PDF_MIN_TEXT_CHARS", 10 ** 6)  # send every page to OCR
+    monkeypatch.setattr(pdf_ingest, "convert_from_path", broken)
+    page_number, text, method = pdf_ingest.extract_page(pdf, 0)
+    assert method == "text" and "Tenant" in text
+
+
+def test_shutdown_and_extraction_share_the_pool_lock(pdf):
+    lock = pdf_ingest._pool_lock
+    assert extract_document(pdf, workers=2)["stats"]["text_pages"] == 6
+    pdf_ingest.shutdown_pool()
+    assert pdf_ingest._pool is None and pdf_ingest._pool_lock is lock
+    assert extract_document(pdf, workers=2)["stats"]["text_pages"] == 6
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from resources import LazyProxy, ResourceRegistry
+
+
+class Loader:
+    """Builds a model-like object, counting calls; fails while `failures` is positive."""
+
+    def __init__(self, failures=0, delay=0.0):
+        self.failures, self.delay, self.calls = failures, delay, 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.failures > 0:
+            self.failures -= 1
+            raise OSError("weights not found")
+        return type("Model", (), {"encode": lambda self, text: [len(text)], "name": "model"})()
+
+
+def test_a_resource_loads_on_first_attribute_access():
+    registry, loader = ResourceRegistry(), Loader()
+    model = registry.register("model", loader)
+    assert isinstance(model, LazyProxy) and loader.calls == 0 and not registry.loaded("model")
+    assert "not loaded" in repr(model)
+    assert model.encode("rent") == [4] and model.name == "model"
+    assert loader.calls == 1 and registry.loaded("model")
+
+
+def test_concurrent_first_accesses_share_one_load():
+    registry, loader = ResourceRegistry(), Loader(delay=0.1)
+    model = registry.register("model", loader)
+    threads = [threading.Thread(target=lambda: model.encode("rent")) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert loader.calls == 1
+
+
+def test_a_failing_loader_is_reported_and_retried():
+    registry, loader = ResourceRegistry(), Loader(failures=1)
+    model = registry.register("model", loader)
+    with pytest.raises(OSError):
+        model.encode("rent")
+    status = registry.status()
+    assert not status["ready"] and status["resources"]["model"]["error"] == "OSError: weights not found"
+    assert model.encode("rent") == [4] and loader.calls == 2
+    assert registry.status()["ready"] and registry.status()["resources"]["model"]["error"] is None
+
+
+def test_optional_resources_do_not_hold_up_readiness():
+    registry = ResourceRegistry()
+    registry.register("model", Loader())
+    registry.register("tools", Loader(failures=5), required=False)
+    registry.warm_up()
+    status = registry.status()
+    assert status["ready"] and status["resources"]["tools"]["error"] and not status["resources"]["tools"]["loaded"]
+
+
+@pytest.mark.parametrize("mode, loaded", [("eager", True), ("lazy", False)])
+def test_warmup_modes(mode, loaded):
+    registry, loaders = ResourceRegistry(), [Loader(), Loader()]
+    for i, loader in enumerate(loaders):
+        registry.register(f"model{i}", loader)
+    registry.start(mode)
+    assert [loader.calls for loader in loaders] == ([1, 1] if loaded else [0, 0])
+    assert registry.ready() is loaded and (registry.warmup_seconds is not None) is loaded
+
+
+def test_background_warmup_loads_on_its_own_thread():
+    registry, loader = ResourceRegistry(), Loader(delay=0.05)
+    registry.register("model", loader)
+    registry.start("background")
+    registry.warm_up_in_background().join(5)
+    assert loader.calls == 1 and registry.ready()
+
+
+def test_ready_endpoint_reports_a_failing_loader(client, main_module, monkeypatch):
+    registry, loader = ResourceRegistry(), Loader(failures=1)
+    model = registry.register("embedding_model", loader)
+    monkeypatch.setattr(main_module, "resources", registry)
+    registry.warm_up()
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.get_json()["resources"]["embedding_model"]["error"] == "OSError: weights not found"
+    model.encode("rent")
+    assert client.get('/ready').status_code == 200
@@ -0,0 +1,96 @@
+import json
+import re
+import threading
+import time
+
+import numpy as np
+
+from retrieval import DiversifiedBackend, InMemoryBackend, PineconeBackend
+
+DIM = 16
+
+
+def unit(i, noise=0.0, seed=0):
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[i % DIM] = 1.0
+    return vector + noise * np.random.default_rng(seed).normal(size=DIM).astype(np.float32)
+
+
+KB = [{"id": f"kb{i}", "values": unit(i), "metadata": {"text": f"KB-REF-{i}"}} for i in range(DIM)]
+
+
+class FakeIndex:
+    """Pinecone Index stand-in: answers slowest for the first queries, and fails for one vector."""
+
+    def __init__(self, failing: int = None):
+        self.backend = InMemoryBackend(KB)
+        self.failing = failing
+        self.threads = set()
+
+    def query(self, vector, top_k, include_metadata, include_values):
+        self.threads.add(threading.get_ident())
+        best = int(np.argmax(vector))
+        time.sleep(0.002 * (DIM - best))
+        if best == self.failing:
+            raise ConnectionError("timed out")
+        return {"matches": self.backend.query_many([vector], top_k, include_values)[0]}
+
+
+def top_ids(results):
+    return [None if matches is None else matches[0]["id"] for matches in results]
+
+
+def test_in_memory_results_follow_the_query_order():
+    order = [5, 0, 11, 3, 3, 7]
+    results = InMemoryBackend(KB).query_many([unit(i, 0.05, seed) for seed, i in enumerate(order)], top_k=3)
+    assert top_ids(results) == [f"kb{i}" for i in order]
+    assert all(len(matches) == 3 for matches in results)
+
+
+def test_concurrent_queries_come_back_in_chunk_order():
+    order = list(range(DIM))
+    results = PineconeBackend(FakeIndex()).query_many([unit(i) for i in order], top_k=2)
+    assert top_ids(results) == [f"kb{i}" for i in order]
+
+
+def test_a_failed_lookup_only_empties_its_own_slot():
+    index = FakeIndex(failing=4)
+    results = PineconeBackend(index).query_many([unit(i) for i in range(8)], top_k=2)
+    assert top_ids(results) == [f"kb{i}" if i != 4 else None for i in range(8)]
+    assert len(index.threads) > 1
+
+
+def test_diversified_results_stay_aligned():
+    results = DiversifiedBackend(PineconeBackend(FakeIndex(failing=2))).query_many([unit(i) for i in (3, 2, 9)], top_k=2)
+    assert top_ids(results) == ["kb3", None, "kb9"]
+    assert "values" not in results[0][0]
+
+
+def test_each_clause_is_analyzed_with_its_own_context(main_module, monkeypatch):
+    """The whole clause stage against a fake index: clause i must get KB-REF-i as its expert context."""
+    from cache import ClauseCache
+
+    class Embedder:
+        def encode(self, texts, **kwargs):
+            return np.array([unit(int(re.search(r"item (\d+)", text).group(1))) for text in texts])
+
+    class Generator:
+        def generate_content(self, prompt):
+            if "KB-REF-" not in prompt:
+                return type("Response", (), {"text": "Nothing to report."})()
+            reference = re.search(r"KB-REF-(\d+)", prompt).group(1)
+            time.sleep(0.001 * (DIM - int(reference)))
+            return type("Response", (), {"text": json.dumps({
+                "risk_level": "Green", "risk_explanation": f"KB-REF-{reference}", "actionable_advice": "None."})})()
+
+    monkeypatch.setattr(main_module, "embedding_model", Embedder())
+    monkeypatch.setattr(main_module, "generation_model", Generator())
+    monkeypatch.setattr(main_module, "clause_cache", ClauseCache())
+    document = "\n".join(f"{i + 1}. The Tenant shall comply with obligation item {i} of the schedule in every respect."
+                         for i in range(12))
+    result = main_module.process_contract(document, main_module.rental_summary_prompt, main_module.rental_analysis_prompt,
+                                          InMemoryBackend(KB), "rental")
+    assert len(result["detailed_analysis"]) == 12
+    for i, item in enumerate(result["detailed_analysis"]):
+        assert f"item {i} " in item["original_clause"]
+        assert item["analysis"]["risk_explanation"] == f"KB-REF-{i}"
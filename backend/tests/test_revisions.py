@@ -0,0 +1,84 @@
+import re
+import zlib
+
+import numpy as np
+
+from revisions import align_clauses, material_terms
+
+OLD = [
+    "1. The Tenant shall pay a monthly rent of Rs. 20,000 on or before the fifth day of each month.",
+    "2. The Tenant shall pay a refundable security deposit of Rs. 60,000 before moving in.",
+    "3. Either party may end this agreement by giving two months' written notice to the other.",
+    "4. The Tenant shall not sublet any part of the premises without the written consent of the Landlord.",
+]
+
+
+def encode(texts):
+    """Bag-of-words vectors that ignore digits and punctuation, so only the wording moves the similarity."""
+    vectors = np.zeros((len(texts), 512), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in re.findall(r"[a-z]+", text.lower()):
+            vectors[row, zlib.crc32(word.encode()) % 512] += 1
+    return vectors
+
+
+def test_an_identical_revision_is_unchanged():
+    result = align_clauses(OLD, list(OLD), encode)
+    assert result == {"matches": [(j, "unchanged") for j in range(4)], "removed": [], "material_change": False}
+
+
+def test_renumbered_and_reordered_clauses_are_unchanged():
+    new = ["1. " + OLD[3][3:], "2. " + OLD[0][3:], "3. " + OLD[2][3:], "4. " + OLD[1][3:]]
+    result = align_clauses(OLD, new, encode)
+    assert result["matches"] == [(3, "unchanged"), (0, "unchanged"), (2, "unchanged"), (1, "unchanged")]
+    assert not result["material_change"]
+
+
+def test_a_reworded_clause_is_modified_but_not_material():
+    new = list(OLD)
+    new[3] = "4. The Tenant must not sublet any portion of the premises without the written consent of the Landlord."
+    result = align_clauses(OLD, new, encode)
+    assert result["matches"][3] == (3, "modified")
+    assert not result["material_change"]
+
+
+def test_punctuation_only_edits_close_to_identical_are_reused():
+    new = list(OLD)
+    new[2] = OLD[2].replace("notice to the other.", "notice, to the other;")
+    assert align_clauses(OLD, new, encode)["matches"][2] == (2, "unchanged")
+
+
+def test_inserted_and_deleted_clauses():
+    new = OLD[:2] + ["3. The Landlord shall carry out all structural repairs to the building at their own cost."] + ["4. " + OLD[2][3:]]
+    result = align_clauses(OLD, new, encode)
+    assert result["matches"] == [(0, "unchanged"), (1, "unchanged"), (None, "added"), (2, "unchanged")]
+    assert result["removed"] == [3] and result["material_change"]
+
+
+def test_an_amount_change_forces_reanalysis_despite_high_similarity():
+    new = list(OLD)
+    new[1] = OLD[1].replace("60,000", "80,000")
+    vectors = encode([new[1], OLD[1]])
+    assert np.allclose(vectors[0], vectors[1])  # the embeddings can't tell the clauses apart
+    result = align_clauses(OLD, new, encode)
+    assert result["matches"][1] == (1, "modified") and result["material_change"]
+
+
+def test_a_rate_change_forces_reanalysis():
+    old = ["5. Late payments carry interest at 2% per month until paid in full to the Landlord."]
+    new = ["5. Late payments carry interest at 3% per month until paid in full to the Landlord."]
+    assert material_terms(old[0]) != material_terms(new[0])
+    result = align_clauses(old, new, encode)
+    assert result["matches"] == [(0, "modified")] and result["material_change"]
+
+
+def test_without_embeddings_changed_clauses_are_added_and_removed():
+    new = list(OLD)
+    new[0] = OLD[0].replace("fifth", "seventh")
+    result = align_clauses(OLD, new)
+    assert result["matches"][0] == (None, "added") and result["removed"] == [0] and result["material_change"]
+
+
+def test_material_terms_ignore_the_leading_label():
+    assert material_terms("12. Rent of Rs. 20,000 for eleven months.") == material_terms("3) Rent of Rs. 20000 for eleven months.")
+    assert material_terms("Notice of two months.") != material_terms("Notice of three months.")
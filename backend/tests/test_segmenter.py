@@ -0,0 +1,108 @@
+import json
+import os
+
+import pytest
+
+from segmenter import ClauseSegmenter, segment_clauses
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "data")
+SENTENCE = "The Tenant shall pay the monthly rent on or before the fifth day of each month. "
+
+
+def paths(document: str) -> list:
+    return [(clause.label, clause.path) for clause in segment_clauses(document)]
+
+
+def test_matches_the_golden_segmentation():
+    """Regenerate with `python benchmarks/bench_segmenter.py --write-golden` after an intended rule change."""
+    with open(os.path.join(DATA_DIR, "contract_samples.jsonl"), encoding="utf-8") as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+    with open(os.path.join(DATA_DIR, "segmenter_golden.json"), encoding="utf-8") as f:
+        golden = json.load(f)
+    assert len(golden) == len(samples)
+    for sample, expected in zip(samples, golden):
+        actual = [{"label": c.label, "path": c.path, "start": c.start, "end": c.end, "prefix": c.text[:40]}
+                  for c in segment_clauses(sample["text"])]
+        assert actual == expected, sample["label"]
+
+
+def test_lettered_items_under_a_numbered_clause():
+    document = "3.2 The Tenant shall do each of the following things:\n" + "".join(
+        f"({letter}) {item} with the written consent of the Landlord;\n"
+        for letter, item in zip("abcd", ["pay the rent", "keep the premises clean", "not sublet the premises", "allow inspection"]))
+    assert paths(document) == [("3.2", ["3.2"]), ("a", ["3.2", "a"]), ("b", ["3.2", "b"]), ("c", ["3.2", "c"]), ("d", ["3.2", "d"])]
+
+
+@pytest.mark.parametrize("letters", ["ghijk", "tuvwxy"])
+def test_letters_that_are_also_roman_numerals_continue_a_lettered_list(letters):
+    document = "3. The Tenant shall do each of the following things:\n3.2 In particular:\n" + "".join(
+        f"({letter}) keep item {letter} of the inventory in good condition;\n" for letter in letters)
+    assert paths(document)[1:] == [(letter, ["3", "3.2", letter]) for letter in letters]
+
+
+def test_roman_lists_nest_and_continue():
+    document = (
+        "3.2 The Tenant shall do the following things, namely:\n"
+        "(a) pay the rent on time every single month without fail;\n"
+        "(b) in particular the following obligations of the tenant:\n"
+        "(i) keep the drains clear of any obstruction whatsoever;\n"
+        "(ii) keep the roof clear of any debris and rubbish at all times;\n"
+        "(a) report damage to the Landlord within a week of noticing it;\n"
+        "(b) report leaks to the Landlord within a day of noticing them;\n"
+        "(iii) not keep pets on the premises without written consent;\n"
+        "(iv) not make noise in the premises after ten in the night;\n"
+        "(v) not park vehicles anywhere except in the allotted space.\n"
+        "(c) pay the charges levied by the society on the due dates.\n"
+        "3.3 The Landlord shall pay all the taxes levied on the premises.\n"
+    )
+    assert paths(document) == [
+        ("3.2", ["3.2"]), ("a", ["3.2", "a"]), ("b", ["3.2", "b"]),
+        ("i", ["3.2", "b", "i"]), ("ii", ["3.2", "b", "ii"]),
+        ("a", ["3.2", "b", "ii", "a"]), ("b", ["3.2", "b", "ii", "b"]),
+        ("iii", ["3.2", "b", "iii"]), ("iv", ["3.2", "b", "iv"]), ("v", ["3.2", "b", "v"]),
+        ("c", ["3.2", "c"]), ("3.3", ["3.3"]),
+    ]
+
+
+def test_split_pieces_of_a_merged_clause_point_at_their_own_text():
+    # "Noted and agreed." merges into clause 1 across blank lines, then clause 1 is split
+    document = "1. " + SENTENCE * 3 + "\n\nNoted and agreed.\n\n" + SENTENCE * 6 + "\n\n2. The Landlord shall refund the deposit.\n"
+    clauses = segment_clauses(document, max_tokens=40)
+    assert len(clauses) > 3
+    for clause in clauses:
+        assert " ".join(document[clause.start:clause.end].split()) == " ".join(clause.text.split())
+
+
+def test_incremental_feed_matches_one_shot():
+    document = "1. " + SENTENCE * 20 + "\n\n(a) " + SENTENCE + "\n(b) Noted.\n\n2. " + SENTENCE * 2
+    segmenter = ClauseSegmenter(max_tokens=60)
+    fed = []
+    for start in range(0, len(document), 37):
+        fed.extend(segmenter.feed(document[start:start + 37]))
+    fed.extend(segmenter.finish())
+    assert [(c.text, c.start, c.end, c.path) for c in fed] == \
+        [(c.text, c.start, c.end, c.path) for c in segment_clauses(document, max_tokens=60)]
+
+
+def test_a_short_lead_in_ending_in_a_colon_carries_forward():
+    document = ("1. Rent. The Tenant shall pay a monthly rent of Rs. 20,000 by the fifth of each month.\n\n"
+                "2. Deposit:\n\n"
+                "The Tenant shall pay a refundable security deposit of Rs. 60,000 at signing.\n")
+    assert paths(document) == [("1", ["1"]), ("2", ["2"])]
+    assert segment_clauses(document)[1].text.startswith("2. Deposit:\nThe Tenant shall pay")
+
+
+def test_a_short_numbered_clause_is_not_merged_into_a_lettered_item():
+    document = ("2. Obligations. The Tenant shall comply with the following during the term:\n"
+                "(c) pay the electricity and water charges as billed each month;\n"
+                "(d) allow the landlord to inspect the premises on notice.\n"
+                "3. Lock-in of 6 months.\n"
+                "4. Notice. Either party may end this agreement with two months' written notice.\n")
+    assert paths(document) == [("2", ["2"]), ("c", ["2", "c"]), ("d", ["2", "d"]), ("3", ["3"]), ("4", ["4"])]
+    assert segment_clauses(document)[3].text == "3. Lock-in of 6 months."
+
+
+def test_a_short_sentence_still_merges_into_its_clause():
+    document = "1. " + SENTENCE + "\n\nNoted and agreed.\n\n2. " + SENTENCE
+    clauses = segment_clauses(document)
+    assert [c.label for c in clauses] == ["1", "2"] and clauses[0].text.endswith("Noted and agreed.")
@@ -0,0 +1,57 @@
+import pytest
+
+from simulator import simulate
+
+LOAN_24 = """* Loan Amount: Rs. 5,00,000
+* Interest Rate: 12% p.a.
+* Tenure: 24 months
+* Prepayment Charges: 2% of the amount prepaid"""
+
+
+@pytest.mark.parametrize("scenarios", [
+    {"early_exit": {"exit_month": [30]}},
+    {"early_exit": {"exit_month": [24]}},
+    {"early_exit": {"exit_month": [0]}},
+    {"prepay": {"amount": [100000], "month": [30]}},
+    {"prepay": {"amount": [100000], "month": [6, 24]}},
+])
+def test_loan_months_outside_the_term_are_rejected(scenarios):
+    with pytest.raises(ValueError):
+        simulate(LOAN_24, scenarios)
+
+
+@pytest.mark.parametrize("scenarios, overrides", [
+    ({"late_payment": {"months_late": [-1]}}, None),
+    ({"late_payment": {"months_late": ["2"]}}, None),
+    ({"early_exit": {"exit_month": [6.5]}}, None),
+    ({"prepay": {"amount": [-5], "month": [6]}}, None),
+    (None, {"term_months": 0}),
+    (None, {"annual_rate": "12"}),
+    ([], None),
+])
+def test_bad_grid_values_and_overrides_are_rejected(scenarios, overrides):
+    with pytest.raises(ValueError):
+        simulate(LOAN_24, scenarios, overrides)
+
+
+@pytest.mark.parametrize("key_entities", [123, ["* Rent: Rs. 10,000"], {"rent": 10000}])
+def test_non_text_key_entities_are_rejected(key_entities):
+    with pytest.raises(ValueError):
+        simulate(key_entities)
+
+
+def test_default_grids_only_use_months_inside_the_loan():
+    result = simulate(LOAN_24)
+    scenarios = result["scenarios"]
+    assert [row["exit_month"] for row in scenarios["early_exit"]] == list(range(1, 24))
+    # the default prepay months are 6, 12 and 24; 24 is the last EMI, not a prepayment
+    assert sorted({row["month"] for row in scenarios["prepay"]}) == [6, 12]
+    # exiting near the end can cost more in fees than it saves, but there is always a balance to close
+    assert all(row["foreclosure_amount"] > 0 for row in scenarios["early_exit"])
+    assert all(row["months_saved"] >= 0 and row["net_interest_saved"] >= 0 for row in scenarios["prepay"])
+
+
+def test_months_inside_the_loan_are_priced():
+    result = simulate(LOAN_24, {"early_exit": {"exit_month": [1, 23]}, "prepay": {"amount": [100000], "month": [12]}})
+    assert [row["exit_month"] for row in result["scenarios"]["early_exit"]] == [1, 23]
+    assert result["scenarios"]["prepay"][0]["months_saved"] > 0
@@ -0,0 +1,84 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip("flask")
+
+from streaming import iter_events
+
+
+def test_closing_the_stream_cancels_the_run():
+    cancel_event, finished = threading.Event(), threading.Event()
+
+    def run(emit):
+        emit("started", {})
+        # a well-behaved run stops once cancelled
+        if cancel_event.wait(5):
+            finished.set()
+
+    events = iter_events(run, cancel_event)
+    assert next(events) == ("started", {})
+    events.close()
+    assert cancel_event.is_set() and finished.wait(5)
+
+
+def test_a_finished_stream_is_not_cancelled():
+    cancel_event = threading.Event()
+    assert list(iter_events(lambda emit: emit("done", {}), cancel_event)) == [("done", {})]
+    assert not cancel_event.is_set()
+
+
+def test_analyze_stream_disconnect_sets_the_cancel_event(client, main_module, monkeypatch):
+    seen, stopped = {}, threading.Event()
+
+    def run_analysis(text, cache_mode, on_event=None, cancel_event=None, **kwargs):
+        on_event("contract_type", {"contract_type": "rental"})
+        seen["cancelled"] = cancel_event.wait(5)
+        stopped.set()
+        return None
+
+    monkeypatch.setattr(main_module, "run_analysis", run_analysis)
+    response = client.post('/analyze/stream', json={"text": "This rental agreement..."}, buffered=False)
+    first = next(iter(response.response))
+    assert json.loads(first)["event"] == "contract_type"
+    response.close()
+    assert stopped.wait(10) and seen["cancelled"]
+
+
+def test_cached_clauses_are_streamed_when_embedding_fails(main_module, monkeypatch):
+    from cache import ClauseCache
+
+    class Embedder:
+        fail = False
+
+        def encode(self, texts, **kwargs):
+            if self.fail:
+                raise RuntimeError("model unavailable")
+            return np.random.default_rng(len(texts)).normal(size=(len(texts), 8))
+
+    class Generator:
+        def generate_content(self, prompt):
+            return type("Response", (), {"text": json.dumps({"risk_level": "Green", "risk_explanation": "Fine.",
+                                                              "actionable_advice": "None."})})()
+
+    class Index:
+        def query_many(self, vectors, top_k=4, include_values=False):
+            return [[] for _ in vectors]
+
+    embedder = Embedder()
+    monkeypatch.setattr(main_module, "embedding_model", embedder)
+    monkeypatch.setattr(main_module, "generation_model", Generator())
+    monkeypatch.setattr(main_module, "clause_cache", ClauseCache())
+    clauses = [f"{i + 1}. The Tenant shall keep fixture number {i} of the premises in good repair." for i in range(3)]
+    main_module.process_contract("\n".join(clauses[:2]), main_module.rental_summary_prompt,
+                                 main_module.rental_analysis_prompt, Index(), "rental")
+
+    embedder.fail = True
+    events = []
+    result = main_module.process_contract("\n".join(clauses), main_module.rental_summary_prompt, main_module.rental_analysis_prompt,
+                                          Index(), "rental", on_event=lambda name, data: events.append((name, data)))
+    streamed = [data["index"] for name, data in events if name == "clause"]
+    assert streamed == [0, 1]
+    assert len(result["detailed_analysis"]) == 2 and "detailed_analysis" in result["degraded_stages"]
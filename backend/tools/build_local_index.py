@@ -0,0 +1,58 @@
+"""
+Builds a local on-disk index (see local_index.save_local_index) for LocalIndex.
+
+Export an existing Pinecone index:
+    python tools/build_local_index.py export-pinecone --index karnataka-rental-lows
+
+To build one from the source PDFs instead, use tools/ingest_kb.py --target local.
+
+Add --ivf-lists N to also write the IVF/int8 structures used by LOCAL_INDEX_MODE=ivf.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from local_index import LOCAL_INDEX_DIR, save_local_index
+
+
+def export_pinecone(index_name: str, fetch_batch: int = 100):
+    from pinecone import Pinecone
+
+    pc = Pinecone(api_key=os.environ.get("PINECONE_API_KEY"))
+    index = pc.Index(index_name)
+
+    ids, vectors, metadata = [], [], []
+    for id_page in index.list():
+        for start in range(0, len(id_page), fetch_batch):
+            fetched = index.fetch(ids=id_page[start:start + fetch_batch]).vectors
+            for vector_id, vector in fetched.items():
+                ids.append(vector_id)
+                vectors.append(vector.values)
+                metadata.append(dict(vector.metadata or {}))
+        print(f"fetched {len(ids)} vectors...")
+    return ids, vectors, metadata
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", choices=["export-pinecone"])
+    parser.add_argument("--index", required=True, help="index name, e.g. karnataka-rental-lows")
+    parser.add_argument("--out-dir", default=LOCAL_INDEX_DIR)
+    parser.add_argument("--ivf-lists", type=int, default=0, help="number of k-means lists for IVF mode (0 = exact only)")
+    args = parser.parse_args()
+
+    ids, vectors, metadata = export_pinecone(args.index)
+    if not ids:
+        sys.exit(f"no vectors found for {args.index}")
+    path = os.path.join(args.out_dir, args.index)
+    save_local_index(path, ids, vectors, metadata, ivf_lists=args.ivf_lists)
+    print(f"✅ wrote {len(ids)} vectors to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,500 @@
+"""
+Ingests PDFs into a knowledge-base index (replaces vectorize-rental-docs.ipynb).
+
+    python tools/ingest_kb.py --index loan-laws docs/loans/
+    python tools/ingest_kb.py --index karnataka-rental-lows --target local docs/rental/*.pdf
+
+PDFs are parsed and split in a process pool, chunks are embedded in batches as
+documents arrive, and vectors are upserted in batches bounded by count and
+request size, several at a time. Chunking (1000 characters, 200 overlap, per
+page), chunk ids and metadata match the notebook, so existing indexes stay
+consistent.
+
+A manifest of document content hashes sits next to the local indexes. Unchanged
+documents are skipped, changed ones are re-ingested and their leftover chunks
+deleted, and a document only counts as done once all of its vectors are written,
+so after a crash a re-run picks up with the documents that hadn't finished. A
+document that can't be parsed has its old vectors removed and is marked failed,
+so the next run retries it. With EMBEDDING_CACHE_DIR set, chunks embedded before the crash aren't re-encoded.
+
+Before embedding, chunks that repeat one already in the index (the same
+normalized text, or a near-duplicate by MinHash over word shingles with the
+same amounts, rates and periods, see dedup.py) are dropped and recorded against the chunk they duplicate. Their
+signatures are kept next to the manifest, so later runs dedupe against the whole
+index, and documents whose chunks were dropped in favour of a changed or pruned
+document are re-ingested along with it. --no-dedup turns this off.
+
+--target local writes the LocalIndex format (see build_local_index.py), staging
+each finished document so a resumed run only re-reads what it has to.
+"""
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from dotenv import load_dotenv
+
+from cache import make_cache_key
+from dedup import DEDUP_NEAR_THRESHOLD, ChunkDeduplicator
+from local_index import LOCAL_INDEX_DIR, save_local_index
+from pdf_ingest import PDF_EXTRACT_WORKERS, count_pages, extract_pages
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+# Pinecone rejects upsert requests over 2 MB
+UPSERT_MAX_BYTES = 1_800_000
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_pdfs(paths: list) -> list:
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(glob.glob(os.path.join(path, "**", "*.pdf"), recursive=True)))
+        else:
+            found.append(path)
+    return list(dict.fromkeys(found))
+
+
+def parse_document(path: str, chunk_size: int, chunk_overlap: int) -> tuple:
+    """Runs in a worker process: (path, chunks) with one {"id", "text", "metadata"} per chunk."""
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = []
+    for page_number, text, _ in extract_pages(path, 0, count_pages(path)):
+        for i, chunk in enumerate(splitter.split_text(text)):
+            chunks.append({
+                "id": f"{path}_p{page_number + 1}_c{i}",
+                "text": chunk,
+                "metadata": {"source": path, "page": page_number + 1, "text": chunk},
+            })
+    return path, chunks
+
+
+def parsed_documents(sources: list, workers: int):
+    """
+    Yields (source, chunks, error) as documents are parsed, with a bounded window of
+    documents in a process pool so big corpora don't pile up in memory. With
+    workers <= 1 documents are parsed one by one in this process.
+    """
+    if workers <= 1:
+        for source in sources:
+            try:
+                yield source, parse_document(source, CHUNK_SIZE, CHUNK_OVERLAP)[1], None
+            except Exception as e:
+                yield source, None, e
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending, queue = {}, list(sources)
+        while pending or queue:
+            while queue and len(pending) < 2 * workers:
+                source = queue.pop(0)
+                pending[pool.submit(parse_document, source, CHUNK_SIZE, CHUNK_OVERLAP)] = source
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    yield source, future.result()[1], None
+                except Exception as e:
+                    yield source, None, e
+
+
+class Manifest:
+    """
+    {source: {"sha256", "status", "ids", "duplicate_of"}} for one index, saved atomically
+    after every change. status is 'started', 'done' or 'failed'; only 'done' is skipped.
+    """
+
+    def __init__(self, path: str, config: dict):
+        self.path = path
+        self.config = config
+        self.documents = {}
+        self.loaded = False  # True when an existing manifest with the same config was read
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("config") == config:
+                self.documents = data["documents"]
+                self.loaded = True
+            else:
+                # different model or chunking: every document has to be redone, but old ids are still deleted
+                self.documents = {source: {**entry, "sha256": None} for source, entry in data["documents"].items()}
+
+    def is_current(self, source: str, sha256: str) -> bool:
+        entry = self.documents.get(source)
+        return entry is not None and entry["status"] == "done" and entry["sha256"] == sha256
+
+    def previous_ids(self, source: str) -> list:
+        entry = self.documents.get(source) or {}
+        return entry.get("ids", []) + entry.get("previous_ids", [])
+
+    def update(self, source: str, **fields):
+        with self._lock:
+            self.documents[source] = {**self.documents.get(source, {}), **fields, "updated_at": time.time()}
+            self._save()
+
+    def remove(self, source: str):
+        with self._lock:
+            self.documents.pop(source, None)
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"config": self.config, "documents": self.documents}, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+
+class PineconeSink:
+    def __init__(self, index_name: str):
+        from pinecone import Pinecone
+
+        self.index = Pinecone(api_key=os.environ.get("PINECONE_API_KEY")).Index(index_name)
+
+    def upsert(self, records: list):
+        self.index.upsert(vectors=[{"id": r["id"], "values": r["values"].tolist(), "metadata": r["metadata"]} for r in records])
+
+    def commit(self, source: str):
+        pass
+
+    def delete_stale(self, source: str, ids: list):
+        for start in range(0, len(ids), 1000):
+            self.index.delete(ids=ids[start:start + 1000])
+
+    def remove_document(self, source: str, ids: list):
+        self.delete_stale(source, ids)
+
+    def finish(self, manifest: Manifest):
+        print(self.index.describe_index_stats())
+
+
+class LocalSink:
+    """Stages each finished document as one .npz, then writes the whole LocalIndex at the end."""
+
+    def __init__(self, index_name: str, out_dir: str, ivf_lists: int = 0):
+        self.path = os.path.join(out_dir, index_name)
+        self.staging_dir = os.path.join(out_dir, ".staging", index_name)
+        self.ivf_lists = ivf_lists
+        self._pending = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    def _staged(self, source: str) -> str:
+        return os.path.join(self.staging_dir, make_cache_key(source)[:24] + ".npz")
+
+    def upsert(self, records: list):
+        with self._lock:
+            for record in records:
+                self._pending.setdefault(record["metadata"]["source"], []).append(record)
+
+    def commit(self, source: str):
+        with self._lock:
+            records = self._pending.pop(source, [])
+        buffer = io.BytesIO()
+        np.savez(buffer, ids=np.array([r["id"] for r in records], dtype=str),
+                 vectors=np.array([r["values"] for r in records], dtype=np.float32) if records else np.zeros((0, 0), dtype=np.float32),
+                 metadata=np.array(json.dumps([r["metadata"] for r in records], ensure_ascii=False)))
+        temp_path = self._staged(source) + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(temp_path, self._staged(source))
+
+    def delete_stale(self, source: str, ids: list):
+        pass  # commit already replaced the document's staging file
+
+    def remove_document(self, source: str, ids: list):
+        if os.path.exists(self._staged(source)):
+            os.remove(self._staged(source))
+
+    def finish(self, manifest: Manifest):
+        ids, vectors, metadata = [], [], []
+        for source in sorted(manifest.documents):
+            if manifest.documents[source]["status"] != "done" or not os.path.exists(self._staged(source)):
+                continue
+            staged = np.load(self._staged(source))
+            if len(staged["ids"]):
+                ids.extend(staged["ids"].tolist())
+                vectors.append(staged["vectors"])
+                metadata.extend(json.loads(str(staged["metadata"])))
+        if not ids:
+            print(f"❌ nothing to write for {self.path}")
+            return
+        save_local_index(self.path, ids, np.concatenate(vectors), metadata, ivf_lists=self.ivf_lists)
+        print(f"✅ wrote {len(ids)} vectors to {self.path}")
+
+
+class Ingestion:
+    """
+    Embeds chunks as parsed documents arrive and upserts them in bounded batches on
+    a thread pool. Each document is committed (and recorded in the manifest) once the
+    last batch holding one of its chunks has been written.
+    """
+
+    def __init__(self, sink, manifest: Manifest, embedder, embed_batch: int, batch_size: int, batch_bytes: int,
+                 upsert_workers: int, dedup: ChunkDeduplicator = None):
+        self.sink = sink
+        self.manifest = manifest
+        self.embedder = embedder
+        self.dedup = dedup
+        self.embed_batch = embed_batch
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.upserts = ThreadPoolExecutor(max_workers=upsert_workers, thread_name_prefix="upsert")
+        self.max_in_flight = 2 * upsert_workers
+        self.in_flight = set()
+        self.to_embed, self.batch, self.batch_size_bytes = [], [], 0
+        self.remaining, self.new_ids, self.hashes = {}, {}, {}
+        self.counters = {"documents": 0, "chunks": 0, "batches": 0, "parsed_chunks": 0, "exact_duplicates": 0, "near_duplicates": 0}
+        self._lock = threading.Lock()
+
+    def _deduplicate(self, source: str, chunks: list) -> tuple:
+        """(chunks to keep, {dropped chunk id: id of the kept chunk it repeats})."""
+        kept, duplicate_of = [], {}
+        for chunk in chunks:
+            kind, original = self.dedup.find(chunk["text"])
+            if original is None:
+                self.dedup.add(chunk["id"], source, chunk["text"])
+                kept.append(chunk)
+            else:
+                duplicate_of[chunk["id"]] = original
+                self.counters[f"{kind}_duplicates"] += 1
+        return kept, duplicate_of
+
+    def add_document(self, source: str, sha256: str, chunks: list):
+        self.counters["parsed_chunks"] += len(chunks)
+        duplicate_of = {}
+        if self.dedup is not None:
+            chunks, duplicate_of = self._deduplicate(source, chunks)
+        self.manifest.update(source, sha256=sha256, status="started", previous_ids=self.manifest.previous_ids(source), ids=[],
+                             duplicate_of=duplicate_of)
+        self.hashes[source] = sha256
+        self.new_ids[source] = [chunk["id"] for chunk in chunks]
+        self.remaining[source] = len(chunks)
+        if not chunks:
+            self._finish_document(source)
+            return
+        self.to_embed.extend(chunks)
+        while len(self.to_embed) >= self.embed_batch:
+            self._embed(self.to_embed[:self.embed_batch])
+            self.to_embed = self.to_embed[self.embed_batch:]
+
+    def fail_document(self, source: str):
+        """A document that couldn't be parsed: its old vectors go, and the next run retries it."""
+        previous_ids = self.manifest.previous_ids(source)
+        if previous_ids:
+            self.sink.remove_document(source, previous_ids)
+        self.manifest.update(source, sha256=None, status="failed", ids=[], previous_ids=[], duplicate_of={})
+
+    def _embed(self, chunks: list):
+        from embeddings import encode_batch
+
+        vectors = encode_batch(self.embedder, [chunk["text"] for chunk in chunks])
+        for chunk, vector in zip(chunks, vectors):
+            record = {"id": chunk["id"], "values": np.asarray(vector, dtype=np.float32), "metadata": chunk["metadata"]}
+            # rough JSON size of the record in an upsert request
+            size = len(record["id"]) + 12 * len(vector) + len(json.dumps(chunk["metadata"], ensure_ascii=False))
+            if self.batch and (len(self.batch) >= self.batch_size or self.batch_size_bytes + size > self.batch_bytes):
+                self._submit()
+            self.batch.append(record)
+            self.batch_size_bytes += size
+
+    def _submit(self):
+        batch, self.batch, self.batch_size_bytes = self.batch, [], 0
+        while len(self.in_flight) >= self.max_in_flight:
+            done, _ = wait(self.in_flight, return_when=FIRST_COMPLETED)
+            self._collect(done)
+        self.in_flight.add(self.upserts.submit(self._upsert, batch))
+
+    def _upsert(self, batch: list):
+        for attempt in range(3):
+            try:
+                self.sink.upsert(batch)
+                break
+            except Exception as e:
+                if attempt == 2:
+                    raise
+                print(f"❌ upsert of {len(batch)} vectors failed ({e}), retrying")
+                time.sleep(2 ** attempt)
+        finished = []
+        with self._lock:
+            self.counters["batches"] += 1
+            self.counters["chunks"] += len(batch)
+            for record in batch:
+                source = record["metadata"]["source"]
+                self.remaining[source] -= 1
+                if self.remaining[source] == 0:
+                    finished.append(source)
+        for source in finished:
+            self._finish_document(source)
+
+    def _collect(self, done):
+        for future in done:
+            self.in_flight.discard(future)
+            future.result()  # re-raises a failed upsert
+
+    def _finish_document(self, source: str):
+        self.sink.commit(source)
+        stale = sorted(set(self.manifest.previous_ids(source)) - set(self.new_ids[source]))
+        if stale:
+            self.sink.delete_stale(source, stale)
+        self.manifest.update(source, sha256=self.hashes[source], status="done", ids=self.new_ids[source], previous_ids=[])
+        with self._lock:
+            self.counters["documents"] += 1
+
+    def flush(self):
+        if self.to_embed:
+            self._embed(self.to_embed)
+            self.to_embed = []
+        if self.batch:
+            self._submit()
+        self._collect(set(self.in_flight))
+        self.upserts.shutdown()
+
+
+def dependents(manifest: Manifest, dedup: ChunkDeduplicator, sources: set) -> set:
+    """Documents with chunks dropped as duplicates of chunks owned by `sources`, transitively."""
+    found = set()
+    while True:
+        owned = set()
+        for source in sources | found:
+            owned |= dedup.owned_ids(source) | set(manifest.previous_ids(source))
+        more = {source for source, entry in manifest.documents.items()
+                if source not in sources | found and owned & set(entry.get("duplicate_of", {}).values())}
+        if not more:
+            return found
+        found |= more
+
+
+def peak_rss_mb() -> tuple:
+    # ru_maxrss is in KiB on Linux
+    return (round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1))
+
+
+def make_sink(args):
+    return LocalSink(args.index, args.out_dir, args.ivf_lists) if args.target == "local" else PineconeSink(args.index)
+
+
+def load_embedder():
+    from embedding_cache import CachedEmbeddingModel
+    from embeddings import load_embedding_model
+
+    # fp32 torch, which is what the indexes were built with
+    return CachedEmbeddingModel(load_embedding_model(EMBEDDING_MODEL_NAME, "torch"), EMBEDDING_MODEL_NAME, "torch")
+
+
+def main(argv: list = None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="PDF files or directories (searched recursively)")
+    parser.add_argument("--index", required=True, help="karnataka-rental-lows, employment-laws or loan-laws")
+    parser.add_argument("--target", choices=["pinecone", "local"], default="pinecone")
+    parser.add_argument("--out-dir", default=LOCAL_INDEX_DIR, help="local indexes, staging files and manifests")
+    parser.add_argument("--manifest", help="manifest path (default <out-dir>/manifests/<index>.<target>.json)")
+    parser.add_argument("--ivf-lists", type=int, default=0, help="local target: k-means lists for LOCAL_INDEX_MODE=ivf")
+    parser.add_argument("--workers", type=int, default=PDF_EXTRACT_WORKERS, help="PDF parsing processes (1: parse in this process)")
+    parser.add_argument("--embed-batch", type=int, default=64, help="chunks per embedding call")
+    parser.add_argument("--batch-size", type=int, default=100, help="max vectors per upsert")
+    parser.add_argument("--batch-bytes", type=int, default=UPSERT_MAX_BYTES, help="max approximate bytes per upsert")
+    parser.add_argument("--upsert-workers", type=int, default=4, help="concurrent upserts")
+    parser.add_argument("--prune", action="store_true", help="delete documents in the manifest that are no longer in the inputs")
+    parser.add_argument("--force", action="store_true", help="re-ingest unchanged documents too")
+    parser.add_argument("--no-dedup", action="store_true", help="keep duplicate and near-duplicate chunks")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    config = {"model": EMBEDDING_MODEL_NAME, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP,
+              "dedup_threshold": None if args.no_dedup else DEDUP_NEAR_THRESHOLD}
+    manifest_path = args.manifest or os.path.join(args.out_dir, "manifests", f"{args.index}.{args.target}.json")
+    manifest = Manifest(manifest_path, config)
+    sink = make_sink(args)
+
+    pdfs = find_pdfs(args.paths)
+    hashes = {path: file_hash(path) for path in pdfs}
+    todo = [path for path in pdfs if args.force or not manifest.is_current(path, hashes[path])]
+    pruned = [source for source in manifest.documents if source not in hashes] if args.prune else []
+
+    dedup, dedup_path = None, os.path.splitext(manifest_path)[0] + ".dedup.npz"
+    if not args.no_dedup:
+        dedup = ChunkDeduplicator.load(dedup_path) if manifest.loaded else ChunkDeduplicator()
+        for source in dependents(manifest, dedup, set(todo) | set(pruned)):
+            if source in hashes:
+                todo.append(source)
+            else:
+                print(f"❌ {source} repeats chunks of a changed document but isn't in the inputs; include it or --prune it")
+        for source in set(todo) | set(pruned) | (set(dedup.owners) - set(manifest.documents)):
+            dedup.remove_owner(source)
+    print(f"{len(pdfs)} documents, {len(pdfs) - len(todo)} unchanged, {len(todo)} to ingest")
+
+    for source in pruned:
+        sink.remove_document(source, manifest.previous_ids(source))
+        manifest.remove(source)
+        print(f"pruned {source}")
+
+    failed = []
+    counters = {"documents": 0, "chunks": 0, "batches": 0, "parsed_chunks": 0, "exact_duplicates": 0, "near_duplicates": 0}
+    if todo:
+        embedder = load_embedder()
+        ingestion = Ingestion(sink, manifest, embedder, args.embed_batch, args.batch_size, args.batch_bytes,
+                              args.upsert_workers, dedup)
+        try:
+            for source, chunks, error in parsed_documents(todo, args.workers):
+                if error is not None:
+                    print(f"❌ error parsing {source}: {error}")
+                    ingestion.fail_document(source)
+                    failed.append(source)
+                    continue
+                ingestion.add_document(source, hashes[source], chunks)
+                print(f"parsed {source}: {len(chunks)} chunks")
+            ingestion.flush()
+        except Exception as e:
+            sys.exit(f"❌ ingestion stopped: {e}. Finished documents are recorded in {manifest.path}; re-run to resume.")
+        finally:
+            if dedup is not None:
+                # also after a failure: the unfinished documents are re-ingested (and their chunks dropped) next run
+                dedup.save(dedup_path)
+        counters = ingestion.counters
+        print(f"embedding cache: {embedder.stats()}")
+    elif dedup is not None and pruned:
+        dedup.save(dedup_path)
+
+    if dedup is not None and counters["parsed_chunks"]:
+        dropped = counters["exact_duplicates"] + counters["near_duplicates"]
+        print(f"dedup: dropped {counters['exact_duplicates']} copies and {counters['near_duplicates']} near-duplicates "
+              f"of {counters['parsed_chunks']} chunks ({dropped / counters['parsed_chunks']:.1%} fewer vectors)")
+    sink.finish(manifest)
+    elapsed = time.perf_counter() - start
+    rss, worker_rss = peak_rss_mb()
+    print(f"✅ ingested {counters['documents']} documents, {counters['chunks']} chunks in {counters['batches']} batches "
+          f"in {elapsed:.1f}s ({counters['documents'] / elapsed:.2f} docs/s, {counters['chunks'] / elapsed:.1f} chunks/s); "
+          f"peak RSS {rss} MB, parser workers {worker_rss} MB")
+    if failed:
+        sys.exit(f"❌ {len(failed)} document(s) failed; re-run to retry them")
+
+
+if __name__ == "__main__":
+    main()